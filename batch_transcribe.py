@@ -0,0 +1,193 @@
+"""批量重新识别归档录音
+
+遍历目录（或文件列表）中的录音，以可配置的并发数和限速送入 SenseVoiceSmallProcessor / WhisperProcessor，
+结果逐行写入 JSONL。输出文件同时作为检查点：中断后用同样的参数重新运行，会跳过已完成的文件；
+加上 --retry-failed 会重新识别失败的文件（同一文件有多行时以最后一行为准）。
+只做语音识别，不做 LLM 后处理。
+
+用法：
+    python batch_transcribe.py output/ -o results.jsonl
+    python batch_transcribe.py output/2025-01-01 output/2025-01-02 --platform groq --concurrency 8 --rate 5
+    python batch_transcribe.py @files.txt -o results.jsonl --retry-failed
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import soundfile as sf
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.archive.index import AUDIO_EXTENSIONS
+from src.audio.chunker import AudioChunker
+from src.audio.encoder import AudioEncoder
+from src.transcription.registry import available_backends, create_backend
+from src.utils.logger import logger
+from src.utils.rate_limit import RateLimiter
+
+
+def iter_audio_files(inputs):
+    """按输入顺序产生录音路径：目录递归遍历（跳过隐藏目录），@文件 按行读取路径列表"""
+    for item in inputs:
+        if item.startswith("@"):
+            with open(item[1:], encoding="utf-8") as f:
+                yield from (line.strip() for line in f if line.strip())
+        elif os.path.isdir(item):
+            for directory, dirs, files in os.walk(item):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                for name in sorted(files):
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        yield os.path.join(directory, name)
+        else:
+            yield item
+
+
+def load_checkpoint(output, retry_failed):
+    """读取已有的结果文件，返回已完成的路径集合"""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 上次中断时写了一半的行
+            if not (retry_failed and record.get("error")):
+                done.add(record["path"])
+    return done
+
+
+class BatchTranscriber:
+    """批量识别：有界的并发提交、令牌桶限速、JSONL 输出及吞吐统计"""
+
+    def __init__(self, processor, model, mode="transcriptions", concurrency=4, rate=0.0, chunker=None,
+                 encoder=None):
+        self.processor = processor
+        self.model = model
+        self.mode = mode
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate, burst=concurrency)
+        self.chunker = chunker
+        self.encoder = encoder
+        self.files = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+
+    def _load(self, path):
+        """读取录音，返回 (上传用的字节流或 ChunkedAudio, 时长秒数)"""
+        try:
+            info = sf.info(path)
+            duration = info.duration
+        except Exception:
+            duration = None  # soundfile 不支持的格式，原样上传
+        if self.chunker is not None and duration and duration > self.chunker.threshold_seconds:
+            audio, sample_rate = sf.read(path, dtype="float32")
+            return self.chunker.split(audio, sample_rate, self.encoder), duration
+        with open(path, "rb") as f:
+            buffer = io.BytesIO(f.read())
+        buffer.name = os.path.basename(path)
+        return buffer, duration
+
+    def transcribe_file(self, path):
+        record = {"path": path, "platform": os.getenv("SERVICE_PLATFORM"), "model": self.model,
+                  "mode": self.mode, "text": None, "error": None, "duration": None, "latency": None}
+        try:
+            audio, record["duration"] = self._load(path)
+            # 长录音的每一段都是一次请求
+            for _ in range(len(audio) if isinstance(audio, list) else 1):
+                self.limiter.acquire()
+            start = time.perf_counter()
+            record["text"], record["error"] = self.processor.transcribe(audio, mode=self.mode, prompt="")
+            record["latency"] = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            record["error"] = f"❌ {str(e)}"
+        return record
+
+    def run(self, paths, output, done=frozenset(), progress_interval=10.0, checkpoint_every=20):
+        """识别 paths 中不在 done 里的文件，结果追加到 output"""
+        start = last_report = time.perf_counter()
+        skipped = 0
+        pending = set()
+        with open(output, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+
+            def collect(futures):
+                nonlocal last_report
+                for future in futures:
+                    record = future.result()
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    self.files += 1
+                    self.failed += bool(record["error"])
+                    self.audio_seconds += record["duration"] or 0.0
+                    if record["error"]:
+                        logger.warning(f"识别失败: {record['path']}: {record['error']}")
+                    if self.files % checkpoint_every == 0:
+                        out.flush()
+                        os.fsync(out.fileno())
+                now = time.perf_counter()
+                if now - last_report >= progress_interval:
+                    last_report = now
+                    logger.info(f"进度: {self.summary(now - start)}")
+
+            for path in paths:
+                if path in done:
+                    skipped += 1
+                    continue
+                # 只保留有限的待处理任务，文件再多也不会一次性读入内存
+                while len(pending) >= self.concurrency * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                pending.add(executor.submit(self.transcribe_file, path))
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+            out.flush()
+            os.fsync(out.fileno())
+
+        if skipped:
+            logger.info(f"跳过检查点中已完成的 {skipped} 个文件")
+        logger.info(f"完成: {self.summary(time.perf_counter() - start)}")
+
+    def summary(self, elapsed):
+        elapsed = max(elapsed, 1e-9)
+        return (f"{self.files} 个文件 (失败 {self.failed}), 音频 {self.audio_seconds:.0f} 秒, 耗时 {elapsed:.1f} 秒, "
+                f"吞吐 {self.files / elapsed:.2f} 文件/秒, {self.audio_seconds / elapsed:.1f} 音频秒/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量重新识别归档录音，结果写入 JSONL")
+    parser.add_argument("inputs", nargs="+", help="录音目录、录音文件，或 @列表文件（每行一个路径）")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="结果文件（同时作为检查点）")
+    parser.add_argument("--platform", choices=available_backends(), default=os.getenv("SERVICE_PLATFORM", "siliconflow"))
+    parser.add_argument("--mode", choices=["transcriptions", "translations"], default="transcriptions")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时进行的识别请求数")
+    parser.add_argument("--rate", type=float, default=0, help="每秒最多发出的请求数（0 表示不限速）")
+    parser.add_argument("--retry-failed", action="store_true", help="重新识别检查点中失败的文件")
+    parser.add_argument("--archive", action="store_true", help="把识别的录音再次归档到 output/（默认不归档）")
+    args = parser.parse_args()
+
+    # 请求在共享线程池中执行，线程数至少要等于并发数
+    os.environ["API_MAX_WORKERS"] = str(max(args.concurrency, int(os.getenv("API_MAX_WORKERS", "4"))))
+    os.environ["SERVICE_PLATFORM"] = args.platform
+
+    processor = create_backend(args.platform)
+    processor.archive_enabled = args.archive  # 归档线程在第一次归档时才启动
+    model = processor.model_for(args.mode)
+
+    batch = BatchTranscriber(processor, model, mode=args.mode, concurrency=args.concurrency, rate=args.rate,
+                             chunker=AudioChunker.from_env(), encoder=AudioEncoder.from_env())
+    try:
+        batch.run(iter_audio_files(args.inputs), args.output, done=load_checkpoint(args.output, args.retry_failed))
+    except KeyboardInterrupt:
+        print(f"\n已中断，结果已保存到 {args.output}，重新运行相同命令即可继续", file=sys.stderr)
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""录音归档基准测试
+
+对比识别关键路径上归档录音所花的时间：
+- 同步：原来的做法，调用 API 前写临时文件，返回结果前重命名并追加字幕文件
+- 异步：ArchiveWriter，关键路径上只把任务放入队列，写文件和批量 fsync 在后台完成
+
+每条录音之间间隔 --gap-ms（模拟两次说话之间调用 API、输入文字的时间）。
+另外用很小的队列、不间隔地连续提交，检查溢出目录的暂存与补做归档。
+
+用法：
+    python benchmarks/bench_archive.py
+    python benchmarks/bench_archive.py --utterances 200 --seconds 10 --dir /tmp/archive-bench
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.archive.writer import ArchiveWriter, safe_filename  # noqa: E402
+
+SAMPLE_RATE = 16000
+
+
+def synchronous_archive(root, subtitle_file, audio_data, transcript, audio_hash, fsync):
+    """原来的同步归档流程（写临时文件 -> 重命名 -> 追加字幕）"""
+    audio_dir = os.path.join(root, time.strftime("%Y-%m-%d"))
+    os.makedirs(audio_dir, exist_ok=True)
+    temp_filename = os.path.join(audio_dir, f"recording_{time.strftime('%H%M%S')}_{audio_hash[:8]}.wav")
+    with open(temp_filename, "wb") as f:
+        f.write(audio_data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    final_filename = os.path.join(audio_dir, f"{safe_filename(transcript)}.wav")
+    name, ext = os.path.splitext(final_filename)
+    counter = 1
+    while os.path.exists(final_filename):
+        final_filename = f"{name}_{counter}{ext}"
+        counter += 1
+    os.rename(temp_filename, final_filename)
+    with open(subtitle_file, "a", encoding="utf-8") as f:
+        f.write(transcript + "\n")
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[int(p * (len(ordered) - 1))]
+
+
+def report(name, samples):
+    print(f"{name:<22}{sum(samples) / len(samples) * 1000:>10.3f}{percentile(samples, 0.95) * 1000:>10.3f}"
+          f"{max(samples) * 1000:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录音归档基准测试")
+    parser.add_argument("--utterances", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=5, help="每条录音时长")
+    parser.add_argument("--gap-ms", type=float, default=50, help="两条录音之间的间隔")
+    parser.add_argument("--dir", default=None, help="测试目录（默认使用临时目录，结束后删除）")
+    args = parser.parse_args()
+
+    base = args.dir or tempfile.mkdtemp(prefix="archive-bench-")
+    rng = np.random.default_rng(0)
+    audio_data = (rng.standard_normal(int(args.seconds * SAMPLE_RATE)) * 3000).astype(np.int16).tobytes()
+    transcripts = [f"第 {i % 20} 条测试录音 今天下午开会" for i in range(args.utterances)]
+    hashes = [f"{i:032x}" for i in range(args.utterances)]
+    print(f"=== {args.utterances} 条录音, 每条 {len(audio_data) / 1024:.0f}KB, 间隔 {args.gap_ms:g}ms, 目录 {base} ===")
+    print(f"{'关键路径耗时':<18}{'平均(ms)':>10}{'p95(ms)':>10}{'最大(ms)':>10}")
+
+    try:
+        for fsync in (False, True):
+            root = os.path.join(base, f"sync-{fsync}")
+            os.makedirs(root)
+            samples = []
+            for transcript, audio_hash in zip(transcripts, hashes):
+                start = time.perf_counter()
+                synchronous_archive(root, os.path.join(root, "subtitle.txt"), audio_data, transcript, audio_hash,
+                                    fsync)
+                samples.append(time.perf_counter() - start)
+                time.sleep(args.gap_ms / 1000)
+            report(f"同步{' + fsync' if fsync else ''}", samples)
+
+        root = os.path.join(base, "async")
+        writer = ArchiveWriter(root=root, queue_size=64, subtitle_file=os.path.join(root, "subtitle.txt"))
+        samples = []
+        for transcript, audio_hash in zip(transcripts, hashes):
+            start = time.perf_counter()
+            writer.submit_recording(audio_data, ".wav", transcript, audio_hash)
+            writer.append_subtitle(transcript)
+            samples.append(time.perf_counter() - start)
+            time.sleep(args.gap_ms / 1000)
+        writer.flush()
+        report("异步 (批量 fsync)", samples)
+        stats = writer.stats()
+        print(f"后台写入 {stats['written']} 条, fsync {stats['fsyncs']} 批, 后台耗时 {stats['write_ms']:.0f}ms\n")
+
+        root = os.path.join(base, "burst")
+        writer = ArchiveWriter(root=root, queue_size=4, subtitle_file=os.path.join(root, "subtitle.txt"))
+        for transcript, audio_hash in zip(transcripts, hashes):
+            writer.submit_recording(audio_data, ".wav", transcript, audio_hash)
+        writer.flush()
+        stats = writer.stats()
+        archived = sum(len(files) for _, _, files in os.walk(root)) - len(os.listdir(writer.spill_dir))
+        print(f"突发 (队列长度 4): 提交 {stats['submitted']} 条, 暂存溢出目录 {stats['spilled']} 条, "
+              f"丢弃 {stats['dropped']} 条, 最终归档 {archived} 条")
+    finally:
+        if not args.dir:
+            shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
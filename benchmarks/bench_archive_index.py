@@ -0,0 +1,83 @@
+"""归档索引检索基准测试
+
+生成 N 条合成的识别记录（模拟数月的口述录音，中英文混合），写入 ArchiveIndex，
+再用不同长度的关键词检索，报告每次检索的耗时，并与逐个扫描归档目录文件名的做法对比。
+
+用法：
+    python benchmarks/bench_archive_index.py
+    python benchmarks/bench_archive_index.py --recordings 200000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.archive.index import ArchiveIndex  # noqa: E402
+
+PHRASES = [
+    "明天下午两点在三楼开会", "请把会议纪要发给所有参会的人", "这个版本还有一些问题暂时不能发布",
+    "我们需要再跟客户沟通一下价格", "麻烦你帮我订一张明天去上海的火车票", "这个功能为什么突然不能用了",
+    "let's schedule a call for next tuesday", "please send me the invoice by the end of the day",
+    "the test passed locally but it fails on the server", "we need to fix this before the release",
+]
+QUERIES = ["会议纪要", "上海", "火车票", "invoice", "release 发布", "不存在的关键词"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="归档索引检索基准测试")
+    parser.add_argument("--recordings", type=int, default=50000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--scan-files", type=int, default=5000, help="对比用的目录扫描文件数")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    base = tempfile.mkdtemp(prefix="archive-index-bench-")
+    try:
+        index = ArchiveIndex(os.path.join(base, "archive.db"))
+        now = time.time()
+        start = time.perf_counter()
+        rows = []
+        for i in range(args.recordings):
+            transcript = " ".join(rng.sample(PHRASES, 2)) + f" 编号{i}"
+            rows.append((os.path.join(base, f"{i}.wav"), now - rng.random() * args.days * 86400,
+                         rng.uniform(1, 30), 16000, f"{i:032x}", rng.choice(["transcriptions", "translations"]),
+                         "FunAudioLLM/SenseVoiceSmall", rng.uniform(0.3, 2), transcript))
+        with index._lock:
+            index._db.executemany(
+                """INSERT INTO recordings (path, created_at, duration, sample_rate, audio_hash, mode, model,
+                                           latency, transcript) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+            index._db.commit()
+        print(f"=== {args.recordings} 条录音 ({args.days} 天), 写入耗时 {time.perf_counter() - start:.1f}s, "
+              f"全文索引 {'FTS5' if index.fts else 'LIKE'} ===")
+
+        print(f"{'关键词':<16}{'结果数':>8}{'耗时(ms)':>10}")
+        for query in QUERIES:
+            start = time.perf_counter()
+            results = index.search(query, limit=50)
+            print(f"{query:<16}{len(results):>8}{(time.perf_counter() - start) * 1000:>10.1f}")
+        start = time.perf_counter()
+        results = index.search("会议纪要", limit=50, mode="translations", since=now - 30 * 86400)
+        print(f"{'会议纪要 (近30天, 翻译)':<16}{len(results):>4}{(time.perf_counter() - start) * 1000:>10.1f}")
+
+        # 对比：以识别结果命名的文件逐个扫描目录
+        scan_dir = os.path.join(base, "output")
+        for i in range(args.scan_files):
+            day_dir = os.path.join(scan_dir, f"day{i % args.days}")
+            os.makedirs(day_dir, exist_ok=True)
+            open(os.path.join(day_dir, f"{rows[i][-1]}.wav"), "wb").close()
+        start = time.perf_counter()
+        found = [name for _, _, files in os.walk(scan_dir) for name in files if "会议纪要" in name]
+        print(f"\n扫描目录 {args.scan_files} 个文件名: {len(found)} 条, "
+              f"耗时 {(time.perf_counter() - start) * 1000:.1f}ms")
+        index.close()
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
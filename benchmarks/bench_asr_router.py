@@ -0,0 +1,139 @@
+"""识别路由（对冲请求与故障切换）基准测试
+
+用模拟的识别后端代替真实 API：延迟服从对数正态分布，并有一定比例的长尾请求和失败请求。
+对比只用主平台与经 ASRRouter 路由时的延迟分位数和失败率，并模拟主平台中途完全不可用的情况。
+
+用法：
+    python benchmarks/bench_asr_router.py
+    python benchmarks/bench_asr_router.py --requests 400 --tail-rate 0.1 --error-rate 0.05
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.transcription.router import ASRRouter  # noqa: E402
+from src.utils.metrics import LatencyTracker  # noqa: E402
+
+
+class SimulatedBackend:
+    """模拟识别后端：median 秒左右返回，tail_rate 的请求慢 tail_factor 倍，error_rate 的请求失败"""
+
+    def __init__(self, name, median, tail_rate, tail_factor, error_rate, seed):
+        self.name = name
+        self.median = median
+        self.tail_rate = tail_rate
+        self.tail_factor = tail_factor
+        self.error_rate = error_rate
+        self.down = False
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def transcribe(self, audio_buffer, mode="transcriptions", prompt=""):
+        with self._lock:
+            self.calls += 1
+            delay = self.median * self._rng.lognormvariate(0, 0.25)
+            if self._rng.random() < self.tail_rate:
+                delay *= self.tail_factor
+            failed = self.down or self._rng.random() < self.error_rate
+        audio_buffer.close()
+        if self.down:
+            time.sleep(0.05)  # 连接被拒绝，很快失败
+            return None, f"❌ {self.name} 不可用"
+        time.sleep(delay)
+        if failed:
+            return None, f"❌ {self.name} 返回 500"
+        return f"{self.name} 识别结果", None
+
+    def post_process(self, text, mode="transcriptions"):
+        return text, None
+
+    def prewarm(self):
+        pass
+
+
+def make_audio():
+    buffer = io.BytesIO(b"\0" * 32000)
+    buffer.name = "audio.wav"
+    return buffer
+
+
+def run(processor, requests, outage_at=None, primary=None):
+    latency = LatencyTracker(requests)
+    failures = 0
+    for i in range(requests):
+        if outage_at is not None and i == outage_at:
+            primary.down = True
+        start = time.perf_counter()
+        text, error = processor.transcribe(make_audio())
+        latency.record(time.perf_counter() - start)
+        failures += bool(error)
+    if primary is not None:
+        primary.down = False
+    return latency, failures
+
+
+def report(label, latency, failures, requests):
+    print(f"{label:<28}{latency.percentile(50) * 1000:>8.0f}{latency.percentile(95) * 1000:>8.0f}"
+          f"{latency.percentile(99) * 1000:>8.0f}{failures / requests:>9.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="识别路由基准测试")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--median-ms", type=float, default=80, help="主平台延迟中位数")
+    parser.add_argument("--secondary-median-ms", type=float, default=100, help="备用平台延迟中位数")
+    parser.add_argument("--tail-rate", type=float, default=0.08, help="长尾请求比例")
+    parser.add_argument("--tail-factor", type=float, default=8.0, help="长尾请求的延迟倍数")
+    parser.add_argument("--error-rate", type=float, default=0.03)
+    args = parser.parse_args()
+
+    def backends():
+        primary = SimulatedBackend("siliconflow", args.median_ms / 1000, args.tail_rate, args.tail_factor,
+                                   args.error_rate, seed=1)
+        secondary = SimulatedBackend("groq", args.secondary_median_ms / 1000, args.tail_rate, args.tail_factor,
+                                     args.error_rate, seed=2)
+        return primary, secondary
+
+    print(f"=== {args.requests} 次请求, 长尾 {args.tail_rate:.0%} x{args.tail_factor:g}, "
+          f"失败率 {args.error_rate:.0%} ===")
+    print(f"{'':<28}{'p50(ms)':>8}{'p95':>8}{'p99':>8}{'失败率':>9}")
+
+    primary, _ = backends()
+    report("只用主平台", *run(primary, args.requests), args.requests)
+
+    primary, secondary = backends()
+    router = ASRRouter([("siliconflow", primary), ("groq", secondary)], hedge=False,
+                       hedge_default_seconds=args.median_ms * 3 / 1000)
+    report("路由 (仅故障切换)", *run(router, args.requests), args.requests)
+
+    primary, secondary = backends()
+    router = ASRRouter([("siliconflow", primary), ("groq", secondary)],
+                       hedge_min_seconds=args.median_ms / 1000, hedge_default_seconds=args.median_ms * 3 / 1000)
+    report("路由 (对冲 + 故障切换)", *run(router, args.requests), args.requests)
+    stats = router.stats()
+    extra = stats["hedged"] / max(1, stats["requests"])
+    print(f"    对冲 {stats['hedged']} 次 (额外请求 {extra:.1%}), 对冲胜出 {stats['hedge_wins']} 次, "
+          f"故障切换 {stats['failovers']} 次")
+
+    print(f"\n--- 主平台在第 {args.requests // 4} 次请求后完全不可用 ---")
+    primary, _ = backends()
+    report("只用主平台", *run(primary, args.requests, args.requests // 4, primary), args.requests)
+    primary, secondary = backends()
+    router = ASRRouter([("siliconflow", primary), ("groq", secondary)],
+                       hedge_min_seconds=args.median_ms / 1000, hedge_default_seconds=args.median_ms * 3 / 1000,
+                       reset_seconds=1.0)
+    report("路由 (对冲 + 故障切换)", *run(router, args.requests, args.requests // 4, primary), args.requests)
+    stats = router.stats()
+    print(f"    主平台熔断 {stats['backends']['siliconflow']['trips']} 次, 实际请求主平台 {primary.calls} 次, "
+          f"故障切换 {stats['failovers']} 次")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""采集引擎微基准测试
+
+对比 queue（逐块 copy 入队 + 停止时 concatenate）与 ring（预分配环形缓冲区）
+两种采集模式在 10 秒、60 秒、10 分钟合成音频流下的回调耗时与峰值内存。
+
+用法：
+    python benchmarks/bench_capture.py
+    python benchmarks/bench_capture.py --sample-rate 16000 --block 256
+
+每个场景在独立子进程中运行，保证峰值 RSS 互不影响。
+"""
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+DURATIONS = [("10s", 10), ("60s", 60), ("10min", 600)]
+
+
+def peak_rss_mb():
+    """返回当前进程的峰值 RSS（MB），不支持的平台返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 单位为字节，Linux 为 KB
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(mode, seconds, sample_rate, block, dtype, buffer_seconds):
+    """在当前进程中模拟一次录音并返回统计结果"""
+    from src.audio.ring_buffer import AudioRingBuffer
+
+    rng = np.random.default_rng(0)
+    # PortAudio 每次回调复用同一块内存，这里同样复用一个数组
+    indata = (rng.standard_normal((block, 1)) * 0.1).astype(dtype)
+    blocks = int(seconds * sample_rate / block)
+    timings = np.empty(blocks, dtype=np.int64)
+    baseline_rss = peak_rss_mb()
+
+    if mode == "ring":
+        buffer = AudioRingBuffer(sample_rate * buffer_seconds, channels=1, dtype=dtype)
+
+        def callback(data):
+            buffer.write(data)
+    else:
+        audio_queue = queue.Queue()
+
+        def callback(data):
+            audio_queue.put(data.copy())
+
+    for i in range(blocks):
+        start = time.perf_counter_ns()
+        callback(indata)
+        timings[i] = time.perf_counter_ns() - start
+
+    stop_start = time.perf_counter()
+    if mode == "ring":
+        audio = buffer.view()
+    else:
+        pieces = []
+        while not audio_queue.empty():
+            pieces.append(audio_queue.get())
+        audio = np.concatenate(pieces)
+    stop_ms = (time.perf_counter() - stop_start) * 1000
+
+    assert len(audio) == blocks * block
+    return {
+        "mode": mode,
+        "seconds": seconds,
+        "callback_mean_us": float(timings.mean()) / 1000,
+        "callback_p99_us": float(np.percentile(timings, 99)) / 1000,
+        "callback_max_us": float(timings.max()) / 1000,
+        "stop_ms": stop_ms,
+        "peak_rss_mb": peak_rss_mb(),
+        "baseline_rss_mb": baseline_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="采集引擎微基准测试")
+    parser.add_argument("--sample-rate", type=int, default=48000)
+    parser.add_argument("--block", type=int, default=512, help="每次回调的帧数")
+    parser.add_argument("--dtype", choices=["float32", "int16"], default="float32")
+    parser.add_argument("--buffer-seconds", type=int, default=600, help="环形缓冲区预分配时长（秒）")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        mode, seconds = args.case.split(":")
+        result = run_case(mode, int(seconds), args.sample_rate, args.block, args.dtype,
+                          args.buffer_seconds)
+        print(json.dumps(result))
+        return
+
+    print(f"采样率 {args.sample_rate}Hz, 块大小 {args.block} 帧, 格式 {args.dtype}\n")
+    header = f"{'时长':<7}{'模式':<7}{'回调均值(us)':>14}{'回调p99(us)':>14}{'回调最大(us)':>14}{'停止(ms)':>10}{'峰值RSS(MB)':>13}"
+    print(header)
+    print("-" * len(header))
+    for label, seconds in DURATIONS:
+        for mode in ("queue", "ring"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--case", f"{mode}:{seconds}",
+                 "--sample-rate", str(args.sample_rate), "--block", str(args.block),
+                 "--dtype", args.dtype, "--buffer-seconds", str(args.buffer_seconds)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            r = json.loads(output.strip().splitlines()[-1])
+            rss = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "n/a"
+            print(f"{label:<7}{mode:<7}{r['callback_mean_us']:>14.2f}{r['callback_p99_us']:>14.2f}"
+                  f"{r['callback_max_us']:>14.1f}{r['stop_ms']:>10.2f}{rss:>13}")
+
+
+if __name__ == "__main__":
+    main()
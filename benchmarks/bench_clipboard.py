@@ -0,0 +1,102 @@
+"""剪贴板读写基准测试
+
+用计数的桩后端代替系统剪贴板，模拟一次语音输入（按下快捷键 → 输入识别结果 → 恢复剪贴板），对比：
+- 原来的做法：按下快捷键时同步读取剪贴板，结果粘贴后写回原始内容
+- ClipboardService：按下快捷键时不读取，第一次写入前才保存；结果直接合成按键输入时完全不碰剪贴板，
+  已知内容相同的写入跳过，读写都在后台线程中进行
+
+剪贴板读写的开销用 --clipboard-ms 模拟（Linux 上每次 pyperclip 调用都会启动 xclip/xsel 进程）。
+
+用法：
+    python benchmarks/bench_clipboard.py
+    python benchmarks/bench_clipboard.py --clipboard-ms 8 --utterances 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.clipboard import ClipboardService  # noqa: E402
+
+TEXTS = {
+    "短句（按键输入）": ("好的，收到", False),
+    "长段落（粘贴输入）": ("明天下午两点在三楼开会，请把会议纪要发给所有参会的人", True),
+}
+
+
+class StubBackend:
+    """记录读写次数的桩剪贴板，每次读写耗时 seconds"""
+
+    name = "stub"
+
+    def __init__(self, seconds, with_change_count=False):
+        self.seconds = seconds
+        self.with_change_count = with_change_count
+        self.value = "用户原来的剪贴板内容"
+        self.reads = 0
+        self.writes = 0
+        self.count = 0
+
+    def read(self):
+        self.reads += 1
+        time.sleep(self.seconds)
+        return self.value
+
+    def write(self, text):
+        self.writes += 1
+        time.sleep(self.seconds)
+        self.value = text
+        self.count += 1
+
+    def change_count(self):
+        return self.count if self.with_change_count else None
+
+
+def old_utterance(backend, text, paste):
+    """原来的实现，返回按下快捷键时阻塞的耗时"""
+    start = time.perf_counter()
+    original = backend.read()
+    blocked = time.perf_counter() - start
+    if paste:
+        backend.write(text)
+        backend.write(original)
+    return blocked
+
+
+def new_utterance(service, text, paste):
+    start = time.perf_counter()
+    service.begin_session()
+    blocked = time.perf_counter() - start
+    if paste:
+        service.copy(text)
+    service.restore()
+    return blocked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="剪贴板读写基准测试")
+    parser.add_argument("--clipboard-ms", type=float, default=5.0, help="每次剪贴板读写的耗时")
+    parser.add_argument("--utterances", type=int, default=20, help="每种情况模拟的语音输入次数")
+    args = parser.parse_args()
+
+    seconds = args.clipboard_ms / 1000
+    print(f"=== 剪贴板读写 {args.clipboard_ms:g}ms/次, 每种情况 {args.utterances} 次语音输入 ===")
+    print(f"{'':<18}{'方式':>22}{'按下时阻塞(ms)':>16}{'读/次':>8}{'写/次':>8}")
+    for label, (text, paste) in TEXTS.items():
+        backend = StubBackend(seconds)
+        blocked = sum(old_utterance(backend, text, paste) for _ in range(args.utterances))
+        print(f"{label:<18}{'原实现':>22}{blocked / args.utterances * 1000:>16.2f}"
+              f"{backend.reads / args.utterances:>8.1f}{backend.writes / args.utterances:>8.1f}")
+        for name, with_change_count in (("ClipboardService", False), ("ClipboardService+计数", True)):
+            backend = StubBackend(seconds, with_change_count)
+            service = ClipboardService(backend)
+            blocked = sum(new_utterance(service, text, paste) for _ in range(args.utterances))
+            service.paste()  # 等待后台线程处理完
+            print(f"{label:<18}{name:>22}{blocked / args.utterances * 1000:>16.2f}"
+                  f"{backend.reads / args.utterances:>8.1f}{backend.writes / args.utterances:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
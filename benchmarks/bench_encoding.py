@@ -0,0 +1,94 @@
+"""上传编码基准测试
+
+对比各上传格式的编码耗时与上传体积，并按给定的上行带宽估算端到端耗时
+（编码 + 上传），便于选择最合适的 UPLOAD_FORMAT。
+
+用法：
+    python benchmarks/bench_encoding.py
+    python benchmarks/bench_encoding.py --uplink-mbps 2 --source-rate 44100 --seconds 10 30
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.audio.encoder import AudioEncoder  # noqa: E402
+
+
+def synthetic_speech(seconds, sample_rate, seed=0):
+    """生成类语音信号：带音节包络的谐波 + 底噪 + 停顿"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * (np.sin(2 * np.pi * 0.25 * t) > -0.3)
+    audio = 0.2 * voiced * syllables + 0.003 * rng.standard_normal(len(t))
+    return audio.astype(np.float32).reshape(-1, 1)
+
+
+def encode_baseline(audio, sample_rate):
+    """改造前的做法：按采集采样率直接写 WAV"""
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format='WAV')
+    return buffer
+
+
+def measure(encode, repeat):
+    """返回 (最短编码耗时秒, 字节数)"""
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        buffer = encode()
+        best = min(best, time.perf_counter() - start)
+        size = len(buffer.getvalue())
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="上传编码基准测试")
+    parser.add_argument("--source-rate", type=int, default=48000, help="采集采样率")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5, 30, 120])
+    parser.add_argument("--uplink-mbps", type=float, default=5.0, help="上行带宽（Mbit/s）")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    candidates = [
+        (f"wav {args.source_rate // 1000}k (原始)", None),
+        ("wav 16k", AudioEncoder("wav", 16000)),
+        ("flac 16k", AudioEncoder("flac", 16000)),
+    ]
+    if "OPUS" in sf.available_subtypes("OGG"):
+        candidates.append(("opus 16k", AudioEncoder("opus", 16000)))
+    else:
+        print("当前 libsndfile 不支持 Opus，跳过\n")
+
+    bytes_per_second = args.uplink_mbps * 1_000_000 / 8
+    for seconds in args.seconds:
+        audio = synthetic_speech(seconds, args.source_rate)
+        print(f"=== {seconds:g} 秒音频, 上行 {args.uplink_mbps:g} Mbit/s ===")
+        print(f"{'格式':<16}{'编码(ms)':>10}{'体积(KB)':>11}{'上传(ms)':>10}{'合计(ms)':>10}")
+        rows = []
+        for name, encoder in candidates:
+            if encoder is None:
+                encode = lambda: encode_baseline(audio, args.source_rate)  # noqa: E731
+            else:
+                encode = lambda encoder=encoder: encoder.encode(audio, args.source_rate)  # noqa: E731
+            encode_s, size = measure(encode, args.repeat)
+            upload_s = size / bytes_per_second
+            rows.append((name, encode_s, size, upload_s))
+            print(f"{name:<16}{encode_s * 1000:>10.1f}{size / 1024:>11.1f}"
+                  f"{upload_s * 1000:>10.1f}{(encode_s + upload_s) * 1000:>10.1f}")
+        best = min(rows, key=lambda r: r[1] + r[3])
+        print(f"端到端最快: {best[0]}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""按住阈值检测基准测试
+
+模拟按住快捷键：对比原来每 10ms 轮询一次按键时长的检测线程与定时器驱动的 HoldDetector，
+报告触发时间相对阈值的抖动（触发时刻 - 按下时刻 - 阈值）以及按住期间每秒的唤醒次数。
+另外检查组合键（阈值到达前才按下修饰键）、阈值前松开等情况下的触发是否正确，
+任一检查不通过时以非零状态退出。
+
+用法：
+    python benchmarks/bench_hold_detector.py
+    python benchmarks/bench_hold_detector.py --presses 50 --threshold-ms 500 --hold-ms 1500
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.keyboard.hold_detector import HoldBinding, HoldDetector  # noqa: E402
+from src.utils.metrics import LatencyTracker  # noqa: E402
+
+
+class PollingDetector:
+    """原来的实现：按下后启动线程，每 10ms 检查一次按住时长"""
+
+    def __init__(self, threshold, on_hold):
+        self.threshold = threshold
+        self.on_hold = on_hold
+        self.pressed = False
+        self.press_time = None
+        self.triggered = False
+        self.wakeups = 0
+
+    def press(self, key):
+        self.pressed = True
+        self.press_time = time.time()
+
+        def check_duration():
+            while self.pressed:
+                self.wakeups += 1
+                if not self.triggered and time.time() - self.press_time >= self.threshold:
+                    self.triggered = True
+                    self.on_hold(None)
+                time.sleep(0.01)
+
+        threading.Thread(target=check_duration, daemon=True).start()
+
+    def release(self, key):
+        self.pressed = False
+        self.triggered = False
+
+
+def measure(make_detector, presses, threshold, hold):
+    jitter = LatencyTracker(presses)
+    state = {}
+
+    def on_hold(binding):
+        jitter.record(time.monotonic() - state["pressed_at"] - threshold)
+
+    detector, wakeups = make_detector(on_hold)
+    held = 0.0
+    for _ in range(presses):
+        before = wakeups()
+        state["pressed_at"] = time.monotonic()
+        detector.press("alt")
+        time.sleep(hold)
+        detector.release("alt")
+        held += time.monotonic() - state["pressed_at"]
+        state["wakeups"] = state.get("wakeups", 0) + wakeups() - before
+        time.sleep(0.05)
+    return jitter, state["wakeups"] / held
+
+
+def check_chords(threshold):
+    """组合键与松开时机的正确性检查，返回 (描述, 是否符合预期) 列表"""
+    events = []
+    detector = HoldDetector([
+        HoldBinding("transcribe", "alt", (), threshold),
+        HoldBinding("translate", "alt", ("shift",), threshold),
+        HoldBinding("slow", "alt", ("shift", "ctrl"), threshold * 2),
+    ], on_hold=lambda b: events.append(("hold", b.name)), on_release=lambda b: events.append(("release", b.name)))
+
+    def run(steps):
+        events.clear()
+        for action, key, delay in steps:
+            getattr(detector, action)(key)
+            time.sleep(delay)
+        return list(events)
+
+    t = threshold
+    return [
+        ("按住 alt", run([("press", "alt", t * 1.5), ("release", "alt", 0.02)])
+         == [("hold", "transcribe"), ("release", "transcribe")]),
+        ("阈值前松开", run([("press", "alt", t * 0.5), ("release", "alt", t)]) == []),
+        ("阈值前按下 shift", run([("press", "alt", t * 0.5), ("press", "shift", t), ("release", "alt", 0.02),
+                                 ("release", "shift", 0.02)])
+         == [("hold", "translate"), ("release", "translate")]),
+        ("自动重复的按下事件", run([("press", "alt", t * 0.4), ("press", "alt", t * 0.4), ("press", "alt", t * 0.4),
+                                   ("release", "alt", 0.02)])
+         == [("hold", "transcribe"), ("release", "transcribe")]),
+        ("三键组合使用更长的阈值", run([("press", "ctrl", 0), ("press", "shift", 0), ("press", "alt", t * 1.5)])
+         == [] and run([("press", "alt", t), ("release", "alt", 0.02), ("release", "shift", 0),
+                        ("release", "ctrl", 0.02)]) == [("hold", "slow"), ("release", "slow")]),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按住阈值检测基准测试")
+    parser.add_argument("--presses", type=int, default=20)
+    parser.add_argument("--threshold-ms", type=float, default=500)
+    parser.add_argument("--hold-ms", type=float, default=1000, help="每次按住的时长")
+    args = parser.parse_args()
+    threshold, hold = args.threshold_ms / 1000, args.hold_ms / 1000
+
+    def polling(on_hold):
+        detector = PollingDetector(threshold, on_hold)
+        return detector, lambda: detector.wakeups
+
+    def timer(on_hold):
+        detector = HoldDetector([HoldBinding("transcribe", "alt", (), threshold)], on_hold, lambda b: None)
+        return detector, lambda: detector.scheduler.wakeups
+
+    print(f"=== {args.presses} 次按住, 阈值 {args.threshold_ms:g}ms, 每次按住 {args.hold_ms:g}ms ===")
+    print(f"{'':<12}{'抖动p50(ms)':>12}{'p95':>8}{'max':>8}{'唤醒/秒':>10}")
+    for label, make in (("10ms 轮询", polling), ("定时器", timer)):
+        jitter, rate = measure(make, args.presses, threshold, hold)
+        print(f"{label:<12}{jitter.percentile(50) * 1000:>12.2f}{jitter.percentile(95) * 1000:>8.2f}"
+              f"{jitter.percentile(100) * 1000:>8.2f}{rate:>10.1f}")
+
+    print("\n组合键检查:")
+    results = check_chords(min(threshold, 0.2))
+    for label, ok in results:
+        print(f"  {'✓' if ok else '✗'} {label}")
+    failed = [label for label, ok in results if not ok]
+    if failed:
+        print(f"{len(failed)} 项检查未通过: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""LLM 流式输出基准测试
+
+启动一个本地的 chat completions 桩服务：按固定的首 token 耗时和每 token 耗时生成译文，
+支持普通响应和 SSE 流式响应。分别用 TranslateProcessor.translate（等待完整结果）和
+流式后处理（StreamedText 按句分批）翻译同一段文本，报告首批文本可输入的时间和总耗时。
+
+用法：
+    python benchmarks/bench_llm_streaming.py
+    python benchmarks/bench_llm_streaming.py --sentences 6 --token-ms 30 --first-token-ms 300
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+SENTENCE = "The quick brown fox jumps over the lazy dog near the river bank."
+
+
+def make_handler(reply_tokens, first_token_seconds, token_seconds):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(first_token_seconds)
+            if not body.get("stream"):
+                time.sleep(token_seconds * (len(reply_tokens) - 1))
+                payload = json.dumps({"choices": [{"message": {"content": "".join(reply_tokens)}}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, token in enumerate(reply_tokens):
+                if i:
+                    time.sleep(token_seconds)
+                event = {"choices": [{"delta": {"content": token}}]}
+                self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 流式输出基准测试")
+    parser.add_argument("--sentences", type=int, default=4, help="译文句数")
+    parser.add_argument("--first-token-ms", type=float, default=300, help="桩服务首 token 耗时")
+    parser.add_argument("--token-ms", type=float, default=25, help="桩服务每 token 耗时")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["TRANSLATION_MEMORY_ENABLED"] = "false"
+    from src.llm.postprocess import PostProcessor
+    from src.llm.translate import TranslateProcessor
+
+    words = " ".join([SENTENCE] * args.sentences).split(" ")
+    reply_tokens = [words[0]] + [" " + word for word in words[1:]]
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(
+        reply_tokens, args.first_token_ms / 1000, args.token_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    translator = TranslateProcessor()
+    translator.url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    post_processor = PostProcessor(translator.chat, {"translate": translator.translate},
+                                   stream_steps={"translate": translator.translate_stream})
+    print(f"=== 译文 {len(reply_tokens)} 个 token ({args.sentences} 句), 桩服务首 token "
+          f"{args.first_token_ms:g}ms + 每 token {args.token_ms:g}ms ===")
+
+    blocking, streamed = [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        text = translator.translate("原文")
+        blocking.append((time.perf_counter() - start,) * 2)
+
+        start = time.perf_counter()
+        stream = post_processor.stream("原文", {"translate"})
+        first = None
+        for _batch in stream:
+            first = first or time.perf_counter() - start
+        streamed.append((first, time.perf_counter() - start))
+        assert stream.text == text, (stream.text, text)
+
+    def average(samples, i):
+        return sum(sample[i] for sample in samples) / len(samples) * 1000
+
+    print(f"{'方式':<10}{'首批输入(ms)':>14}{'全部完成(ms)':>14}")
+    print(f"{'等待完整':<10}{average(blocking, 0):>14.0f}{average(blocking, 1):>14.0f}")
+    print(f"{'流式':<10}{average(streamed, 0):>14.0f}{average(streamed, 1):>14.0f}")
+    print(f"首批输入提前 {average(blocking, 0) - average(streamed, 0):.0f}ms, 结果一致")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
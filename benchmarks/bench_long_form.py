@@ -0,0 +1,200 @@
+"""长录音并发识别基准测试
+
+启动一个本地的识别接口桩服务：按上传音频的时长模拟服务端耗时，并把音频中的
+“词”解码为文本返回。对同一段长录音，分别整段上传、以不同并发数分段上传，
+报告墙钟耗时、相对整段上传的加速比，以及合并后的文本是否与原文一致。
+开始前先检查几组固定的合并用例，任一用例不通过时以非零状态退出。
+
+合成音频中每个“词”是一段固定频率的正弦音（第 k 个词频率为 300 + 20k Hz），
+词之间有短间隔，每句之间有较长停顿，便于 VAD 切分；桩服务按能量分出各个音，
+用 FFT 找到频率还原词序号。切分点附近被截断的音会被解码成残缺的词，与真实服务
+在切分点附近的识别错误类似。
+
+用法：
+    python benchmarks/bench_long_form.py
+    python benchmarks/bench_long_form.py --seconds 180 --split fixed --concurrency 1 2 4 8
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+SAMPLE_RATE = 16000
+WORD_SECONDS, GAP_SECONDS, PAUSE_SECONDS, WORDS_PER_SENTENCE = 0.4, 0.1, 1.0, 8
+
+
+def word_frequency(k):
+    return 300 + 20 * k
+
+
+def synthetic_dictation(seconds, seed=0):
+    """生成合成口述音频，返回 (音频, 词列表)"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(WORD_SECONDS * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = np.minimum(1, np.minimum(t, WORD_SECONDS - t) / 0.02)
+    gap = np.zeros(int(GAP_SECONDS * SAMPLE_RATE), dtype=np.float32)
+    pause = np.zeros(int(PAUSE_SECONDS * SAMPLE_RATE), dtype=np.float32)
+
+    parts, words, total = [], [], 0
+    while total < seconds * SAMPLE_RATE:
+        for _ in range(WORDS_PER_SENTENCE):
+            k = len(words)
+            parts += [(0.3 * envelope * np.sin(2 * np.pi * word_frequency(k) * t)).astype(np.float32), gap]
+            words.append(f"w{k}")
+        parts.append(pause)
+        total = sum(len(p) for p in parts)
+    audio = np.concatenate(parts)
+    audio += 0.002 * rng.standard_normal(len(audio)).astype(np.float32)
+    return audio.reshape(-1, 1), words
+
+
+def decode_words(audio, sample_rate):
+    """桩服务的“识别”：按能量找出各个音，FFT 求频率后还原词序号"""
+    frame = sample_rate // 100
+    n = len(audio) // frame
+    energy = (audio[:n * frame].reshape(n, frame) ** 2).mean(axis=1)
+    active = np.concatenate(([False], energy > 1e-3, [False]))
+    edges = np.diff(active.astype(np.int8))
+    words = []
+    for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        if end - start < 8:  # 短于 80ms 的残片无法识别
+            continue
+        segment = audio[start * frame:end * frame]
+        spectrum = np.abs(np.fft.rfft(segment * np.hanning(len(segment)), n=1 << 16))
+        freq = np.argmax(spectrum) * sample_rate / (1 << 16)
+        k = int(round((freq - word_frequency(0)) / 20))
+        # 被切断的音识别结果不稳定，模拟为残缺的词
+        words.append(f"w{k}" if end - start >= 30 else f"w{k}?")
+    return " ".join(words)
+
+
+def make_handler(base_latency, rtf):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            boundary = self.headers["Content-Type"].split("boundary=")[1].encode()
+            audio, rate = None, SAMPLE_RATE
+            for part in body.split(b"--" + boundary):
+                if b'name="file"' in part:
+                    data = part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0]
+                    audio, rate = sf.read(io.BytesIO(data), dtype="float32")
+            time.sleep(base_latency + rtf * len(audio) / rate)
+            payload = json.dumps({"text": decode_words(audio, rate)}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+# (各段识别文本及是否与上一段重叠, 期望的合并结果)
+MERGE_CASES = [
+    ([("I went to the store and", False), ("and then I came home", True)],
+     "I went to the store and then I came home"),
+    ([("we saw the cat and the dog ran", False), ("the dog ran away fast", True)],
+     "we saw the cat and the dog ran away fast"),
+    ([("今天天气很好我们", False), ("很好我们去公园", True)], "今天天气很好我们去公园"),
+    ([("a b c", False), (None, True), ("c d e", True)], "a b c … c d e"),
+]
+
+
+def check_merge_cases():
+    """检查固定的合并用例，返回是否全部通过"""
+    from src.transcription.chunking import merge_transcripts
+
+    passed = True
+    for parts, expected in MERGE_CASES:
+        got = merge_transcripts(parts)
+        ok = got == expected
+        passed &= ok
+        print(f"{'✓' if ok else '✗'} 合并 {[text for text, _ in parts]} -> {got!r}"
+              + ("" if ok else f"（期望 {expected!r}）"))
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="长录音并发识别基准测试")
+    parser.add_argument("--seconds", type=float, default=180, help="录音时长")
+    parser.add_argument("--chunk-seconds", type=float, default=20)
+    parser.add_argument("--overlap-seconds", type=float, default=1.0)
+    parser.add_argument("--split", choices=["vad", "fixed"], default="vad")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--base-latency", type=float, default=0.3, help="桩服务每次请求的固定耗时（秒）")
+    parser.add_argument("--rtf", type=float, default=0.04, help="桩服务每秒音频的处理耗时（秒）")
+    args = parser.parse_args()
+
+    # 线程池要足够大，否则并发数会被 API_MAX_WORKERS 限制
+    os.environ["API_MAX_WORKERS"] = str(max(args.concurrency))
+    from src.audio.chunker import AudioChunker
+    from src.audio.encoder import AudioEncoder
+    from src.transcription.chunking import LongFormTranscriber
+    from src.utils.http_client import get_http_client
+    from src.utils.timeout import get_timeout_executor
+
+    if not check_merge_cases():
+        sys.exit(1)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.base_latency, args.rtf))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/audio/transcriptions"
+
+    def call_api(buffer):
+        # 与 SenseVoiceSmallProcessor._call_api 相同：共享连接池 + 10 秒超时
+        def post():
+            response = get_http_client().post(url, files={"file": (buffer.name, buffer.getvalue())}, timeout=30.0)
+            response.raise_for_status()
+            return response.json()["text"]
+        return get_timeout_executor().call(10, post)
+
+    audio, words = synthetic_dictation(args.seconds)
+    expected = " ".join(words)
+    encoder = AudioEncoder("wav", SAMPLE_RATE)
+    chunker = AudioChunker(chunk_seconds=args.chunk_seconds, overlap_seconds=args.overlap_seconds,
+                           threshold_seconds=0, split_at_pauses=args.split == "vad")
+    duration = len(audio) / SAMPLE_RATE
+    print(f"=== {duration:.0f} 秒录音, {len(words)} 个词, 切分方式 {args.split}, "
+          f"每段 {args.chunk_seconds:g} 秒, 桩服务耗时 {args.base_latency:g}s + {args.rtf:g}s/秒音频 ===")
+
+    start = time.perf_counter()
+    try:
+        text = call_api(encoder.encode(audio, SAMPLE_RATE))
+        baseline = time.perf_counter() - start
+        print(f"整段上传: {baseline:.2f}s, 文本{'一致' if text == expected else '不一致'}")
+    except TimeoutError:
+        baseline = time.perf_counter() - start
+        print(f"整段上传: 超时 ({baseline:.2f}s)")
+
+    print(f"{'并发数':<8}{'段数':>6}{'耗时(s)':>10}{'加速比':>8}  文本")
+    for concurrency in args.concurrency:
+        chunks = chunker.split(audio, SAMPLE_RATE, encoder)
+        transcriber = LongFormTranscriber(concurrency)
+        start = time.perf_counter()
+        text, error = transcriber.transcribe(chunks, call_api)
+        elapsed = time.perf_counter() - start
+        if error:
+            status = error
+        elif text == expected:
+            status = "一致"
+        else:
+            got = text.split()
+            status = f"不一致 ({len(got)}/{len(words)} 词, 多出 {sorted(set(got) - set(words))[:5]})"
+        print(f"{concurrency:<8}{len(chunks):>6}{elapsed:>10.2f}{baseline / elapsed:>7.1f}x  {status}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""标点基准测试
+
+去掉参考语料中的标点后分别交给各标点引擎，按边界统计逗号、句末标点（句号/问号）的
+准确率、召回率和 F1，并报告每句耗时。默认只测本地模型；--llm 会同时测 LLM（需要 GROQ_API_KEY）。
+
+用法：
+    python benchmarks/bench_punctuation.py
+    python benchmarks/bench_punctuation.py --llm --corpus benchmarks/data/punctuation_eval.txt
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.llm.punctuation import _parse, get_local_punctuator  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "data", "punctuation_eval.txt")
+_STRIP_RE = re.compile(r"[^\w\s']")
+
+
+def strip_punctuation(text):
+    """去掉标点并转小写，模拟未加标点的识别结果"""
+    return re.sub(r"\s+", " ", _STRIP_RE.sub(" ", text)).strip().lower()
+
+
+def boundary_labels(text):
+    """每个单元之后的标点类别（句号与问号归为句末）"""
+    return [{",": ",", ".": "end", "?": "end"}.get(punct, "") for _, punct, _ in _parse(text)]
+
+
+def evaluate(engine, sentences):
+    """返回 ({类别: [tp, fp, fn]}, 各句耗时, 问号判断正确数, 句子数)"""
+    stats = {",": [0, 0, 0], "end": [0, 0, 0]}
+    latencies = []
+    questions_correct = 0
+    for reference in sentences:
+        start = time.perf_counter()
+        predicted = engine(strip_punctuation(reference))
+        latencies.append(time.perf_counter() - start)
+        expected, got = boundary_labels(reference), boundary_labels(predicted)
+        if len(expected) != len(got):
+            # 引擎改动了文字（LLM 可能会改），无法逐边界对齐，全部按错误计
+            for label in expected:
+                if label:
+                    stats[label][2] += 1
+            continue
+        for e, g in zip(expected, got):
+            if g and g == e:
+                stats[g][0] += 1
+            else:
+                if g:
+                    stats[g][1] += 1
+                if e:
+                    stats[e][2] += 1
+        questions_correct += (reference.rstrip()[-1:] in "?？") == (predicted.rstrip()[-1:] in "?？")
+    return stats, latencies, questions_correct, len(sentences)
+
+
+def report(name, stats, latencies, questions_correct, total):
+    print(f"--- {name} ---")
+    for label, (tp, fp, fn) in stats.items():
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        print(f"{'逗号' if label == ',' else '句末':<4} 准确率 {precision:.2f}  召回率 {recall:.2f}  F1 {f1:.2f}")
+    print(f"句末问号/句号判断正确: {questions_correct}/{total}")
+    ordered = sorted(latencies)
+    print(f"每句耗时: 平均 {sum(ordered) / len(ordered) * 1000:.2f}ms, "
+          f"p95 {ordered[int(0.95 * (len(ordered) - 1))] * 1000:.2f}ms\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="标点基准测试")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--llm", action="store_true", help="同时测试 LLM 标点（SymbolProcessor.add_symbol）")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        sentences = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    print(f"语料: {len(sentences)} 句 ({args.corpus})\n")
+
+    start = time.perf_counter()
+    punctuator = get_local_punctuator()
+    print(f"本地模型加载耗时: {(time.perf_counter() - start) * 1000:.1f}ms\n")
+    report("本地模型", *evaluate(punctuator.punctuate, sentences))
+
+    if args.llm:
+        from src.llm.symbol import SymbolProcessor
+        symbol = SymbolProcessor()
+        report(f"LLM ({symbol.model})", *evaluate(symbol.add_symbol, sentences))
+
+
+if __name__ == "__main__":
+    main()
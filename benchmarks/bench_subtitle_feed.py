@@ -0,0 +1,121 @@
+"""字幕推送基准测试
+
+模拟主程序每隔一段时间产生一条字幕，对比：
+- 原来的做法：追加写入 logs/subtitle.txt，字幕窗口每 500ms 检查一次文件（exists、getsize、重新打开读取）
+- 事件推送：通过 EventFeed 逐行推送 JSON，多个订阅者（字幕窗口）同时接收
+
+报告从产生字幕到订阅者收到的延迟，以及轮询方式的文件系统调用次数。
+
+用法：
+    python benchmarks/bench_subtitle_feed.py
+    python benchmarks/bench_subtitle_feed.py --subtitles 40 --interval-ms 150 --subscribers 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.event_feed import EventFeed, iter_events  # noqa: E402
+from src.utils.metrics import LatencyTracker  # noqa: E402
+
+
+def run_polling(args):
+    """原来的实现：字幕写入文件，字幕窗口定时轮询"""
+    tracker = LatencyTracker(window=args.subtitles)
+    sent = {}
+    stop = threading.Event()
+    calls = {"value": 0}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "subtitle.txt")
+        open(path, "w", encoding="utf-8").close()
+
+        def poll():
+            position = 0
+            while not stop.wait(args.poll_ms / 1000):
+                calls["value"] += 2
+                if not os.path.exists(path):
+                    continue
+                size = os.path.getsize(path)
+                if size > position:
+                    calls["value"] += 1
+                    with open(path, "r", encoding="utf-8") as f:
+                        f.seek(position)
+                        content = f.read()
+                        position = f.tell()
+                    now = time.perf_counter()
+                    for line in content.strip().split("\n"):
+                        if line in sent:
+                            tracker.record(now - sent.pop(line))
+
+        poller = threading.Thread(target=poll, daemon=True)
+        poller.start()
+        start = time.perf_counter()
+        for i in range(args.subtitles):
+            text = f"第 {i} 条字幕"
+            sent[text] = time.perf_counter()
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(text + "\n")
+            time.sleep(args.interval_ms / 1000)
+        time.sleep(args.poll_ms / 1000 * 2)
+        stop.set()
+        poller.join()
+        elapsed = time.perf_counter() - start
+    return tracker, calls["value"] / elapsed
+
+
+def run_feed(args):
+    """事件推送：所有订阅者同时收到每条字幕"""
+    feed = EventFeed(port=0, retain={"subtitle": 20})
+    feed.start()
+    tracker = LatencyTracker(window=args.subtitles * args.subscribers)
+    sent = {}
+    threads = []
+
+    def subscribe():
+        for event in iter_events(port=feed.port, token=feed.token):
+            if event["type"] == "subtitle" and event["text"] in sent:
+                tracker.record(time.perf_counter() - sent[event["text"]])
+
+    for _ in range(args.subscribers):
+        thread = threading.Thread(target=subscribe, daemon=True)
+        thread.start()
+        threads.append(thread)
+    while feed.subscribers < args.subscribers:
+        time.sleep(0.01)
+    for i in range(args.subtitles):
+        text = f"第 {i} 条字幕"
+        sent[text] = time.perf_counter()
+        feed.publish("subtitle", text=text)
+        time.sleep(args.interval_ms / 1000)
+    time.sleep(0.1)
+    feed.close()
+    for thread in threads:
+        thread.join(timeout=1)
+    return tracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕推送基准测试")
+    parser.add_argument("--subtitles", type=int, default=20, help="字幕条数")
+    parser.add_argument("--interval-ms", type=float, default=230.0, help="两条字幕之间的间隔")
+    parser.add_argument("--poll-ms", type=float, default=500.0, help="原实现的轮询间隔")
+    parser.add_argument("--subscribers", type=int, default=2, help="事件推送的订阅者数量")
+    args = parser.parse_args()
+
+    print(f"=== {args.subtitles} 条字幕，间隔 {args.interval_ms:g}ms ===")
+    polling, calls_per_second = run_polling(args)
+    print(f"文件轮询 ({args.poll_ms:g}ms): 延迟 p50 {polling.percentile(50) * 1000:.1f}ms, "
+          f"p95 {polling.percentile(95) * 1000:.1f}ms, 最大 {polling.percentile(100) * 1000:.1f}ms, "
+          f"文件系统调用 {calls_per_second:.1f} 次/秒（空闲时也一直进行）")
+    feed = run_feed(args)
+    print(f"事件推送 ({args.subscribers} 个订阅者): 延迟 p50 {feed.percentile(50) * 1000:.2f}ms, "
+          f"p95 {feed.percentile(95) * 1000:.2f}ms, 最大 {feed.percentile(100) * 1000:.2f}ms, "
+          f"共收到 {feed.count} 条")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""文本输入基准测试
+
+用记录事件的桩 Controller 代替 pynput，模拟一次语音输入的完整过程
+（录音提示 → 处理中提示 → 输入识别结果 → 恢复剪贴板），对比：
+- 原来的做法：每条提示都写剪贴板再 Cmd/Ctrl+V，结果后加 " ✅" 并固定等待 0.5 秒，再逐个退格
+- TextInjector：按文本长度选择按键合成或粘贴，替换时只改动不同的部分，不固定等待，
+  剪贴板在粘贴被读取后由定时器恢复（不在输入的关键路径上）
+
+剪贴板写入的开销用 --clipboard-ms 模拟（Linux 上每次 pyperclip 调用都会启动 xclip/xsel 进程）。
+
+用法：
+    python benchmarks/bench_text_injection.py
+    python benchmarks/bench_text_injection.py --clipboard-ms 8 --event-us 50
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.keyboard.injection import TextInjector  # noqa: E402
+
+RECORDING = "🎤 正在录音..."
+PROCESSING = "🔄 正在转录..."
+TEXTS = {
+    "短句": "好的，收到",
+    "中等": "明天下午两点在三楼开会，请把会议纪要发给所有参会的人",
+    "长段落": "这个版本还有一些问题暂时不能发布，我们需要再跟客户沟通一下价格，"
+           "另外测试在本地通过了但是在服务器上失败，需要在发布前修复。" * 3,
+}
+
+
+class StubController:
+    """记录按键事件的桩 Controller，每个事件耗时 event_seconds"""
+
+    def __init__(self, event_seconds):
+        self.event_seconds = event_seconds
+        self.events = 0
+
+    def _event(self):
+        self.events += 1
+        if self.event_seconds:
+            time.sleep(self.event_seconds)
+
+    def press(self, key):
+        self._event()
+
+    def release(self, key):
+        self._event()
+
+    @contextlib.contextmanager
+    def pressed(self, *keys):
+        for _ in keys:
+            self._event()
+        yield
+        for _ in keys:
+            self._event()
+
+    def type(self, text):
+        for _ in text:
+            self.press(None)
+            self.release(None)
+
+
+class StubClipboard:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.calls = 0
+
+    def __call__(self, text=None):
+        self.calls += 1
+        time.sleep(self.seconds)
+        return ""
+
+
+def old_utterance(controller, clipboard, text):
+    """原来的实现，返回输入关键路径上的耗时"""
+    def paste(value):
+        clipboard(value)
+        with controller.pressed("cmd"):
+            controller.press("v")
+            controller.release("v")
+        return len(value)
+
+    def delete(count):
+        for _ in range(count):
+            controller.press("backspace")
+            controller.release("backspace")
+
+    clipboard()  # 按下快捷键时保存剪贴板
+    temp = paste(RECORDING)
+    delete(temp)
+    temp = paste(PROCESSING)
+    start = time.perf_counter()
+    delete(temp)
+    paste(text + " ✅")
+    time.sleep(0.5)
+    delete(2)
+    clipboard(None)  # 恢复剪贴板
+    return time.perf_counter() - start
+
+
+def new_utterance(controller, clipboard, text, held):
+    injector = TextInjector(controller, "cmd", copy=clipboard, keys_held=lambda: held["value"],
+                            backspace="backspace")
+    clipboard()  # 按下快捷键时保存剪贴板
+    held["value"] = True  # 录音提示在按住快捷键时输入
+    injector.insert(RECORDING)
+    held["value"] = False
+    injector.replace(RECORDING, PROCESSING)
+    start = time.perf_counter()
+    injector.replace(PROCESSING, text)
+    elapsed = time.perf_counter() - start
+    if injector.counts["paste"]:
+        clipboard(None)  # 粘贴读取完毕后由定时器恢复，不计入关键路径
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文本输入基准测试")
+    parser.add_argument("--clipboard-ms", type=float, default=5.0, help="每次剪贴板读写的耗时")
+    parser.add_argument("--event-us", type=float, default=20.0, help="每个按键事件的耗时（微秒）")
+    args = parser.parse_args()
+
+    print(f"=== 剪贴板读写 {args.clipboard_ms:g}ms/次, 按键事件 {args.event_us:g}µs/个 ===")
+    print(f"{'':<8}{'字数':>6}{'方式':>14}{'结果输入(ms)':>14}{'剪贴板调用':>12}{'按键事件':>10}")
+    for label, text in TEXTS.items():
+        for name in ("原实现", "TextInjector"):
+            controller = StubController(args.event_us / 1e6)
+            clipboard = StubClipboard(args.clipboard_ms / 1000)
+            if name == "原实现":
+                elapsed = old_utterance(controller, clipboard, text)
+            else:
+                elapsed = new_utterance(controller, clipboard, text, {"value": False})
+            print(f"{label:<8}{len(text):>6}{name:>14}{elapsed * 1000:>12.1f}{clipboard.calls:>12}"
+                  f"{controller.events:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from src.audio.recorder import AudioRecorder
+from src.audio.recorder import AudioRecorder, Recording
 from src.keyboard.listener import KeyboardManager, check_accessibility_permissions
-from src.transcription.whisper import WhisperProcessor
+from src.utils.event_feed import get_event_feed
 from src.utils.logger import logger
-from src.transcription.senseVoiceSmall import SenseVoiceSmallProcessor
+from src.pipeline import UtterancePipeline
+from src.transcription.streaming import StreamingTranscriber
+from src.transcription.registry import create_backend
+from src.transcription.router import ASRRouter
 
 
 def check_microphone_permissions():
@@ -36,20 +39,61 @@ class VoiceAssistant:
             on_translate_stop=self.stop_translation_recording,
             on_reset_state=self.reset_state
         )
-        # 不再自动初始化字幕窗口
+        # 不再自动初始化字幕窗口；字幕通过事件推送发给界面进程中的字幕窗口
         self.subtitle_window = None
+        self.event_feed = get_event_feed()
+        # 常开模式下预录时长应覆盖按键触发阈值，否则开头的语音仍会丢失
+        if (self.audio_recorder.hot_mic and
+                self.audio_recorder.pre_roll_seconds < self.keyboard_manager.PRESS_DURATION_THRESHOLD):
+            logger.warning(f"预录时长 ({self.audio_recorder.pre_roll_seconds}秒) 小于按键触发阈值 "
+                           f"({self.keyboard_manager.PRESS_DURATION_THRESHOLD}秒)，录音开头可能丢失")
+        # 异步流水线：键盘监听线程只提交任务，不等待网络请求
+        self.pipeline = None
+        if os.getenv("ASYNC_PIPELINE", "true").lower() == "true":
+            self.pipeline = UtterancePipeline(
+                capture=self._capture_stage,
+                encode=self._encode_stage,
+                asr=self._asr_stage,
+                post_process=self._post_process_stage,
+                deliver=self._deliver,
+                queue_size=int(os.getenv("PIPELINE_QUEUE_SIZE", "8")),
+                asr_workers=int(os.getenv("ASR_CONCURRENCY", "2")),
+                max_in_flight=int(os.getenv("PIPELINE_MAX_IN_FLIGHT", "4")),
+                drop_policy=os.getenv("PIPELINE_DROP_POLICY", "newest"),
+                submit_timeout=float(os.getenv("PIPELINE_SUBMIT_TIMEOUT", "1.0"))
+            )
+            self.pipeline.start()
+        # 流式识别：按住按键期间分段识别，松开后只需识别尾段
+        self.streaming = None
+        if self.audio_recorder.streaming:
+            if self.pipeline:
+                self.streaming = StreamingTranscriber.from_env(self.audio_processor)
+            else:
+                logger.warning("流式识别需要启用异步处理流水线 (ASYNC_PIPELINE=true)，已关闭")
+        # LLM 流式后处理：翻译、优化等结果边生成边按句输入
+        self.llm_streaming = os.getenv("LLM_STREAMING", "false").lower() == "true"
+        if self.llm_streaming and not self.pipeline:
+            logger.warning("LLM 流式输出需要启用异步处理流水线 (ASYNC_PIPELINE=true)，已关闭")
+            self.llm_streaming = False
     
     
     def start_transcription_recording(self):
         """开始录音（转录模式）"""
-        self.audio_recorder.start_recording()
+        self.audio_recorder.start_recording(session=self._start_stream_session("transcriptions"))
+        self.audio_processor.prewarm()
     
     def stop_transcription_recording(self):
         """停止录音并处理（转录模式）"""
+        if self.pipeline:
+            self._submit_recording("transcriptions")
+            return
         audio = self.audio_recorder.stop_recording()
         if audio == "TOO_SHORT":
             logger.warning("录音时长太短，状态将重置")
             self.keyboard_manager.reset_state()
+        elif audio == "NO_SPEECH":
+            logger.warning("未检测到语音，状态将重置")
+            self.keyboard_manager.reset_state()
         elif audio:
             result = self.audio_processor.process_audio(
                 audio,
@@ -59,23 +103,28 @@ class VoiceAssistant:
             # 解构返回值
             text, error = result if isinstance(result, tuple) else (result, None)
             self.keyboard_manager.type_text(text, error)
-            # 更新字幕窗口（如果存在）
-            if self.subtitle_window and text:
-                self.subtitle_window.add_text(text)
+            self._show_subtitle(text)
         else:
             logger.error("没有录音数据，状态将重置")
             self.keyboard_manager.reset_state()
     
     def start_translation_recording(self):
         """开始录音（翻译模式）"""
-        self.audio_recorder.start_recording()
+        self.audio_recorder.start_recording(session=self._start_stream_session("translations"))
+        self.audio_processor.prewarm()
     
     def stop_translation_recording(self):
         """停止录音并处理（翻译模式）"""
+        if self.pipeline:
+            self._submit_recording("translations")
+            return
         audio = self.audio_recorder.stop_recording()
         if audio == "TOO_SHORT":
             logger.warning("录音时长太短，状态将重置")
             self.keyboard_manager.reset_state()
+        elif audio == "NO_SPEECH":
+            logger.warning("未检测到语音，状态将重置")
+            self.keyboard_manager.reset_state()
         elif audio:
             result = self.audio_processor.process_audio(
                     audio,
@@ -84,13 +133,162 @@ class VoiceAssistant:
                 )
             text, error = result if isinstance(result, tuple) else (result, None)
             self.keyboard_manager.type_text(text,error)
-            # 更新字幕窗口（如果存在）
-            if self.subtitle_window and text:
-                self.subtitle_window.add_text(text)
+            self._show_subtitle(text)
         else:
             logger.error("没有录音数据，状态将重置")
             self.keyboard_manager.reset_state()
 
+    def _start_stream_session(self, mode):
+        """为新录音创建流式识别会话，未启用流式识别时返回 None"""
+        if not self.streaming:
+            return None
+        # 分段结果要排在之前所有语音的结果之后输入
+        delivered_before = self.pipeline.submitted
+
+        def show_partial(text):
+            self.pipeline.wait_delivered(delivered_before, timeout=30)
+            if self.streaming.output == "type":
+                self.keyboard_manager.type_text(text, pending=True)
+            # subtitle 模式下各段在录音结束后会合并成全文再显示一次
+            self._show_subtitle(text, partial=self.streaming.output == "subtitle")
+
+        return self.streaming.start(mode, on_partial=show_partial)
+
+    def _submit_recording(self, mode):
+        """结束录音并提交到异步流水线（在键盘监听线程中调用，立即返回）"""
+        recording = self.audio_recorder.detach_recording()
+        if recording is None:
+            logger.error("没有录音数据，状态将重置")
+            self.keyboard_manager.reset_state()
+            return
+        self.pipeline.submit(recording, mode=mode, prompt="")
+
+    def _capture_stage(self, utterance):
+        """采集阶段：关闭输入流，取出录音数据"""
+        recording = utterance.payload
+        audio = self.audio_recorder.finish_recording(recording)
+        utterance.session = recording.session
+        if audio is None or isinstance(audio, str):
+            self.audio_recorder.release_recording(recording)
+            if self._has_streamed(utterance):
+                # 流式识别已送出全部语音，没有尾段
+                utterance.payload = None
+                return
+            utterance.skip_reason = audio or "NO_DATA"
+            return
+        utterance.payload = (recording, audio)
+
+    def _encode_stage(self, utterance):
+        """编码阶段：裁剪静音并编码为上传格式"""
+        if utterance.payload is None:
+            return
+        recording, audio = utterance.payload
+        try:
+            audio_buffer = self.audio_recorder.encode_audio(audio)
+        finally:
+            self.audio_recorder.release_recording(recording)
+        if isinstance(audio_buffer, str):
+            if self._has_streamed(utterance):
+                utterance.payload = None
+                return
+            utterance.skip_reason = audio_buffer
+            return
+        utterance.payload = audio_buffer
+
+    @staticmethod
+    def _has_streamed(utterance):
+        return utterance.session is not None and utterance.session.segment_count > 0
+
+    def _asr_stage(self, utterance):
+        """识别阶段：调用语音识别 API"""
+        if utterance.payload is None:
+            return
+        utterance.text, utterance.error = self.audio_processor.transcribe(
+            utterance.payload,
+            mode=utterance.mode,
+            prompt=utterance.prompt
+        )
+
+    def _post_process_stage(self, utterance):
+        """后处理阶段：翻译、标点、优化等
+
+        前面的阶段出错时也会执行，录音过程中已送出的各段仍要等待处理完毕并交付
+        """
+        if utterance.skip_reason:
+            return
+        if not utterance.error:
+            if utterance.text and self.llm_streaming and utterance.session is None:
+                # 请求在后台进行，输入阶段轮到这条语音时按批输入已生成的部分
+                utterance.stream = self.audio_processor.post_process_stream(utterance.text, utterance.mode)
+            if utterance.text and utterance.stream is None:
+                utterance.text, utterance.error = self.audio_processor.post_process(utterance.text, utterance.mode)
+        if utterance.session is not None:
+            # 等待录音过程中送出的各段处理完毕
+            text = utterance.session.finish(None if utterance.error else utterance.text)
+            if utterance.error:
+                if text:
+                    # subtitle 模式下已识别的各段仍然输入，尾段的错误只记录
+                    logger.warning(f"尾段处理失败，只输入录音过程中已识别的部分: {utterance.error}")
+                    utterance.text, utterance.error = text, None
+                return
+            utterance.text = text
+            if not utterance.text:
+                utterance.skip_reason = "STREAMED"
+
+    def _deliver(self, utterance):
+        """输入阶段：按录音顺序把结果输入到当前光标位置"""
+        pending = self.pipeline.in_flight > 1
+        if utterance.skip_reason:
+            messages = {
+                "TOO_SHORT": "录音时长太短",
+                "NO_SPEECH": "未检测到语音",
+                "NO_DATA": "没有录音数据",
+                "DROPPED": "处理队列已满，语音被丢弃",
+                "STREAMED": "流式识别结果已全部输入",
+            }
+            logger.warning(f"{messages.get(utterance.skip_reason, utterance.skip_reason)}，状态将重置")
+            if utterance.skip_reason == "DROPPED":
+                self._discard_payload(utterance.payload)
+            if not pending and not self.keyboard_manager.state.is_recording:
+                self.keyboard_manager.reset_state()
+            return
+
+        if utterance.stream is not None:
+            self._deliver_stream(utterance)
+            return
+
+        self.keyboard_manager.type_text(utterance.text, utterance.error, pending=pending)
+        self._show_subtitle(utterance.text)
+
+    def _show_subtitle(self, text, partial=False):
+        """推送字幕（不等待字幕窗口接收）
+
+        Args:
+            partial: 是否为流式识别的中间结果，字幕窗口随后收到的完整字幕会替换它
+        """
+        if not text:
+            return
+        if self.event_feed is not None:
+            self.event_feed.publish("partial" if partial else "subtitle", text=text)
+        if self.subtitle_window and not partial:
+            self.subtitle_window.add_text(text)
+
+    def _deliver_stream(self, utterance):
+        """按句输入 LLM 流式输出，每批输入后保留处理中提示，全部输入后再清除"""
+        for batch in utterance.stream:
+            self.keyboard_manager.type_text(batch, pending=True)
+            self._show_subtitle(batch)
+        utterance.text = utterance.stream.text
+        if self.pipeline.in_flight <= 1 and not self.keyboard_manager.state.is_recording:
+            self.keyboard_manager.reset_state()
+
+    def _discard_payload(self, payload):
+        """释放被丢弃语音在丢弃时所处阶段持有的资源"""
+        if isinstance(payload, Recording):
+            self.audio_recorder.discard_recording(payload)
+        elif isinstance(payload, tuple):
+            self.audio_recorder.release_recording(payload[0])
+
     def reset_state(self):
         """重置状态"""
         self.keyboard_manager.reset_state()
@@ -100,15 +298,17 @@ class VoiceAssistant:
         logger.info("=== 语音助手已启动 ===")
         self.keyboard_manager.start_listening()
 
+def create_audio_processor():
+    """ASR_BACKENDS 列出多个平台时，用 ASRRouter 在它们之间对冲与故障切换"""
+    backends = [name.strip().lower() for name in os.getenv("ASR_BACKENDS", "").split(",") if name.strip()]
+    if len(backends) > 1:
+        return ASRRouter.from_env([(name, create_backend(name)) for name in backends])
+    # 后端在注册表中按名称登记，只导入选用的后端
+    return create_backend(backends[0] if backends else os.getenv("SERVICE_PLATFORM", "siliconflow"))
+
+
 def main():
-    # 判断是 Whisper 还是 SiliconFlow
-    service_platform = os.getenv("SERVICE_PLATFORM", "siliconflow")
-    if service_platform == "groq":
-        audio_processor = WhisperProcessor()
-    elif service_platform == "siliconflow":
-        audio_processor = SenseVoiceSmallProcessor()
-    else:
-        raise ValueError(f"无效的服务平台: {service_platform}")
+    audio_processor = create_audio_processor()
     try:
         assistant = VoiceAssistant(audio_processor)
         assistant.run()
@@ -38,6 +38,12 @@ class ControlUI(QWidget):
         
         # 初始化进程
         self.process = None
+
+        # 状态浮窗：显示主程序推送的录音、转录中等状态（不再作为临时文字输入当前应用）
+        self.status_osd = None
+        if os.getenv("STATUS_DISPLAY", "overlay").lower() != "inline":
+            from src.ui.status_osd import StatusOSD
+            self.status_osd = StatusOSD()
         
         # 初始化日志监控
         self.log_watcher = QFileSystemWatcher(['logs/app.log'])
@@ -0,0 +1,8 @@
+"""录音归档模块
+在后台保存录音和识别结果，并维护可全文检索的归档索引
+"""
+
+from .index import ArchiveIndex
+from .writer import ArchiveWriter, get_archive_writer
+
+__all__ = ['ArchiveIndex', 'ArchiveWriter', 'get_archive_writer']
@@ -0,0 +1,76 @@
+"""录音归档检索
+
+用法：
+    python -m src.archive search 会议纪要
+    python -m src.archive search deadline --mode translations --since 2025-01-01 --limit 50
+    python -m src.archive rebuild          # 扫描归档目录，补录索引中没有的录音
+    python -m src.archive prune            # 删除文件已不存在的条目
+    python -m src.archive stats
+"""
+import argparse
+import datetime
+import os
+import time
+
+from dotenv import load_dotenv
+
+from .index import ArchiveIndex
+
+
+def _timestamp(value):
+    return time.mktime(datetime.datetime.strptime(value, "%Y-%m-%d").timetuple())
+
+
+def _format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main():
+    load_dotenv()
+    root = os.getenv("ARCHIVE_DIR", "output")
+    parser = argparse.ArgumentParser(prog="python -m src.archive", description="录音归档检索")
+    parser.add_argument("--db", default=os.getenv("ARCHIVE_INDEX_PATH") or os.path.join(root, "archive.db"),
+                        help="索引数据库路径")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="按识别结果检索录音")
+    search.add_argument("query", nargs="*", help="关键词（多个关键词需全部出现），省略时列出最近的录音")
+    search.add_argument("--mode", choices=["transcriptions", "translations"])
+    search.add_argument("--since", type=_timestamp, help="起始日期 YYYY-MM-DD")
+    search.add_argument("--until", type=_timestamp, help="结束日期 YYYY-MM-DD（不含）")
+    search.add_argument("--limit", type=int, default=20)
+
+    rebuild = commands.add_parser("rebuild", help="扫描归档目录补录索引")
+    rebuild.add_argument("root", nargs="?", default=root)
+    commands.add_parser("prune", help="删除文件已不存在的条目")
+    commands.add_parser("stats", help="索引统计")
+    args = parser.parse_args()
+
+    index = ArchiveIndex(args.db)
+    if args.command == "search":
+        start = time.perf_counter()
+        results = index.search(" ".join(args.query), limit=args.limit, mode=args.mode, since=args.since,
+                               until=args.until)
+        elapsed = time.perf_counter() - start
+        for row in results:
+            duration = f"{row['duration']:.1f}s" if row["duration"] else "-"
+            print(f"{_format_time(row['created_at'])}  {duration:>7}  {row['mode'] or '-':<14} {row['transcript']}")
+            print(f"    {row['path']}")
+        print(f"共 {len(results)} 条, 检索耗时 {elapsed * 1000:.1f}ms")
+    elif args.command == "rebuild":
+        start = time.perf_counter()
+        added = index.rebuild(args.root)
+        print(f"新增 {added} 条, 耗时 {time.perf_counter() - start:.1f}s")
+    elif args.command == "prune":
+        print(f"删除 {index.prune()} 条")
+    else:
+        stats = index.stats()
+        span = (f"{_format_time(stats['first'])} ~ {_format_time(stats['last'])}"
+                if stats["recordings"] else "-")
+        print(f"录音 {stats['recordings']} 条, 总时长 {stats['total_duration'] / 3600:.1f} 小时, 时间范围 {span}, "
+              f"全文索引 {'FTS5' if stats['fts'] else 'LIKE'}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import io
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from ..utils.logger import logger
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3", ".m4a")
+_HASH_SUFFIX_RE = re.compile(r"_([0-9a-f]{8})(?:_\d+)?$")
+
+
+def audio_info(audio_data):
+    """返回 (时长秒数, 采样率)，无法解析时返回 (None, None)"""
+    try:
+        import soundfile as sf
+        info = sf.info(io.BytesIO(audio_data))
+        return info.duration, info.samplerate
+    except Exception:
+        return None, None
+
+
+class ArchiveIndex:
+    """录音归档的 SQLite 索引，识别结果用 FTS5 全文检索
+
+    每条录音一行：路径、时间、时长、采样率、音频哈希、模式、模型、识别耗时和识别结果。
+    全文索引使用 trigram 分词，中英文都可以按任意子串检索；少于 3 个字的关键词退回 LIKE 查询。
+    SQLite 不支持 FTS5 时全部使用 LIKE 查询。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS recordings (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE,
+                created_at REAL NOT NULL,
+                duration REAL,
+                sample_rate INTEGER,
+                audio_hash TEXT,
+                mode TEXT,
+                model TEXT,
+                latency REAL,
+                transcript TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS recordings_created_at ON recordings(created_at);
+            CREATE INDEX IF NOT EXISTS recordings_audio_hash ON recordings(audio_hash);
+        """)
+        self.fts = self._create_fts()
+
+    def _create_fts(self):
+        """创建与 recordings 同步的全文索引，返回是否可用"""
+        try:
+            self._db.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS recordings_fts USING fts5(
+                    transcript, content='recordings', content_rowid='id', tokenize='trigram');
+                CREATE TRIGGER IF NOT EXISTS recordings_ai AFTER INSERT ON recordings BEGIN
+                    INSERT INTO recordings_fts(rowid, transcript) VALUES (new.id, new.transcript);
+                END;
+                CREATE TRIGGER IF NOT EXISTS recordings_ad AFTER DELETE ON recordings BEGIN
+                    INSERT INTO recordings_fts(recordings_fts, rowid, transcript)
+                    VALUES ('delete', old.id, old.transcript);
+                END;
+                CREATE TRIGGER IF NOT EXISTS recordings_au AFTER UPDATE ON recordings BEGIN
+                    INSERT INTO recordings_fts(recordings_fts, rowid, transcript)
+                    VALUES ('delete', old.id, old.transcript);
+                    INSERT INTO recordings_fts(rowid, transcript) VALUES (new.id, new.transcript);
+                END;
+            """)
+            return True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite 不支持 FTS5 trigram 分词 ({sqlite3.sqlite_version})，检索将使用 LIKE: {e}")
+            return False
+
+    @classmethod
+    def from_env(cls, root="output"):
+        """根据环境变量打开索引，未启用时返回 None"""
+        if os.getenv("ARCHIVE_INDEX_ENABLED", "true").lower() != "true":
+            return None
+        return cls(os.getenv("ARCHIVE_INDEX_PATH") or os.path.join(root, "archive.db"))
+
+    def add(self, path, transcript, created_at=None, duration=None, sample_rate=None, audio_hash=None,
+            mode=None, model=None, latency=None):
+        """添加或更新一条录音"""
+        with self._lock:
+            self._db.execute(
+                """INSERT INTO recordings
+                       (path, created_at, duration, sample_rate, audio_hash, mode, model, latency, transcript)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (path) DO UPDATE SET
+                       created_at = excluded.created_at, duration = excluded.duration,
+                       sample_rate = excluded.sample_rate, audio_hash = excluded.audio_hash,
+                       mode = excluded.mode, model = excluded.model, latency = excluded.latency,
+                       transcript = excluded.transcript""",
+                (os.path.abspath(path), created_at or time.time(), duration, sample_rate, audio_hash,
+                 mode, model, latency, transcript or ""))
+            self._db.commit()
+
+    def search(self, query="", limit=20, mode=None, since=None, until=None):
+        """检索识别结果，返回按相关度（无关键词时按时间倒序）排列的字典列表
+
+        Args:
+            query: 关键词，多个关键词用空格分隔，需全部出现
+            mode: 只返回该模式（transcriptions / translations）的录音
+            since, until: 时间范围（Unix 时间戳）
+        """
+        terms = query.split()
+        conditions, params = [], []
+        use_fts = self.fts and terms and all(len(term) >= 3 for term in terms)
+        if use_fts:
+            conditions.append("recordings_fts MATCH ?")
+            params.append(" AND ".join('"' + term.replace('"', '""') + '"' for term in terms))
+        else:
+            for term in terms:
+                conditions.append("r.transcript LIKE ? ESCAPE '\\'")
+                params.append("%" + re.sub(r"([%_\\])", r"\\\1", term) + "%")
+        if mode:
+            conditions.append("r.mode = ?")
+            params.append(mode)
+        if since is not None:
+            conditions.append("r.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("r.created_at < ?")
+            params.append(until)
+
+        sql = """SELECT r.path, r.created_at, r.duration, r.sample_rate, r.audio_hash, r.mode, r.model,
+                        r.latency, r.transcript FROM recordings r"""
+        if use_fts:
+            sql += " JOIN recordings_fts ON recordings_fts.rowid = r.id"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY " + ("bm25(recordings_fts), r.created_at DESC" if use_fts else "r.created_at DESC")
+        sql += " LIMIT ?"
+        params.append(limit)
+
+        columns = ("path", "created_at", "duration", "sample_rate", "audio_hash", "mode", "model", "latency",
+                   "transcript")
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def rebuild(self, root):
+        """扫描归档目录，补录索引中没有的录音（识别结果取自文件名），返回新增条数"""
+        with self._lock:
+            known = {row[0] for row in self._db.execute("SELECT path FROM recordings")}
+        added = 0
+        for directory, _, files in os.walk(root):
+            if os.path.basename(directory).startswith("."):
+                continue
+            for name in files:
+                stem, ext = os.path.splitext(name)
+                path = os.path.abspath(os.path.join(directory, name))
+                if ext.lower() not in AUDIO_EXTENSIONS or path in known:
+                    continue
+                with open(path, "rb") as f:
+                    duration, sample_rate = audio_info(f.read())
+                match = _HASH_SUFFIX_RE.search(stem)
+                transcript = stem[:match.start()] if match else stem
+                if transcript.startswith("recording_"):
+                    transcript = ""  # 识别失败的录音按时间命名
+                self.add(path, transcript, created_at=os.path.getmtime(path), duration=duration,
+                         sample_rate=sample_rate, audio_hash=match.group(1) if match else None)
+                added += 1
+        return added
+
+    def prune(self):
+        """删除文件已不存在的条目，返回删除条数"""
+        with self._lock:
+            missing = [(path,) for (path,) in self._db.execute("SELECT path FROM recordings")
+                       if not os.path.exists(path)]
+            self._db.executemany("DELETE FROM recordings WHERE path = ?", missing)
+            self._db.commit()
+        return len(missing)
+
+    def stats(self):
+        with self._lock:
+            count, total_duration, first, last = self._db.execute(
+                "SELECT COUNT(*), SUM(duration), MIN(created_at), MAX(created_at) FROM recordings").fetchone()
+        return {"recordings": count, "total_duration": total_duration or 0.0, "first": first, "last": last,
+                "fts": self.fts}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
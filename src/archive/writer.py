@@ -0,0 +1,302 @@
+import atexit
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+from ..utils.logger import logger
+from .index import ArchiveIndex, audio_info
+
+SUBTITLE_FILE = os.path.join("logs", "subtitle.txt")
+OVERFLOW_POLICIES = ("spill", "drop")
+
+
+def safe_filename(text, max_len=200):
+    """把识别结果清理为可用的文件名（只保留字母数字、空格、- 和 _）"""
+    name = "".join(c for c in text if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    return name[:max_len]
+
+
+class ArchiveJob:
+    """一条待归档的录音：音频数据、识别结果及写入索引的元数据"""
+
+    def __init__(self, audio_data, ext, transcript, audio_hash, created_at=None, mode=None, model=None,
+                 latency=None):
+        self.audio_data = audio_data
+        self.ext = ext
+        self.transcript = transcript
+        self.audio_hash = audio_hash
+        self.created_at = created_at or time.time()
+        self.mode = mode
+        self.model = model
+        self.latency = latency  # 识别耗时（秒）
+
+    def metadata(self):
+        return {"ext": self.ext, "transcript": self.transcript, "audio_hash": self.audio_hash,
+                "created_at": self.created_at, "mode": self.mode, "model": self.model, "latency": self.latency}
+
+
+class ArchiveWriter:
+    """后台归档线程：保存录音、写字幕文件，都不占用返回识别结果的关键路径
+
+    - 调用方只把任务放入有界队列，写文件在后台线程中完成
+    - 每写入 fsync_batch 个文件、或距上次同步超过 fsync_interval 秒、或队列空闲时，统一 fsync 一次
+    - 录音写入后更新归档索引（ArchiveIndex），同样在后台线程中完成
+    - 队列已满时按 overflow 处理：spill 把音频直接写入溢出目录（不 fsync），由后台线程空闲时补做归档，
+      字幕直接追加；drop 丢弃，只记录计数
+    """
+
+    def __init__(self, root="output", queue_size=64, fsync_batch=16, fsync_interval=1.0,
+                 overflow="spill", subtitle_file=SUBTITLE_FILE, index=None):
+        if overflow not in OVERFLOW_POLICIES:
+            logger.warning(f"未知的归档溢出策略: {overflow}，使用 spill")
+            overflow = "spill"
+        self.root = root
+        self.spill_dir = os.path.join(root, ".spill")
+        self.subtitle_file = subtitle_file
+        self.index = index
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.overflow = overflow
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._subtitle_lock = threading.Lock()  # 队列满时调用方线程也会直接写字幕
+        self._unsynced = []  # 已写入但尚未 fsync 的文件
+        self._last_sync = time.monotonic()
+        self._idle = threading.Event()
+        self._idle.set()
+        self.submitted = 0
+        self.written = 0
+        self.spilled = 0
+        self.dropped = 0
+        self.fsyncs = 0
+        self.enqueue_seconds = 0.0  # 调用方在 submit 上花费的总时间
+        self.write_seconds = 0.0  # 后台线程写文件、fsync 花费的总时间
+
+        self._thread = threading.Thread(target=self._run, name="archive-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls):
+        root = os.getenv("ARCHIVE_DIR", "output")
+        try:
+            index = ArchiveIndex.from_env(root)
+        except Exception as e:
+            logger.warning(f"无法打开归档索引，已关闭: {e}")
+            index = None
+        return cls(
+            root=root,
+            index=index,
+            queue_size=int(os.getenv("ARCHIVE_QUEUE_SIZE", "64")),
+            fsync_batch=int(os.getenv("ARCHIVE_FSYNC_BATCH", "16")),
+            fsync_interval=float(os.getenv("ARCHIVE_FSYNC_INTERVAL", "1.0")),
+            overflow=os.getenv("ARCHIVE_OVERFLOW", "spill").lower(),
+        )
+
+    def submit_recording(self, audio_data, ext, transcript, audio_hash, mode=None, model=None, latency=None):
+        """提交一条录音归档（立即返回）"""
+        self._submit(("recording", ArchiveJob(audio_data, ext, transcript, audio_hash, mode=mode, model=model,
+                                              latency=latency)))
+
+    def append_subtitle(self, text):
+        """追加一行字幕（立即返回）"""
+        if text:
+            self._submit(("subtitle", text))
+
+    def _submit(self, task):
+        start = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+            try:
+                self._queue.put_nowait(task)
+                self._idle.clear()
+                full = False
+            except queue.Full:
+                full = True
+        if full:
+            self._overflow(task)
+        with self._lock:
+            self.enqueue_seconds += time.perf_counter() - start
+
+    def _overflow(self, task):
+        kind, payload = task
+        if self.overflow == "spill":
+            try:
+                if kind == "recording":
+                    self._spill(payload)
+                else:
+                    self._write_subtitle(payload)  # 字幕很短，直接追加
+                with self._lock:
+                    self.spilled += 1
+                logger.warning(f"归档队列已满，{'录音暂存到溢出目录' if kind == 'recording' else '字幕直接写入'} "
+                               f"(累计 {self.spilled} 条)")
+                return
+            except OSError as e:
+                logger.warning(f"归档队列已满，直接写入失败: {e}")
+        with self._lock:
+            self.dropped += 1
+        logger.warning(f"归档队列已满，丢弃{'录音' if kind == 'recording' else '字幕'} (累计丢弃 {self.dropped} 条)")
+
+    def _spill(self, job):
+        """把录音原样写入溢出目录，附带识别结果等元数据"""
+        os.makedirs(self.spill_dir, exist_ok=True)
+        base = os.path.join(self.spill_dir, f"{job.created_at:.6f}_{job.audio_hash[:8]}")
+        with open(base + job.ext, "wb") as f:
+            f.write(job.audio_data)
+        with open(base + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(job.metadata(), f, ensure_ascii=False)
+        # 元数据最后写入，存在即表示音频已完整
+        os.replace(base + ".json.tmp", base + ".json")
+
+    def _run(self):
+        while True:
+            try:
+                kind, payload = self._queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                kind, payload = "idle", None
+            start = time.perf_counter()
+            try:
+                if kind == "recording":
+                    self._write_recording(payload)
+                elif kind == "subtitle":
+                    self._write_subtitle(payload)
+                    if self.subtitle_file not in self._unsynced:
+                        self._unsynced.append(self.subtitle_file)
+                if (kind in ("idle", "flush") or len(self._unsynced) >= self.fsync_batch or
+                        time.monotonic() - self._last_sync >= self.fsync_interval):
+                    self._sync()
+            except Exception as e:
+                logger.warning(f"归档失败: {e}")
+            with self._lock:
+                self.write_seconds += time.perf_counter() - start
+            if kind in ("idle", "flush"):
+                # 队列空闲时补做溢出目录中的录音
+                while self._queue.empty() and self._recover_spilled():
+                    pass
+                with self._lock:
+                    if self._queue.empty():
+                        self._idle.set()
+
+    def _write_recording(self, job):
+        """按日期目录保存录音，以识别结果命名并写入索引"""
+        created = datetime.datetime.fromtimestamp(job.created_at)
+        audio_dir = os.path.join(self.root, created.strftime("%Y-%m-%d"))
+        os.makedirs(audio_dir, exist_ok=True)
+        # 文件名带上音频哈希前缀，不同录音不会重名；重名说明是同一段音频的同一识别结果
+        suffix = f"_{job.audio_hash[:8]}{job.ext}"
+        name = safe_filename(job.transcript or "", 200 - len(os.path.join(audio_dir, suffix)))
+        if not name:
+            logger.warning("识别结果为空，录音按时间命名")
+            name = f"recording_{created.strftime('%H%M%S')}"
+        path = os.path.join(audio_dir, name + suffix)
+
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(job.audio_data)
+            self._unsynced.append(path)
+            logger.info(f"录音已归档: {os.path.basename(path)}")
+        with self._lock:
+            self.written += 1
+        if self.index is not None:
+            duration, sample_rate = audio_info(job.audio_data)
+            self.index.add(path, job.transcript, created_at=job.created_at, duration=duration,
+                           sample_rate=sample_rate, audio_hash=job.audio_hash, mode=job.mode, model=job.model,
+                           latency=job.latency)
+        return path
+
+    def _write_subtitle(self, text):
+        # 字幕窗口通过事件推送接收字幕，字幕文件只作为记录
+        with self._subtitle_lock:
+            os.makedirs(os.path.dirname(self.subtitle_file) or ".", exist_ok=True)
+            with open(self.subtitle_file, "a", encoding="utf-8") as f:
+                f.write(text + "\n")
+
+    def _sync(self):
+        """对已写入的文件及其目录统一 fsync 一次"""
+        if not self._unsynced:
+            self._last_sync = time.monotonic()
+            return
+        paths, self._unsynced = self._unsynced, []
+        for path in paths + sorted({os.path.dirname(path) or "." for path in paths}):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass  # 部分平台不支持对目录 fsync
+        self._last_sync = time.monotonic()
+        with self._lock:
+            self.fsyncs += 1
+
+    def _recover_spilled(self):
+        """归档溢出目录中的一条录音，返回是否处理了录音"""
+        try:
+            names = sorted(name for name in os.listdir(self.spill_dir) if name.endswith(".json"))
+        except FileNotFoundError:
+            return False
+        for name in names:
+            base = os.path.join(self.spill_dir, name[:-len(".json")])
+            try:
+                with open(base + ".json", encoding="utf-8") as f:
+                    meta = json.load(f)
+                with open(base + meta["ext"], "rb") as f:
+                    audio_data = f.read()
+                self._write_recording(ArchiveJob(audio_data, **meta))
+                self._sync()
+                os.remove(base + meta["ext"])
+                os.remove(base + ".json")
+                return True
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"归档溢出目录中的录音 {name} 失败，已跳过: {e}")
+                try:
+                    os.replace(base + ".json", base + ".json.bad")
+                except OSError:
+                    pass
+        return False
+
+    def flush(self, timeout=None):
+        """等待已提交的任务全部写入并同步，返回是否在超时前完成"""
+        with self._lock:
+            self._idle.clear()
+        try:
+            self._queue.put(("flush", None), timeout=timeout)
+        except queue.Full:
+            return False
+        return self._idle.wait(timeout)
+
+    def close(self, timeout=5):
+        """程序退出前写完队列中的任务"""
+        if not self.flush(timeout):
+            logger.warning(f"归档未在 {timeout} 秒内完成, 队列中还有 {self._queue.qsize()} 条")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "written": self.written,
+                "spilled": self.spilled,
+                "dropped": self.dropped,
+                "fsyncs": self.fsyncs,
+                "pending": self._queue.qsize(),
+                "enqueue_ms": round(self.enqueue_seconds * 1000, 1),
+                "write_ms": round(self.write_seconds * 1000, 1),
+            }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_archive_writer():
+    """获取全局共享的归档线程"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ArchiveWriter.from_env()
+    return _writer
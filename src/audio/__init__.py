@@ -2,6 +2,8 @@
 提供音频录制和处理功能
 """
 
+from .chunker import AudioChunker, ChunkedAudio
 from .recorder import AudioRecorder
+from .ring_buffer import AudioRingBuffer
 
-__all__ = ['AudioRecorder']
+__all__ = ['AudioChunker', 'AudioRecorder', 'AudioRingBuffer', 'ChunkedAudio']
@@ -0,0 +1,128 @@
+import os
+
+import numpy as np
+
+from ..utils.logger import logger
+from .vad import EnergyVAD, _runs
+
+
+class AudioChunk:
+    """长录音中的一段，已编码为上传用的字节流"""
+
+    def __init__(self, index, start, end, overlap, buffer):
+        self.index = index
+        self.start = start  # 在整段录音中的起止采样点
+        self.end = end
+        self.overlap = overlap  # 与上一段重叠的采样点数（在停顿处切分时为 0）
+        self.buffer = buffer
+
+
+class ChunkedAudio(list):
+    """切分后的长录音：AudioChunk 列表，可以像普通字节流一样 close()"""
+
+    def __init__(self, chunks, sample_rate, audio=None, encoder=None):
+        super().__init__(chunks)
+        self.sample_rate = sample_rate
+        self.audio = audio  # 整段录音（副本，录音缓冲区归还后仍然有效），用于归档
+        self.encoder = encoder
+
+    def encode_full(self):
+        """把整段录音编码为一个字节流（归档用），没有保留整段录音时返回 None"""
+        if self.audio is None or self.encoder is None:
+            return None
+        return self.encoder.encode(self.audio, self.sample_rate)
+
+    @property
+    def duration(self):
+        return self[-1].end / self.sample_rate if self else 0.0
+
+    def close(self):
+        for chunk in self:
+            chunk.buffer.close()
+
+
+class AudioChunker:
+    """把长录音切成若干段，以便并发识别
+
+    优先在 VAD 检测到的停顿处切分（各段不重叠）；目标位置附近没有足够长的停顿时，
+    按固定窗口切分，并与下一段重叠 overlap_seconds 秒，由文本合并时去重。
+    """
+
+    def __init__(self, chunk_seconds=20.0, overlap_seconds=1.0, threshold_seconds=30.0,
+                 search_seconds=5.0, min_pause_ms=300, vad=None, split_at_pauses=True):
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.threshold_seconds = threshold_seconds  # 超过该时长才切分
+        self.search_seconds = search_seconds  # 在目标切分点之前多远的范围内寻找停顿
+        self.min_pause_ms = min_pause_ms
+        self.vad = vad or EnergyVAD()
+        self.split_at_pauses = split_at_pauses
+
+    @classmethod
+    def from_env(cls):
+        """根据环境变量创建切分器，未启用长录音模式时返回 None"""
+        if os.getenv("LONG_FORM_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            chunk_seconds=float(os.getenv("LONG_FORM_CHUNK_SECONDS", "20")),
+            overlap_seconds=float(os.getenv("LONG_FORM_OVERLAP_SECONDS", "1.0")),
+            threshold_seconds=float(os.getenv("LONG_FORM_THRESHOLD_SECONDS", "30")),
+            split_at_pauses=os.getenv("LONG_FORM_SPLIT", "vad").lower() == "vad",
+        )
+
+    def should_split(self, audio, sample_rate):
+        return len(audio) > self.threshold_seconds * sample_rate
+
+    def _pauses(self, audio, sample_rate):
+        """返回足够长的停顿的 (起点, 终点) 采样点数组"""
+        mask = self.vad.speech_mask(audio, sample_rate)
+        frame_len = self.vad.frame_length(sample_rate)
+        starts, ends = _runs(~mask)
+        long_enough = (ends - starts) * self.vad.frame_ms >= self.min_pause_ms
+        return starts[long_enough] * frame_len, np.minimum(ends[long_enough] * frame_len, len(audio))
+
+    def find_pause(self, audio, sample_rate, earliest=0):
+        """返回 audio[earliest:] 中最后一个足够长的停顿的中点，没有时返回 None"""
+        pause_starts, pause_ends = self._pauses(audio, sample_rate)
+        mids = (pause_starts + pause_ends) // 2
+        mids = mids[mids >= max(earliest, 1)]
+        return int(mids[-1]) if len(mids) else None
+
+    def plan(self, audio, sample_rate):
+        """返回 [(起点, 终点, 重叠采样点数), ...]"""
+        total = len(audio)
+        chunk = int(self.chunk_seconds * sample_rate)
+        overlap = int(self.overlap_seconds * sample_rate)
+        search = int(self.search_seconds * sample_rate)
+        if self.split_at_pauses:
+            pause_starts, pause_ends = self._pauses(audio, sample_rate)
+        else:
+            pause_starts = pause_ends = np.zeros(0, dtype=np.int64)
+
+        spans = []
+        start, start_overlap = 0, 0
+        while total - start > chunk:
+            target = start + chunk
+            # 在 [target - search, target] 内找最长的停顿，从停顿中间切开
+            mids = (pause_starts + pause_ends) // 2
+            candidates = np.flatnonzero((mids >= target - search) & (mids <= target) & (mids > start))
+            if len(candidates):
+                best = candidates[np.argmax(pause_ends[candidates] - pause_starts[candidates])]
+                cut = int(mids[best])
+                spans.append((start, cut, start_overlap))
+                start, start_overlap = cut, 0
+            else:
+                spans.append((start, target, start_overlap))
+                start, start_overlap = target - overlap, overlap
+        spans.append((start, total, start_overlap))
+        return spans
+
+    def split(self, audio, sample_rate, encoder):
+        """切分并逐段编码，返回 ChunkedAudio"""
+        spans = self.plan(audio, sample_rate)
+        chunks = [AudioChunk(i, start, end, overlap, encoder.encode(audio[start:end], sample_rate))
+                  for i, (start, end, overlap) in enumerate(spans)]
+        at_pauses = sum(1 for chunk in chunks[1:] if chunk.overlap == 0)
+        logger.info(f"长录音 ({len(audio) / sample_rate:.1f}秒) 切分为 {len(chunks)} 段, "
+                    f"{at_pauses} 处在停顿处切分, {len(chunks) - 1 - at_pauses} 处按固定窗口重叠切分")
+        return ChunkedAudio(chunks, sample_rate, audio=audio.copy(), encoder=encoder)
@@ -0,0 +1,123 @@
+import io
+import os
+import time
+
+import numpy as np
+import soundfile as sf
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..utils.logger import logger
+
+# 格式名 -> (soundfile 容器格式, 子类型, 文件扩展名)
+UPLOAD_FORMATS = {
+    "wav": ("WAV", "PCM_16", "wav"),
+    "flac": ("FLAC", "PCM_16", "flac"),
+    "opus": ("OGG", "OPUS", "ogg"),
+}
+
+# Opus 只支持这些采样率
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+_RESAMPLE_CHUNK = 65536  # 分块计算，限制临时内存
+
+
+def _lowpass_kernel(ratio, taps):
+    """降采样用的汉明窗 sinc 低通滤波器"""
+    cutoff = 0.45 / ratio  # 截止频率（相对原采样率），略低于目标奈奎斯特频率
+    n = np.arange(taps) - taps // 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+def resample(audio, src_rate, dst_rate, taps=63):
+    """将单声道 float32 音频从 src_rate 重采样到 dst_rate
+
+    降采样时先在每个输出点附近做 FIR 低通（只计算需要的输出点），
+    再在相邻两点之间线性插值；升采样直接线性插值。
+    """
+    if src_rate == dst_rate or len(audio) == 0:
+        return audio
+    ratio = src_rate / dst_rate
+    n_out = int(len(audio) / ratio)
+    positions = np.arange(n_out) * ratio
+
+    if ratio < 1:
+        return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+    kernel = _lowpass_kernel(ratio, taps)
+    half = taps // 2
+    padded = np.pad(audio, (half, half + 1))
+    windows = sliding_window_view(padded, taps)  # windows[i] 以 audio[i] 为中心
+
+    if ratio.is_integer():
+        # 整数倍降采样（如 48k -> 16k）：输出点都落在输入采样点上，直接对步进视图做一次矩阵乘
+        return windows[::int(ratio)][:n_out] @ kernel
+
+    base = positions.astype(np.int64)
+    frac = (positions - base).astype(np.float32)
+
+    out = np.empty(n_out, dtype=np.float32)
+    for start in range(0, n_out, _RESAMPLE_CHUNK):
+        end = min(n_out, start + _RESAMPLE_CHUNK)
+        idx = base[start:end]
+        y0 = windows[idx] @ kernel
+        y1 = windows[idx + 1] @ kernel
+        out[start:end] = y0 + (y1 - y0) * frac[start:end]
+    return out
+
+
+class AudioEncoder:
+    """上传前的音频编码：转单声道、重采样、转 int16，并编码为 WAV / FLAC / Opus"""
+
+    def __init__(self, format="wav", target_rate=16000):
+        format = format.lower()
+        if format not in UPLOAD_FORMATS:
+            logger.warning(f"未知的上传格式: {format}，使用 wav")
+            format = "wav"
+        if format == "opus" and "OPUS" not in sf.available_subtypes("OGG"):
+            logger.warning("当前 libsndfile 不支持 Opus，改用 flac")
+            format = "flac"
+        if format == "opus" and target_rate not in OPUS_SAMPLE_RATES:
+            logger.warning(f"Opus 不支持 {target_rate}Hz，改用 16000Hz")
+            target_rate = 16000
+        self.format = format
+        self.target_rate = target_rate  # None 表示保持采集采样率
+
+    @classmethod
+    def from_env(cls):
+        """根据环境变量创建编码器"""
+        target_rate = int(os.getenv("UPLOAD_SAMPLE_RATE", "16000")) or None
+        return cls(os.getenv("UPLOAD_FORMAT", "wav"), target_rate)
+
+    def to_pcm16(self, audio, sample_rate):
+        """转为单声道 int16，并重采样到目标采样率，返回 (数据, 采样率)"""
+        if audio.ndim > 1:
+            audio = audio[:, 0] if audio.shape[1] == 1 else audio.mean(axis=1)
+
+        rate = self.target_rate or sample_rate
+        if rate == sample_rate and audio.dtype == np.int16:
+            return audio, rate
+
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) * (1.0 / 32768)
+        else:
+            audio = audio.astype(np.float32, copy=False)
+        audio = resample(audio, sample_rate, rate)
+        pcm = np.clip(audio, -1.0, 1.0) * 32767
+        return pcm.astype(np.int16), rate
+
+    def encode(self, audio, sample_rate):
+        """编码音频，返回带文件名（name 属性）的字节流"""
+        start = time.perf_counter()
+        pcm, rate = self.to_pcm16(audio, sample_rate)
+        container, subtype, ext = UPLOAD_FORMATS[self.format]
+
+        audio_buffer = io.BytesIO()
+        sf.write(audio_buffer, pcm, rate, format=container, subtype=subtype)
+        audio_buffer.name = f"audio.{ext}"  # 供 API 请求使用的文件名
+        size = audio_buffer.tell()
+        audio_buffer.seek(0)
+
+        logger.info(f"音频编码: {self.format} {rate}Hz, {size} 字节 "
+                    f"(原始 WAV 约 {len(audio) * 2 + 44} 字节), 耗时 {(time.perf_counter() - start) * 1000:.1f}ms")
+        return audio_buffer
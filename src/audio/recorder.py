@@ -1,23 +1,121 @@
-import io
 import sounddevice as sd
 import numpy as np
 import queue
-import soundfile as sf
 import os
-import tempfile
 from ..utils.logger import logger
+from ..utils.metrics import LatencyTracker
+from .ring_buffer import AudioRingBuffer
+from .vad import create_trimmer_from_env
+from .encoder import AudioEncoder
+from .chunker import AudioChunker
+import threading
 import time
 
+class Recording:
+    """一次录音的数据句柄，停止录音后交给后续处理阶段"""
+
+    def __init__(self, buffer, sample_rate):
+        self.buffer = buffer  # AudioRingBuffer；为 None 时使用逐块入队模式
+        self.audio_queue = queue.Queue() if buffer is None else None
+        self.sample_rate = sample_rate
+        self.stream = None  # 按需模式下本次录音专用的输入流
+        self.start_time = time.time()
+        self.stop_time = None
+        self.active = True
+        self._stopped = threading.Event()
+        self._write_lock = threading.Lock()  # 录音过程中读取时，音频回调可能正在写入或扩容缓冲区
+        # 流式识别：录音过程中已分段送出的帧数，以及对应的识别会话和分段线程
+        self.streamed_frames = 0
+        self.session = None
+        self.segmenter = None
+
+    def write(self, indata):
+        """写入一块音频（在音频回调中调用）"""
+        if not self.active:
+            return
+        if self.buffer is not None:
+            with self._write_lock:
+                self.buffer.write(indata)
+        else:
+            self.audio_queue.put(indata.copy())
+
+    def stop(self):
+        self.active = False
+        self.stop_time = time.time()
+        self._stopped.set()
+
+    def wait_stopped(self, timeout):
+        """等待录音停止，返回是否已停止"""
+        return self._stopped.wait(timeout)
+
+    def read(self, start):
+        """录音过程中复制出从 start 帧开始已写入的数据（仅环形缓冲区模式）"""
+        with self._write_lock:
+            return self.buffer.view()[start:].copy()
+
+    @property
+    def duration(self):
+        """录音时长（秒）"""
+        return (self.stop_time or time.time()) - self.start_time
+
+    def audio(self):
+        """返回录音数据，没有数据时返回 None"""
+        if self.buffer is not None:
+            # 流已停止，直接取缓冲区的零拷贝视图
+            audio = self.buffer.view()
+            return audio if len(audio) else None
+
+        # 收集所有音频数据
+        audio_data = []
+        while not self.audio_queue.empty():
+            audio_data.append(self.audio_queue.get())
+        # 合并音频数据
+        return np.concatenate(audio_data) if audio_data else None
+
+
 class AudioRecorder:
     def __init__(self):
         self.recording = False
-        self.audio_queue = queue.Queue()
         self.sample_rate = 16000
         # self.temp_dir = tempfile.mkdtemp()
         self.current_device = None
         self.record_start_time = None
         self.min_record_duration = 1.0  # 最小录音时长（秒）
+        # 采集模式：ring（预分配环形缓冲区）/ queue（逐块入队）
+        self.capture_mode = os.getenv("AUDIO_CAPTURE_MODE", "ring").lower()
+        self.sample_dtype = os.getenv("AUDIO_SAMPLE_DTYPE", "float32").lower()
+        if self.sample_dtype not in ("float32", "int16"):
+            logger.warning(f"无效的采样格式: {self.sample_dtype}，使用 float32")
+            self.sample_dtype = "float32"
+        self.buffer_seconds = float(os.getenv("AUDIO_BUFFER_SECONDS", "600"))
+        self.use_ring_buffer = self.capture_mode == "ring"
+        self._buffer_pool = []  # 可复用的录音缓冲区
+        self._pool_lock = threading.Lock()
+        self._current = None  # 正在进行的录音
+        # 常开麦克风：输入流保持打开并持续写入预录缓冲区
+        self.hot_mic = os.getenv("HOT_MIC", "false").lower() == "true"
+        self.pre_roll_seconds = float(os.getenv("PRE_ROLL_SECONDS", "1.0"))
+        self.pre_roll_buffer = None
+        self.stream = None
+        self._buffer_lock = threading.Lock()  # 保护常开模式下回调与开始/停止之间的缓冲区切换
+        self.start_latency = LatencyTracker()  # 录音启动延迟统计
+        self.silence_trimmer = create_trimmer_from_env()  # 上传前的静音裁剪
+        self.vad_bytes_saved_total = 0
+        self.encoder = AudioEncoder.from_env()  # 上传编码（重采样、转 int16、压缩）
+        self.chunker = AudioChunker.from_env()  # 长录音切分，None 表示不切分
+        # 流式识别：录音过程中每隔约 segment_seconds 秒在停顿处切出一段送去识别
+        self.segment_seconds = float(os.getenv("STREAMING_SEGMENT_SECONDS", "0"))
+        self.streaming = self.segment_seconds > 0
+        if self.streaming and not self.use_ring_buffer:
+            logger.warning("流式识别需要环形缓冲区采集模式 (AUDIO_CAPTURE_MODE=ring)，已关闭")
+            self.streaming = False
+        self.segment_chunker = AudioChunker(chunk_seconds=self.segment_seconds) if self.streaming else None
         self._check_audio_devices()
+        if self.use_ring_buffer:
+            self._buffer_pool.append(self._acquire_buffer())
+            logger.info(f"采集模式: 环形缓冲区 ({self.sample_dtype}, 预分配 {self.buffer_seconds:.0f} 秒)")
+        if self.hot_mic:
+            self._open_hot_stream()
         # logger.info(f"初始化完成，临时文件目录: {self.temp_dir}")
         logger.info(f"初始化完成")
     
@@ -74,71 +172,263 @@ class AudioRecorder:
             logger.error(f"检查设备变化时出错: {e}")
             return False
     
-    def start_recording(self):
-        """开始录音"""
+    def _create_stream(self, callback):
+        """创建输入流"""
+        return sd.InputStream(
+            channels=1,
+            samplerate=self.sample_rate,
+            dtype=self.sample_dtype,
+            callback=callback,
+            device=None,  # 使用默认设备
+            latency='low'  # 使用低延迟模式
+        )
+
+    def _open_hot_stream(self):
+        """打开常开输入流，持续填充预录缓冲区"""
+        self.pre_roll_buffer = AudioRingBuffer(
+            int(self.sample_rate * self.pre_roll_seconds),
+            channels=1,
+            dtype=self.sample_dtype,
+            growable=False
+        )
+        pre_roll_buffer = self.pre_roll_buffer
+
+        def audio_callback(indata, frames, time, status):
+            if status:
+                logger.warning(f"音频录制状态: {status}")
+            with self._buffer_lock:
+                pre_roll_buffer.write(indata)
+                if self._current is not None:
+                    self._current.write(indata)
+
+        try:
+            self.stream = self._create_stream(audio_callback)
+            self.stream.start()
+        except Exception as e:
+            logger.error(f"启动常开音频流失败: {e}")
+            raise RuntimeError("无法访问音频设备，请检查系统权限设置")
+        logger.info(f"常开麦克风已启动 (设备: {self.current_device}, 预录 {self.pre_roll_seconds:.1f} 秒)")
+
+    def close(self):
+        """关闭常开输入流"""
+        if self.hot_mic and self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def _acquire_buffer(self):
+        """从缓冲区池中取出一个录音缓冲区，池为空时新建"""
+        if not self.use_ring_buffer:
+            return None
+        with self._pool_lock:
+            if self._buffer_pool:
+                return self._buffer_pool.pop()
+        return AudioRingBuffer(
+            int(self.sample_rate * self.buffer_seconds),
+            channels=1,
+            dtype=self.sample_dtype
+        )
+
+    def release_recording(self, recording):
+        """录音数据处理完毕后归还缓冲区，供后续录音复用"""
+        buffer, recording.buffer = recording.buffer, None
+        if buffer is None:
+            return
+        buffer.clear()
+        with self._pool_lock:
+            if len(self._buffer_pool) < 2:
+                self._buffer_pool.append(buffer)
+
+    def _start_hot_recording(self, session=None):
+        """常开模式下开始录音：以预录缓冲区的快照作为录音开头"""
+        # 设备切换后需要重新打开常开流
+        if self._check_device_changed() or self.stream is None:
+            self.close()
+            self._open_hot_stream()
+
+        logger.info("开始录音...")
+        recording = Recording(self._acquire_buffer(), self.sample_rate)
+        with self._buffer_lock:
+            recording.write(self.pre_roll_buffer.snapshot())
+            self.record_start_time = recording.start_time
+            self._current = recording
+            self.recording = True
+        self._start_segmenter(recording, session)
+
+    def get_start_latency_stats(self):
+        """返回录音启动延迟统计（毫秒）"""
+        return self.start_latency.summary()
+
+    def start_recording(self, session=None):
+        """开始录音
+
+        Args:
+            session: 流式识别会话，启用流式识别时录音过程中的各段会交给它
+        """
         if not self.recording:
+            start = time.perf_counter()
+            if self.hot_mic:
+                self._start_hot_recording(session)
+                self._record_start_latency(start)
+                return
             try:
                 # 检查设备是否发生变化
                 self._check_device_changed()
                 
                 logger.info("开始录音...")
-                self.recording = True
-                self.record_start_time = time.time()
-                self.audio_data = []
-                
+                recording = Recording(self._acquire_buffer(), self.sample_rate)
+
                 def audio_callback(indata, frames, time, status):
                     if status:
                         logger.warning(f"音频录制状态: {status}")
-                    if self.recording:
-                        self.audio_queue.put(indata.copy())
+                    recording.write(indata)
                 
-                self.stream = sd.InputStream(
-                    channels=1,
-                    samplerate=self.sample_rate,
-                    callback=audio_callback,
-                    device=None,  # 使用默认设备
-                    latency='low'  # 使用低延迟模式
-                )
-                self.stream.start()
+                recording.stream = self._create_stream(audio_callback)
+                self._current = recording
+                self.record_start_time = recording.start_time
+                self.recording = True
+                recording.stream.start()
                 logger.info(f"音频流已启动 (设备: {self.current_device})")
+                self._start_segmenter(recording, session)
+                self._record_start_latency(start)
             except Exception as e:
                 self.recording = False
+                self._current = None
                 logger.error(f"启动录音失败: {e}")
                 raise
-    
-    def stop_recording(self):
-        """停止录音并返回音频数据"""
+
+    def _start_segmenter(self, recording, session):
+        """启动录音的分段线程"""
+        if session is None or not self.streaming:
+            return
+        recording.session = session
+        recording.segmenter = threading.Thread(target=self._segment_loop, args=(recording,),
+                                               name="recording-segmenter", daemon=True)
+        recording.segmenter.start()
+
+    def _segment_loop(self, recording):
+        """录音过程中每积累约 segment_seconds 秒，在最后一个停顿处切出一段送去识别"""
+        segment_frames = int(self.segment_seconds * self.sample_rate)
+        while not recording.wait_stopped(0.2):
+            available = len(recording.buffer) - recording.streamed_frames
+            if available < segment_frames:
+                continue
+            window = recording.read(recording.streamed_frames)
+            cut = self.segment_chunker.find_pause(window, self.sample_rate, earliest=segment_frames // 2)
+            if cut is None:
+                if available < 2 * segment_frames:
+                    continue  # 暂时没有停顿，继续等待
+                cut = len(window)  # 长时间没有停顿，直接切分
+            recording.streamed_frames += cut
+            audio_buffer = self.encode_audio(window[:cut])
+            if isinstance(audio_buffer, str):
+                continue
+            logger.info(f"流式识别: 送出第 {recording.session.segment_count + 1} 段 ({cut / self.sample_rate:.1f}秒)")
+            recording.session.add_segment(audio_buffer)
+
+    def _record_start_latency(self, start):
+        """记录并输出本次录音启动延迟"""
+        latency = time.perf_counter() - start
+        self.start_latency.record(latency)
+        stats = self.start_latency.summary()
+        logger.info(f"录音启动延迟: {latency * 1000:.1f}ms "
+                    f"(p50 {stats['p50_ms']:.1f}ms, p95 {stats['p95_ms']:.1f}ms, 模式: {'常开' if self.hot_mic else '按需'})")
+
+    def detach_recording(self):
+        """结束当前录音并立即返回其句柄（不等待设备关闭），之后即可开始新的录音"""
         if not self.recording:
             return None
-            
+
         logger.info("停止录音...")
-        self.recording = False
-        self.stream.stop()
-        self.stream.close()
-        
+        with self._buffer_lock:
+            recording, self._current = self._current, None
+            self.recording = False
+            recording.stop()
+        return recording
+
+    def discard_recording(self, recording):
+        """放弃录音（例如被流水线丢弃）：关闭输入流并归还缓冲区"""
+        if recording.stream is not None:
+            recording.stream.stop()
+            recording.stream.close()
+            recording.stream = None
+        if recording.segmenter is not None:
+            recording.segmenter.join()
+        self.release_recording(recording)
+
+    def finish_recording(self, recording):
+        """关闭录音的输入流并返回音频数据
+
+        Returns:
+            numpy 数组（流式识别时只包含尚未送出的尾段）；录音过短返回 "TOO_SHORT"；没有数据返回 None
+        """
+        if recording.stream is not None:
+            recording.stream.stop()
+            recording.stream.close()
+            recording.stream = None
+        if recording.segmenter is not None:
+            recording.segmenter.join()
+
         # 检查录音时长
-        if self.record_start_time:
-            record_duration = time.time() - self.record_start_time
-            if record_duration < self.min_record_duration:
-                logger.warning(f"录音时长太短 ({record_duration:.1f}秒 < {self.min_record_duration}秒)")
-                return "TOO_SHORT"
-        
-        # 收集所有音频数据
-        audio_data = []
-        while not self.audio_queue.empty():
-            audio_data.append(self.audio_queue.get())
-        
-        if not audio_data:
+        if recording.duration < self.min_record_duration:
+            logger.warning(f"录音时长太短 ({recording.duration:.1f}秒 < {self.min_record_duration}秒)")
+            return "TOO_SHORT"
+
+        audio = recording.audio()
+        if audio is not None and recording.streamed_frames:
+            # 流式识别时只剩尾段需要处理
+            audio = audio[recording.streamed_frames:]
+            logger.info(f"流式识别: 已送出 {recording.session.segment_count} 段, 尾段 {len(audio) / self.sample_rate:.1f}秒")
+            if not len(audio):
+                return None
+        if audio is None:
             logger.warning("没有收集到音频数据")
             return None
-            
-        # 合并音频数据
-        audio = np.concatenate(audio_data)
         logger.info(f"音频数据长度: {len(audio)} 采样点")
+        return audio
+
+    def encode_audio(self, audio):
+        """裁剪静音并编码为上传用的字节流，没有语音时返回 "NO_SPEECH"
+
+        超过长录音阈值时切分为多段，返回 ChunkedAudio
+        """
+        if self.silence_trimmer is not None:
+            audio = self._trim_silence(audio)
+            if audio is None:
+                return "NO_SPEECH"
+
+        if self.chunker is not None and self.chunker.should_split(audio, self.sample_rate):
+            return self.chunker.split(audio, self.sample_rate, self.encoder)
+
+        # 将 numpy 数组编码为上传用的字节流
+        return self.encoder.encode(audio, self.sample_rate)
+    
+    def stop_recording(self):
+        """停止录音并返回音频数据"""
+        recording = self.detach_recording()
+        if recording is None:
+            return None
+        try:
+            audio = self.finish_recording(recording)
+            if audio is None or isinstance(audio, str):
+                return audio
+            return self.encode_audio(audio)
+        finally:
+            self.release_recording(recording)
+
+    def _trim_silence(self, audio):
+        """裁剪静音并记录节省的上传字节数，没有语音时返回 None"""
+        trimmed = self.silence_trimmer.trim(audio, self.sample_rate)
+        # 按采集采样率下的 16 位 PCM 估算，每个采样点 2 字节
+        original_bytes = len(audio) * 2
+        if trimmed is None:
+            self.vad_bytes_saved_total += original_bytes
+            logger.warning(f"未检测到语音，跳过 API 调用 (节省 {original_bytes} 字节)")
+            return None
 
-        # 将 numpy 数组转换为字节流
-        audio_buffer = io.BytesIO()
-        sf.write(audio_buffer, audio, self.sample_rate, format='WAV')
-        audio_buffer.seek(0)  # 将缓冲区指针移动到开始位置
-        
-        return audio_buffer
\ No newline at end of file
+        saved_bytes = original_bytes - len(trimmed) * 2
+        self.vad_bytes_saved_total += saved_bytes
+        logger.info(f"静音裁剪: {len(audio) / self.sample_rate:.2f}秒 -> {len(trimmed) / self.sample_rate:.2f}秒, "
+                    f"节省 {saved_bytes} 字节 ({saved_bytes / max(1, original_bytes):.0%}), "
+                    f"累计节省 {self.vad_bytes_saved_total} 字节")
+        return trimmed
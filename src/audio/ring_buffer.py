@@ -0,0 +1,104 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """预分配的音频环形缓冲区
+
+    - growable=True：写满后按倍数扩容，数据始终连续，适合整段录音
+    - growable=False：容量固定，写满后覆盖最旧的数据，适合预录缓冲
+    """
+
+    def __init__(self, capacity_frames, channels=1, dtype=np.float32, growable=True, growth_factor=2.0):
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.growable = growable
+        self.growth_factor = max(1.25, float(growth_factor))
+        # np.empty 只保留虚拟地址空间，物理内存随写入按页提交，预分配较大容量的代价很小
+        self._data = np.empty((max(1, int(capacity_frames)), channels), dtype=self.dtype)
+        self._write_pos = 0  # 下一次写入的位置
+        self._size = 0  # 当前有效帧数
+        self.grow_count = 0  # 扩容次数（用于统计）
+
+    @property
+    def capacity(self):
+        """当前容量（帧数）"""
+        return self._data.shape[0]
+
+    def __len__(self):
+        return self._size
+
+    def clear(self):
+        """清空缓冲区（不释放内存）"""
+        self._write_pos = 0
+        self._size = 0
+
+    def _grow(self, required_frames):
+        """扩容到至少 required_frames 帧"""
+        new_capacity = self.capacity
+        while new_capacity < required_frames:
+            new_capacity = int(new_capacity * self.growth_factor) + 1
+        new_data = np.empty((new_capacity, self.channels), dtype=self.dtype)
+        new_data[:self._size] = self._data[:self._size]
+        self._data = new_data
+        self.grow_count += 1
+
+    def write(self, block):
+        """写入一块音频数据（原地写入，不产生新的块对象）
+
+        Args:
+            block: 形状为 (frames, channels) 或 (frames,) 的数组
+        """
+        frames = block.shape[0]
+        if frames == 0:
+            return
+        if block.ndim == 1:
+            block = block.reshape(-1, 1)
+
+        if self.growable:
+            end = self._write_pos + frames
+            if end > self.capacity:
+                self._grow(end)
+            self._store(self._data[self._write_pos:end], block)
+            self._write_pos = end
+            self._size = end
+            return
+
+        capacity = self.capacity
+        if frames >= capacity:
+            # 块比整个缓冲区还大，只保留最后 capacity 帧
+            self._store(self._data, block[-capacity:])
+            self._write_pos = 0
+            self._size = capacity
+            return
+
+        first = min(frames, capacity - self._write_pos)
+        self._store(self._data[self._write_pos:self._write_pos + first], block[:first])
+        if first < frames:
+            self._store(self._data[:frames - first], block[first:])
+        self._write_pos = (self._write_pos + frames) % capacity
+        self._size = min(capacity, self._size + frames)
+
+    def _store(self, target, block):
+        """按目标类型写入数据，float -> int16 时做缩放"""
+        if self.dtype == np.int16 and block.dtype.kind == 'f':
+            np.multiply(block, 32767, out=target, casting='unsafe')
+        elif self.dtype.kind == 'f' and block.dtype == np.int16:
+            np.multiply(block, 1.0 / 32768, out=target, casting='unsafe')
+        else:
+            target[...] = block
+
+    def view(self):
+        """返回有效数据的零拷贝视图
+
+        只有数据在内存中连续时才可以零拷贝（可扩容模式始终满足），
+        固定容量模式发生回绕后请使用 snapshot()。
+        """
+        if self.growable or self._size < self.capacity or self._write_pos == 0:
+            return self._data[:self._size]
+        raise ValueError("缓冲区已回绕，无法返回零拷贝视图，请使用 snapshot()")
+
+    def snapshot(self):
+        """按时间顺序复制出当前全部数据"""
+        if self.growable or self._size < self.capacity:
+            return self._data[:self._size].copy()
+        return np.concatenate((self._data[self._write_pos:], self._data[:self._write_pos]))
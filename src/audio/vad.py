@@ -0,0 +1,147 @@
+import os
+
+import numpy as np
+
+from ..utils.logger import logger
+
+
+class EnergyVAD:
+    """基于短时能量的语音活动检测（纯 NumPy 向量化实现）
+
+    以帧为单位计算 RMS 能量（dBFS），根据噪声底自适应地确定阈值，
+    再去掉过短的语音片段并向两侧扩展一定的保护时长。
+    """
+
+    def __init__(self, frame_ms=30, margin_db=10.0, floor_db=-55.0, min_speech_ms=150, padding_ms=200):
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db  # 阈值高于噪声底的分贝数
+        self.floor_db = floor_db  # 绝对能量下限，低于此值一律视为静音
+        self.min_speech_ms = min_speech_ms
+        self.padding_ms = padding_ms
+
+    def frame_length(self, sample_rate):
+        """每帧的采样点数"""
+        return max(1, int(sample_rate * self.frame_ms / 1000))
+
+    def _frame_energy_db(self, audio, sample_rate):
+        """计算每帧能量（dBFS）"""
+        frame_len = self.frame_length(sample_rate)
+        samples = audio.reshape(len(audio), -1)[:, 0] if audio.ndim > 1 else audio
+        n_frames = int(np.ceil(len(samples) / frame_len))
+        padded = np.zeros(n_frames * frame_len, dtype=np.float32)
+        padded[:len(samples)] = samples
+        if samples.dtype == np.int16:
+            padded *= 1.0 / 32768
+        frames = padded.reshape(n_frames, frame_len)
+        power = np.einsum('ij,ij->i', frames, frames) / frame_len
+        return 10 * np.log10(power + 1e-12)
+
+    def speech_mask(self, audio, sample_rate):
+        """返回每帧是否为语音的布尔数组"""
+        energy = self._frame_energy_db(audio, sample_rate)
+        if len(energy) == 0:
+            return np.zeros(0, dtype=bool)
+
+        noise_db = np.percentile(energy, 10)
+        peak_db = np.percentile(energy, 95)
+        if peak_db - noise_db < self.margin_db:
+            # 动态范围太小：要么整段都是语音，要么整段都是静音
+            is_speech = peak_db > self.floor_db + 15
+            return np.full(len(energy), is_speech, dtype=bool)
+
+        threshold = max(self.floor_db, noise_db + min(self.margin_db, (peak_db - noise_db) / 2))
+        mask = energy > threshold
+
+        # 去掉过短的语音片段（多为按键声、咳嗽等瞬态噪声）
+        min_frames = max(1, int(self.min_speech_ms / self.frame_ms))
+        mask = _remove_short_runs(mask, min_frames)
+
+        # 向两侧扩展，保留语音的起始与拖尾
+        pad_frames = int(self.padding_ms / self.frame_ms)
+        if pad_frames and mask.any():
+            kernel = np.ones(2 * pad_frames + 1, dtype=np.int32)
+            # mode='same' 在帧数少于核长度时返回核的长度，用 full 再按中心截取，保证与帧数一致
+            dilated = np.convolve(mask.astype(np.int32), kernel, mode='full')
+            mask = dilated[pad_frames:pad_frames + len(mask)] > 0
+        return mask
+
+
+def _runs(mask):
+    """返回布尔数组中连续 True 片段的 (起点, 终点) 数组"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _remove_short_runs(mask, min_frames):
+    """去掉长度小于 min_frames 的 True 片段"""
+    starts, ends = _runs(mask)
+    short = (ends - starts) < min_frames
+    if not short.any():
+        return mask
+    mask = mask.copy()
+    for start, end in zip(starts[short], ends[short]):
+        mask[start:end] = False
+    return mask
+
+
+# 可用的 VAD 实现，自定义实现只需提供 frame_length() 与 speech_mask() 方法
+VAD_BACKENDS = {
+    "energy": EnergyVAD,
+}
+
+
+def create_vad(name=None):
+    """根据名称创建 VAD 实例"""
+    name = (name or "energy").lower()
+    if name not in VAD_BACKENDS:
+        raise ValueError(f"未知的 VAD 实现: {name}")
+    return VAD_BACKENDS[name]()
+
+
+class SilenceTrimmer:
+    """裁剪首尾静音，并可选地压缩过长的中间停顿"""
+
+    def __init__(self, vad=None, max_pause_ms=None):
+        self.vad = vad or EnergyVAD()
+        self.max_pause_ms = max_pause_ms
+
+    def trim(self, audio, sample_rate):
+        """返回裁剪后的音频，没有检测到语音时返回 None"""
+        mask = self.vad.speech_mask(audio, sample_rate)
+        if not mask.any():
+            return None
+
+        frame_len = self.vad.frame_length(sample_rate)
+        speech = np.flatnonzero(mask)
+        first, last = speech[0], speech[-1] + 1
+
+        if self.max_pause_ms:
+            # 中间超过 max_pause_ms 的静音只保留 max_pause_ms（两端各留一半）
+            max_pause_frames = max(1, int(self.max_pause_ms / self.vad.frame_ms))
+            keep = mask[first:last].copy()
+            silence_starts, silence_ends = _runs(~keep)
+            half = max_pause_frames // 2
+            for start, end in zip(silence_starts, silence_ends):
+                if end - start > max_pause_frames:
+                    keep[start:start + half] = True
+                    keep[end - (max_pause_frames - half):end] = True
+                else:
+                    keep[start:end] = True
+            if not keep.all():
+                sample_keep = np.repeat(keep, frame_len)
+                segment = audio[first * frame_len:last * frame_len]
+                return segment[sample_keep[:len(segment)]]
+
+        # 只裁剪首尾时返回视图，避免拷贝
+        return audio[first * frame_len:last * frame_len]
+
+
+def create_trimmer_from_env():
+    """根据环境变量创建静音裁剪器，未启用时返回 None"""
+    if os.getenv("VAD_ENABLED", "true").lower() != "true":
+        return None
+    max_pause_ms = int(os.getenv("VAD_MAX_PAUSE_MS", "0")) or None
+    trimmer = SilenceTrimmer(create_vad(os.getenv("VAD_BACKEND", "energy")), max_pause_ms=max_pause_ms)
+    logger.info(f"静音裁剪已启用 (VAD: {os.getenv('VAD_BACKEND', 'energy')}, "
+                f"最长停顿: {f'{max_pause_ms}ms' if max_pause_ms else '不压缩'})")
+    return trimmer
@@ -0,0 +1,193 @@
+import heapq
+import itertools
+import threading
+import time
+
+from ..utils.logger import logger
+
+
+class Timer:
+    """TimerScheduler.call_at 返回的句柄，可以在到期前取消"""
+
+    __slots__ = ("deadline", "callback", "args", "cancelled")
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerScheduler:
+    """单个后台线程按截止时间执行回调
+
+    没有到期的定时器时线程一直阻塞等待，不做轮询；只在最早的截止时间到达、
+    或新加入了更早的定时器时才被唤醒。回调在调度线程中执行，应尽快返回。
+    """
+
+    def __init__(self, name="hold-timer"):
+        self.name = name
+        self._heap = []  # (截止时间, 序号, Timer)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.wakeups = 0  # 调度线程被唤醒的次数
+
+    def call_at(self, deadline, callback, *args):
+        """在 time.monotonic() 到达 deadline 时执行 callback(*args)"""
+        timer = Timer(deadline, callback, args)
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            heapq.heappush(self._heap, (deadline, next(self._seq), timer))
+            if self._heap[0][2] is timer:
+                self._cond.notify()  # 比原来最早的截止时间更早，重新计算等待时间
+        return timer
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                    else:
+                        timeout = self._heap[0][0] - time.monotonic()
+                        if timeout <= 0:
+                            break
+                        self._cond.wait(timeout)
+                    self.wakeups += 1
+                _, _, timer = heapq.heappop(self._heap)
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                logger.error(f"定时回调出错: {e}", exc_info=True)
+
+
+class HoldBinding:
+    """按住 trigger（同时按住全部 modifiers）达到 threshold 秒时触发"""
+
+    def __init__(self, name, trigger, modifiers=(), threshold=0.5):
+        self.name = name
+        self.trigger = trigger
+        self.modifiers = frozenset(modifiers)
+        self.threshold = threshold
+
+    def __repr__(self):
+        return f"HoldBinding({self.name!r}, threshold={self.threshold})"
+
+
+class HoldDetector:
+    """按住阈值与组合键检测（由定时器驱动的状态机）
+
+    按下 trigger 时登记一个截止时间 = 按下时间 + 当前匹配的按键绑定的阈值；
+    期间修饰键的按下、松开会改变匹配的绑定，截止时间随之重新计算。
+    截止时间到达时触发按住的修饰键最多的那个绑定，之后松开 trigger 时回调 on_release。
+    达到阈值前松开 trigger 只取消定时器，不触发任何回调。
+
+    on_hold / on_release 在同一把锁内执行，松开按键的处理不会早于仍在进行的触发回调。
+    """
+
+    def __init__(self, bindings, on_hold, on_release, scheduler=None):
+        self.bindings = list(bindings)
+        self.on_hold = on_hold
+        self.on_release = on_release
+        self.scheduler = scheduler or TimerScheduler()
+        self._keys = {b.trigger for b in self.bindings} | {k for b in self.bindings for k in b.modifiers}
+        self._held = set()
+        self._lock = threading.Lock()
+        self._callback_lock = threading.RLock()
+        self._press = None  # 进行中的按压：{trigger, pressed_at, timer, fired}
+
+    @property
+    def max_threshold(self):
+        return max((b.threshold for b in self.bindings), default=0.0)
+
+    def is_held(self, key):
+        return key in self._held
+
+    def any_held(self):
+        return bool(self._held)
+
+    def _match(self, trigger):
+        """当前按住的修饰键所匹配的绑定（修饰键最多者优先）"""
+        matches = [b for b in self.bindings if b.trigger == trigger and b.modifiers <= self._held]
+        return max(matches, key=lambda b: len(b.modifiers), default=None)
+
+    def _reschedule(self):
+        press = self._press
+        if press["timer"] is not None:
+            press["timer"].cancel()
+            press["timer"] = None
+        binding = self._match(press["trigger"])
+        if binding is not None:
+            press["timer"] = self.scheduler.call_at(press["pressed_at"] + binding.threshold, self._fire, press)
+
+    def press(self, key, now=None):
+        """按键按下；自动重复的按下事件被忽略。返回该键是否参与按住检测"""
+        if key not in self._keys:
+            return False
+        with self._lock:
+            if key in self._held:
+                return True
+            self._held.add(key)
+            if self._press is None and any(b.trigger == key for b in self.bindings):
+                self._press = {"trigger": key, "pressed_at": now if now is not None else time.monotonic(),
+                               "timer": None, "fired": None}
+                self._reschedule()
+            elif self._press is not None and self._press["fired"] is None:
+                self._reschedule()
+        return True
+
+    def release(self, key):
+        """按键松开；触发过的按压在松开 trigger 时回调 on_release"""
+        if key not in self._keys:
+            return False
+        with self._lock:
+            self._held.discard(key)
+            press = self._press
+            if press is None:
+                return True
+            if key != press["trigger"]:
+                if press["fired"] is None:
+                    self._reschedule()
+                return True
+            self._press = None
+            if press["timer"] is not None:
+                press["timer"].cancel()
+            fired = press["fired"]  # 只在持有锁时设置，此后不会再变
+        if fired is not None:
+            with self._callback_lock:
+                self.on_release(fired)
+        return True
+
+    def _fire(self, press):
+        with self._callback_lock:
+            with self._lock:
+                if self._press is not press or press["fired"] is not None:
+                    return  # 已松开或已触发
+                binding = self._match(press["trigger"])
+                if binding is None:
+                    return
+                if time.monotonic() < press["pressed_at"] + binding.threshold:
+                    self._reschedule()  # 定时器登记后匹配的绑定变了
+                    return
+                press["fired"] = binding
+                press["timer"] = None
+            self.on_hold(binding)
+
+    def reset(self):
+        """清除按键状态（取消进行中的计时）"""
+        with self._lock:
+            if self._press is not None and self._press["timer"] is not None:
+                self._press["timer"].cancel()
+            self._press = None
+            self._held.clear()
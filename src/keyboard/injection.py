@@ -0,0 +1,144 @@
+import os
+import time
+
+import pyperclip
+
+from ..utils.logger import logger
+
+INJECTION_MODES = ("auto", "paste", "keystroke")
+
+
+class PasteBackend:
+    """写入剪贴板后模拟 Cmd/Ctrl+V：一次剪贴板写入（Linux 上会启动 xclip/xsel 进程）加一组按键，与文本长度无关"""
+
+    name = "paste"
+
+    def __init__(self, controller, paste_modifier, copy=None):
+        self.controller = controller
+        self.paste_modifier = paste_modifier
+        self.copy = copy or pyperclip.copy
+        self.last_paste = 0.0  # 最近一次粘贴的时间 (time.monotonic)
+
+    def insert(self, text):
+        self.copy(text)
+        with self.controller.pressed(self.paste_modifier):
+            self.controller.press("v")
+            self.controller.release("v")
+        self.last_paste = time.monotonic()
+
+
+class KeystrokeBackend:
+    """逐字符合成按键：不经过剪贴板，每个字符一次按下和松开，适合短文本"""
+
+    name = "keystroke"
+
+    def __init__(self, controller):
+        self.controller = controller
+
+    def insert(self, text):
+        self.controller.type(text)
+
+
+class TextInjector:
+    """把文本输入到当前光标位置，并删除、替换之前输入的临时文本
+
+    auto 模式按文本选择开销更小的方式：不超过 keystroke_max_chars 个字符时直接合成按键，
+    不改动剪贴板；更长的文本，以及快捷键仍被按住时（合成的字符会带上修饰键）粘贴输入。替换临时文本时只删除、输入与原文本不同的部分，
+    退格键连续发送。整个过程没有固定的等待时间；粘贴后目标应用何时读取剪贴板由
+    paste_settled_at 告知调用方，恢复剪贴板应等到该时间之后。
+    """
+
+    def __init__(self, controller, paste_modifier, mode="auto", keystroke_max_chars=16, bmp_only=False,
+                 paste_settle_seconds=0.3, copy=None, keys_held=None, backspace=None):
+        """
+        Args:
+            controller: pynput.keyboard.Controller（或接口相同的对象）
+            paste_modifier: 粘贴使用的修饰键（Mac 上为 cmd，Windows 上为 ctrl）
+            bmp_only: 按键合成只支持基本多文种平面的字符（Windows），含 emoji 等字符的文本改用粘贴
+            paste_settle_seconds: 粘贴后预留给目标应用读取剪贴板的时间
+            keys_held: 返回快捷键是否仍被按住的函数
+            backspace: 退格键，默认为 pynput 的 Key.backspace
+        """
+        if mode not in INJECTION_MODES:
+            raise ValueError(f"未知的文本输入方式: {mode}")
+        self.controller = controller
+        self.mode = mode
+        self.keystroke_max_chars = keystroke_max_chars
+        self.bmp_only = bmp_only
+        self.paste_settle_seconds = paste_settle_seconds
+        self.keys_held = keys_held or (lambda: False)
+        if backspace is None:
+            from pynput.keyboard import Key
+            backspace = Key.backspace
+        self.backspace = backspace
+        self.paste = PasteBackend(controller, paste_modifier, copy)
+        self.keystroke = KeystrokeBackend(controller)
+        self.counts = {"paste": 0, "keystroke": 0, "backspace": 0, "kept": 0}
+
+    @classmethod
+    def from_env(cls, controller, paste_modifier, bmp_only=False, copy=None, keys_held=None):
+        return cls(
+            controller,
+            paste_modifier,
+            mode=os.getenv("TEXT_INJECTION_MODE", "auto").lower(),
+            keystroke_max_chars=int(os.getenv("TEXT_INJECTION_KEYSTROKE_MAX_CHARS", "16")),
+            bmp_only=bmp_only,
+            paste_settle_seconds=float(os.getenv("CLIPBOARD_RESTORE_DELAY_MS", "300")) / 1000,
+            copy=copy,
+            keys_held=keys_held,
+        )
+
+    @property
+    def paste_settled_at(self):
+        """最近一次粘贴的内容被目标应用读取完毕的时间 (time.monotonic)"""
+        return self.paste.last_paste + self.paste_settle_seconds if self.paste.last_paste else 0.0
+
+    def _backend(self, text):
+        if self.mode == "paste":
+            return self.paste
+        if self.mode == "keystroke":
+            return self.keystroke
+        if len(text) > self.keystroke_max_chars or self.keys_held():
+            return self.paste
+        if self.bmp_only and any(ord(ch) > 0xFFFF for ch in text):
+            return self.paste
+        return self.keystroke
+
+    def insert(self, text):
+        """在光标处输入文本"""
+        if not text:
+            return
+        backend = self._backend(text)
+        try:
+            backend.insert(text)
+        except getattr(self.controller, "InvalidCharacterException", ()) as e:
+            # 无法合成的字符（之前的字符已经输入），剩余部分改用粘贴
+            index = e.args[0]
+            logger.warning(f"无法合成按键 {text[index]!r}，剩余文本改用粘贴")
+            self.paste.insert(text[index:])
+            self.counts["paste"] += 1
+        self.counts[backend.name] += 1
+
+    def delete(self, count):
+        """连续发送 count 次退格键"""
+        if count <= 0:
+            return
+        press, release, backspace = self.controller.press, self.controller.release, self.backspace
+        for _ in range(count):
+            press(backspace)
+            release(backspace)
+        self.counts["backspace"] += count
+
+    def replace(self, old, new):
+        """把光标前的 old 替换为 new：保留共同前缀，只删除和输入不同的部分"""
+        common = 0
+        for a, b in zip(old, new):
+            if a != b:
+                break
+            common += 1
+        self.counts["kept"] += common
+        self.delete(len(old) - common)
+        self.insert(new[common:])
+
+    def stats(self):
+        return dict(self.counts)
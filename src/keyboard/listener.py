@@ -1,25 +1,38 @@
 from pynput.keyboard import Controller, Key, Listener
-import pyperclip
+from ..utils.clipboard import get_clipboard_service
+from ..utils.event_feed import get_event_feed
 from ..utils.logger import logger
 import time
+from .hold_detector import HoldBinding, HoldDetector
+from .injection import TextInjector
 from .inputState import InputState
 import os
+import threading
+
+# pynput 在 Windows/Linux 上报告区分左右的修饰键（ctrl_l / ctrl_r），统一后再与配置的组合键匹配
+_MODIFIER_ALIASES = {
+    Key.ctrl_l: Key.ctrl, Key.ctrl_r: Key.ctrl,
+    Key.shift_l: Key.shift, Key.shift_r: Key.shift,
+    Key.alt_l: Key.alt, Key.alt_r: Key.alt,
+    Key.cmd_l: Key.cmd, Key.cmd_r: Key.cmd,
+}
+
+
+def _normalize_key(key):
+    return _MODIFIER_ALIASES.get(key, key)
 
 
 class KeyboardManager:
     def __init__(self, on_record_start, on_record_stop, on_translate_start, on_translate_stop, on_reset_state):
         self.keyboard = Controller()
-        self.option_pressed = False
-        self.shift_pressed = False
-        self.temp_text_length = 0  # 用于跟踪临时文本的长度
+        self.temp_text = ""  # 光标前的临时文本（状态提示），之后会被删除或替换
         self.processing_text = None  # 用于跟踪正在处理的文本
         self.error_message = None  # 用于跟踪错误信息
         self.warning_message = None  # 用于跟踪警告信息
-        self.option_press_time = None  # 记录 Option 按下的时间戳
-        self.PRESS_DURATION_THRESHOLD = 0.5  # 按键持续时间阈值（秒）
-        self.is_checking_duration = False  # 用于控制定时器线程
-        self.has_triggered = False  # 用于防止重复触发
-        self._original_clipboard = None  # 保存原始剪贴板内容
+        self.clipboard = get_clipboard_service()  # 剪贴板读写在后台线程中进行，按下快捷键时不再同步读取
+        self._restore_timer = None  # 延迟恢复剪贴板的定时器
+        # 键盘监听线程（状态切换）与后台输入线程（输入结果）共用键盘，需要串行化
+        self._typing_lock = threading.RLock()
         
         
         # 回调函数
@@ -30,6 +43,12 @@ class KeyboardManager:
         self.on_reset_state = on_reset_state
 
         
+        # 状态显示：overlay（推送给状态浮窗，只向当前应用输入最终结果）/ inline（作为临时文字输入当前应用）
+        # overlay 模式下没有状态浮窗连接时（如单独运行 main.py）仍作为临时文字输入
+        self.event_feed = get_event_feed()
+        self.status_display = os.getenv("STATUS_DISPLAY", "overlay").lower()
+        self._status_inline = self.inline_status  # 本次语音输入的状态显示方式，临时文本删除前不会改变
+
         # 状态管理
         self._state = InputState.IDLE
         self._state_messages = {
@@ -50,26 +69,51 @@ class KeyboardManager:
         else:
             self.sysetem_platform = Key.cmd
             logger.info("配置到Mac平台")
+        # Windows 的按键合成不支持 emoji 等 BMP 以外的字符
+        self.injector = TextInjector.from_env(self.keyboard, self.sysetem_platform,
+                                              bmp_only=sysetem_platform == "win", copy=self.clipboard.copy,
+                                              keys_held=lambda: self.hold_detector.any_held())
         
 
-        # 获取转录和翻译按钮
+        # 获取转录和翻译按钮（转录按钮可以是组合键，如 ctrl+f2，最后一个键为触发键）
         transcriptions_button = os.getenv("TRANSCRIPTIONS_BUTTON")
+        modifiers = []
+        self.transcriptions_button = None
         try:
-            self.transcriptions_button = Key[transcriptions_button]
+            *modifiers, self.transcriptions_button = [_normalize_key(Key[name.strip()])
+                                                      for name in transcriptions_button.split("+")]
             logger.info(f"配置到转录按钮：{transcriptions_button}")
-        except KeyError:
+        except (KeyError, AttributeError):
             logger.error(f"无效的转录按钮配置：{transcriptions_button}")
 
         translations_button = os.getenv("TRANSLATIONS_BUTTON")
+        self.translations_button = None
         try:
-            self.translations_button = Key[translations_button]
+            self.translations_button = _normalize_key(Key[translations_button])
             logger.info(f"配置到翻译按钮(与转录按钮组合)：{translations_button}")
         except KeyError:
             logger.error(f"无效的翻译按钮配置：{translations_button}")
 
+        # 按住阈值检测：到达阈值时由定时器唤醒一次，不再轮询按键时长；配置无效的按键不参与检测
+        threshold = float(os.getenv("HOLD_THRESHOLD_MS", "500")) / 1000
+        translate_threshold = float(os.getenv("TRANSLATIONS_HOLD_THRESHOLD_MS", "0")) / 1000 or threshold
+        bindings = []
+        if self.transcriptions_button is not None:
+            bindings.append(HoldBinding(InputState.RECORDING, self.transcriptions_button, modifiers, threshold))
+            if self.translations_button is not None:
+                bindings.append(HoldBinding(InputState.RECORDING_TRANSLATE, self.transcriptions_button,
+                                            [*modifiers, self.translations_button], translate_threshold))
+        self.hold_detector = HoldDetector(bindings, on_hold=self._on_hold, on_release=self._on_hold_release)
+        self.PRESS_DURATION_THRESHOLD = self.hold_detector.max_threshold  # 按键持续时间阈值（秒）
+
         logger.info(f"按住 {transcriptions_button} 键：实时语音转录（保持原文）")
         logger.info(f"按住 {translations_button} + {transcriptions_button} 键：实时语音翻译（翻译成英文）")
     
+    @property
+    def inline_status(self):
+        """状态是否应作为临时文字输入当前应用"""
+        return self.status_display == "inline" or self.event_feed is None or not self.event_feed.subscribers
+
     @property
     def state(self):
         """获取当前状态"""
@@ -78,53 +122,58 @@ class KeyboardManager:
     @state.setter
     def state(self, new_state):
         """设置新状态并更新UI"""
+        with self._typing_lock:
+            self._set_state(new_state)
+
+    def _set_state(self, new_state):
         if new_state != self._state:
+            previous_state = self._state
             self._state = new_state
+            if not self.temp_text:
+                # 没有待删除的临时文本时才重新选择显示方式（状态浮窗可能刚连接或已关闭）
+                self._status_inline = self.inline_status
             
             # 获取状态消息
             message = self._state_messages[new_state]
+            if callable(message):
+                message = message(self.warning_message if new_state == InputState.WARNING else self.error_message)
+            self._publish_status(new_state, message)
             
             # 根据状态转换类型显示不同消息
             match new_state:
                 case InputState.RECORDING :
                     # 录音状态
-                    self.temp_text_length = 0
+                    self._clear_processing_text(previous_state)
                     self.type_temp_text(message)
                     self.on_record_start()
                     
                 
                 case InputState.RECORDING_TRANSLATE:
                     # 翻译,录音状态
-                    self.temp_text_length = 0
+                    self._clear_processing_text(previous_state)
                     self.type_temp_text(message)
                     self.on_translate_start()
 
                 case InputState.PROCESSING:
-                    self._delete_previous_text()
-                    self.type_temp_text(message)
+                    self._replace_temp_text(message)
                     self.processing_text = message
                     self.on_record_stop()
 
                 case InputState.TRANSLATING:
                     # 翻译状态
-                    self._delete_previous_text()                 
-                    self.type_temp_text(message)
+                    self._replace_temp_text(message)
                     self.processing_text = message
                     self.on_translate_stop()
                 
                 case InputState.WARNING:
                     # 警告状态
-                    message = message(self.warning_message)
-                    self._delete_previous_text()
-                    self.type_temp_text(message)
+                    self._replace_temp_text(message)
                     self.warning_message = None
                     self._schedule_message_clear()     
                 
                 case InputState.ERROR:
                     # 错误状态
-                    message = message(self.error_message)
-                    self._delete_previous_text()
-                    self.type_temp_text(message)
+                    self._replace_temp_text(message)
                     self.error_message = None
                     self._schedule_message_clear()  
             
@@ -136,14 +185,22 @@ class KeyboardManager:
                     # 其他状态
                     self.type_temp_text(message)
     
+    def _clear_processing_text(self, previous_state):
+        """开始新录音前清除上一条语音的处理中提示（上一条可能仍在后台处理）"""
+        if previous_state in (InputState.PROCESSING, InputState.TRANSLATING):
+            self._delete_previous_text()
+        else:
+            self.temp_text = ""
+
     def _schedule_message_clear(self):
-        """计划清除消息"""
+        """计划清除消息（警告消息显示2秒）"""
         def clear_message():
-            time.sleep(2)  # 警告消息显示2秒
-            self.state = InputState.IDLE
-        
-        import threading
-        threading.Thread(target=clear_message, daemon=True).start()
+            with self._typing_lock:
+                # 期间可能已经开始了新的录音
+                if self.state in (InputState.WARNING, InputState.ERROR):
+                    self.state = InputState.IDLE
+
+        self.hold_detector.scheduler.call_later(2, clear_message)
     
     def show_warning(self, warning_message):
         """显示警告消息"""
@@ -156,27 +213,65 @@ class KeyboardManager:
         self.state = InputState.ERROR
     
     def _save_clipboard(self):
-        """保存当前剪贴板内容"""
-        if self._original_clipboard is None:
-            self._original_clipboard = pyperclip.paste()
+        """开始一次语音输入：剪贴板在第一次写入前才保存（尚未恢复的上一次保存的内容继续沿用）"""
+        if self._restore_timer is not None:
+            self._restore_timer.cancel()
+            self._restore_timer = None
+        self.clipboard.begin_session()
 
     def _restore_clipboard(self):
-        """恢复原始剪贴板内容"""
-        if self._original_clipboard is not None:
-            pyperclip.copy(self._original_clipboard)
-            self._original_clipboard = None
+        """恢复原始剪贴板内容；期间没有写入过剪贴板时不必恢复"""
+        self.clipboard.restore()
 
-    def type_text(self, text, error_message=None):
+    def _restore_clipboard_later(self):
+        """粘贴由目标应用异步读取剪贴板：等到读取完毕后再恢复，不阻塞输入"""
+        if self._restore_timer is not None:
+            self._restore_timer.cancel()
+
+        def restore():
+            with self._typing_lock:
+                if self._restore_timer is not timer:
+                    return  # 已取消（又开始了新的录音）
+                if time.monotonic() < self.injector.paste_settled_at:
+                    self._restore_clipboard_later()  # 期间又粘贴过
+                    return
+                self._restore_timer = None
+                self._restore_clipboard()
+
+        timer = self._restore_timer = self.hold_detector.scheduler.call_at(self.injector.paste_settled_at, restore)
+
+    def type_text(self, text, error_message=None, pending=False):
         """将文字输入到当前光标位置
         
         Args:
             text: 要输入的文本或包含文本和错误信息的元组
             error_message: 错误信息
+            pending: 后台是否还有待输入的语音，为 True 时输入后保留处理中提示
         """
         # 如果text是元组，说明是从process_audio返回的结果
         if isinstance(text, tuple):
             text, error_message = text
-            
+
+        with self._typing_lock:
+            # 异步模式下输入结果时可能已经开始了下一次录音
+            if self.state.is_recording:
+                self._type_text_while_recording(text, error_message)
+                return
+            self._type_text(text, error_message, pending)
+
+    def _type_text_while_recording(self, text, error_message):
+        """正在录音时输入上一条语音的结果：先移除录音提示，输入结果后再恢复提示，不改变状态"""
+        if error_message or not text:
+            if error_message:
+                logger.error(f"上一条语音处理失败: {error_message}")
+            return
+        message = self._state_messages[self.state]
+        self.injector.replace(self.temp_text, text)
+        self.temp_text = ""
+        self.type_temp_text(message)
+        logger.info("文本输入完成（录音进行中）")
+
+    def _type_text(self, text, error_message, pending):
         if error_message:
             self.show_error(error_message)
             return
@@ -189,26 +284,23 @@ class KeyboardManager:
             
         try:
             logger.info("正在输入转录文本...")
-            self._delete_previous_text()
-            
-            # 先输入文本和完成标记
-            self.type_temp_text(text+" ✅")
-            
-            # 等待一小段时间确保文本已输入
-            time.sleep(0.5)
-            
-            # 删除完成标记（2个字符：空格和✅）
-            self.temp_text_length = 2
-            self._delete_previous_text()
+            # 用识别结果替换处理中提示
+            self.injector.replace(self.temp_text, text)
+            self.temp_text = ""
             
             # 将转录结果复制到剪贴板
             if os.getenv("KEEP_ORIGINAL_CLIPBOARD", "true").lower() != "true":
-                pyperclip.copy(text)
+                self.clipboard.end_session(text)  # 剪贴板中已经是识别结果（粘贴输入）时跳过写入
             else:
                 # 恢复原始剪贴板内容
-                self._restore_clipboard()
+                self._restore_clipboard_later()
             
             logger.info("文本输入完成")
+
+            if pending and self.processing_text:
+                # 后台还有语音在处理，恢复处理中提示
+                self.type_temp_text(self.processing_text)
+                return
             
             # 清理处理状态
             self.state = InputState.IDLE
@@ -216,99 +308,54 @@ class KeyboardManager:
             logger.error(f"文本输入失败: {e}")
             self.show_error(f"❌ 文本输入失败: {e}")
     
+    def _publish_status(self, state, message):
+        """把状态推送给状态浮窗、字幕窗口等订阅者"""
+        if self.event_feed is not None:
+            self.event_feed.publish("status", state=state.name.lower(), message=message)
+
     def _delete_previous_text(self):
         """删除之前输入的临时文本"""
-        if self.temp_text_length > 0:
-            for _ in range(self.temp_text_length):
-                self.keyboard.press(Key.backspace)
-                self.keyboard.release(Key.backspace)
-
-        self.temp_text_length = 0
+        self.injector.delete(len(self.temp_text))
+        self.temp_text = ""
     
     def type_temp_text(self, text):
-        """输入临时状态文本"""
-        if not text:
+        """输入临时状态文本（状态显示在浮窗中时不输入）"""
+        if not text or not self._status_inline:
             return
-            
-        # 将文本复制到剪贴板
-        pyperclip.copy(text)
-
-        # 模拟 Ctrl + V 粘贴文本
-        with self.keyboard.pressed(self.sysetem_platform):
-            self.keyboard.press('v')
-            self.keyboard.release('v')
+        self.injector.insert(text)
+        self.temp_text = text
 
-        # 更新临时文本长度
-        self.temp_text_length = len(text)
-    
-    def start_duration_check(self):
-        """开始检查按键持续时间"""
-        if self.is_checking_duration:
+    def _replace_temp_text(self, text):
+        """把之前输入的临时文本替换为新的临时文本（只改动不同的部分）"""
+        if not self._status_inline:
             return
+        self.injector.replace(self.temp_text, text)
+        self.temp_text = text
+    
+    def _on_hold(self, binding):
+        """按住达到阈值：开始录音（binding.name 为对应的录音状态）"""
+        if self.state.can_start_recording:
+            self.state = binding.name
 
-        def check_duration():
-            while self.is_checking_duration and self.option_pressed:
-                current_time = time.time()
-                if (not self.has_triggered and 
-                    self.option_press_time and 
-                    (current_time - self.option_press_time) >= self.PRESS_DURATION_THRESHOLD):
-                    
-                    # 达到阈值时触发相应功能
-                    if self.option_pressed and self.shift_pressed and self.state.can_start_recording:
-                        self.state = InputState.RECORDING_TRANSLATE
-                        # self.on_translate_start()
-                        self.has_triggered = True
-                    elif self.option_pressed and not self.shift_pressed and self.state.can_start_recording:
-                        self.state = InputState.RECORDING
-                        # self.on_record_start()
-                        self.has_triggered = True
-                
-                time.sleep(0.01)  # 短暂休眠以降低 CPU 使用率
-
-        self.is_checking_duration = True
-        import threading
-        threading.Thread(target=check_duration, daemon=True).start()
+    def _on_hold_release(self, binding):
+        """触发过的按键松开：结束录音"""
+        if self.state == InputState.RECORDING_TRANSLATE:
+            self.state = InputState.TRANSLATING
+        elif self.state == InputState.RECORDING:
+            self.state = InputState.PROCESSING
 
     def on_press(self, key):
         """按键按下时的回调"""
-        try:
-            if key == self.transcriptions_button: #Key.f8:  # Option 键按下
-                # 在开始任何操作前保存剪贴板内容
-                if self._original_clipboard is None:
-                    self._original_clipboard = pyperclip.paste()
-                    
-                self.option_pressed = True
-                self.option_press_time = time.time()
-                self.start_duration_check()
-            elif key == self.translations_button:
-                self.shift_pressed = True
-        except AttributeError:
-            pass
+        key = _normalize_key(key)
+        if key == self.transcriptions_button and not self.hold_detector.is_held(key):
+            # 在开始任何操作前标记剪贴板需要保存（不读取剪贴板）
+            with self._typing_lock:
+                self._save_clipboard()
+        self.hold_detector.press(key)
 
     def on_release(self, key):
         """按键释放时的回调"""
-        try:
-            if key == self.transcriptions_button:# Key.f8:  # Option 键释放
-                self.shift_pressed = False
-                self.option_pressed = False
-                self.option_press_time = None
-                self.is_checking_duration = False
-                
-                if self.has_triggered:
-                    if self.state == InputState.RECORDING_TRANSLATE:
-                        self.state = InputState.TRANSLATING
-                    elif self.state == InputState.RECORDING:
-                        self.state = InputState.PROCESSING
-                    self.has_triggered = False
-            elif key == self.translations_button:#Key.f7:
-                self.shift_pressed = False
-                if (self.state == InputState.RECORDING_TRANSLATE and 
-                    not self.option_pressed and 
-                    self.has_triggered):
-                    self.state = InputState.TRANSLATING
-                    self.has_triggered = False
-        except AttributeError:
-            pass
+        self.hold_detector.release(_normalize_key(key))
     
     def start_listening(self):
         """开始监听键盘事件"""
@@ -317,18 +364,18 @@ class KeyboardManager:
 
     def reset_state(self):
         """重置所有状态和临时文本"""
+        with self._typing_lock:
+            self._reset_state()
+
+    def _reset_state(self):
         # 清除临时文本
         self._delete_previous_text()
         
         # 恢复剪贴板
-        self._restore_clipboard()
+        self._restore_clipboard_later()
         
         # 重置状态标志
-        self.option_pressed = False
-        self.shift_pressed = False
-        self.option_press_time = None
-        self.is_checking_duration = False
-        self.has_triggered = False
+        self.hold_detector.reset()
         self.processing_text = None
         self.error_message = None
         self.warning_message = None
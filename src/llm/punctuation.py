@@ -0,0 +1,228 @@
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from ..utils.logger import logger
+from ..utils.timeout import get_timeout_executor
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "punctuation_corpus.txt")
+
+_CJK = r"㐀-䶿一-鿿豈-﫿"
+# 单元：中文单字 / 英文单词（含数字和撇号）/ 标点 / 空白
+_UNIT_RE = re.compile(rf"(?P<cjk>[{_CJK}])|(?P<word>[A-Za-z0-9]+(?:'[A-Za-z]+)?)|(?P<punct>[^\w\s])|(?P<space>\s+)")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+# 标点归为三类：逗号（含顿号、冒号、分号）、句号（含感叹号）、问号
+_PUNCT_CLASS = {
+    "，": ",", ",": ",", "、": ",", "：": ",", ":": ",", "；": ",", ";": ",",
+    "。": ".", ".": ".", "！": ".", "!": ".",
+    "？": "?", "?": "?",
+}
+_FULL_WIDTH = {",": "，", ".": "。", "?": "？"}
+
+_ZH_QUESTION_FINALS = ("吗", "么")
+_ZH_QUESTION_WORDS = ("什么", "怎么", "为什么", "哪", "谁", "几点", "多少", "是不是", "有没有", "能不能",
+                      "可不可以", "要不要", "对不对", "好不好")
+_EN_QUESTION_STARTS = {"what", "where", "when", "why", "who", "whom", "whose", "which", "how", "can", "could",
+                       "would", "will", "do", "does", "did", "is", "are", "was", "were", "have", "has",
+                       "should", "shall", "may"}
+
+# 特征及其权重：越具体的特征权重越大
+_FEATURE_WEIGHTS = {"LR": 3.0, "R2": 2.0, "L2": 2.0, "R": 1.0, "L": 1.0}
+
+
+def _is_cjk(unit):
+    return bool(_CJK_RE.match(unit))
+
+
+def _parse(text):
+    """把文本拆为 [(单元, 之后的标点类别, 之后是否有空白), ...]"""
+    units = []
+    for m in _UNIT_RE.finditer(text):
+        if m.group("cjk") or m.group("word"):
+            units.append([m.group(), "", False])
+        elif units and m.group("punct"):
+            cls = _PUNCT_CLASS.get(m.group())
+            if cls and not units[-1][1]:
+                units[-1][1] = cls
+        elif units and m.group("space"):
+            units[-1][2] = True
+    return units
+
+
+def _features(tokens, i):
+    """tokens[i] 与 tokens[i + 1] 之间的边界特征"""
+    left, right = tokens[i], tokens[i + 1]
+    left2 = tokens[i - 1] + left if i > 0 else None
+    right2 = right + tokens[i + 2] if i + 2 < len(tokens) else None
+    features = [("LR", left + "|" + right), ("R", right), ("L", left)]
+    if right2:
+        features.append(("R2", right2))
+    if left2:
+        features.append(("L2", left2))
+    return features
+
+
+class LocalPunctuator:
+    """本地规则 + 统计的中英文标点模型，无需网络
+
+    统计部分从语料中学习每个单元边界（中文按字、英文按词）后出现逗号/句号的概率，
+    特征为左右单元及左右两个单元的组合；规则部分处理问句、原文中的停顿空白和英文大小写。
+    原文已有的标点保持不变。
+    """
+
+    def __init__(self, corpus_path=CORPUS_PATH, threshold=0.5, min_gap=3, min_count=2):
+        self.threshold = threshold  # 边界的标点概率超过该值才加标点
+        self.min_gap = min_gap  # 与上一个标点至少间隔的单元数
+        self.min_count = min_count  # 特征至少出现的次数
+        self._counts = defaultdict(Counter)
+        self._final_counts = defaultdict(Counter)
+        start = time.perf_counter()
+        with open(corpus_path, encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        for line in lines:
+            self.train(line)
+        logger.info(f"本地标点模型已加载: {len(lines)} 句语料, {len(self._counts)} 个特征, "
+                    f"耗时 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    def train(self, text):
+        units = _parse(text)
+        tokens = [unit[0].lower() for unit in units]
+        for i in range(len(units) - 1):
+            for feature in _features(tokens, i):
+                self._counts[feature][units[i][1]] += 1
+        if units:
+            self._final_counts[tokens[-1]][units[-1][1] or "."] += 1
+
+    def _boundary_probs(self, tokens, i):
+        """返回边界处 (逗号概率, 句号概率)"""
+        total_weight = comma = period = 0.0
+        for feature in _features(tokens, i):
+            counts = self._counts.get(feature)
+            if not counts:
+                continue
+            n = sum(counts.values())
+            if n < self.min_count:
+                continue
+            weight = _FEATURE_WEIGHTS[feature[0]] * n / (n + 1)
+            total_weight += weight
+            comma += weight * counts[","] / n
+            period += weight * (counts["."] + counts["?"]) / n
+        if not total_weight:
+            return 0.0, 0.0
+        return comma / total_weight, period / total_weight
+
+    def _sentence_end(self, sentence_units):
+        """判断句末标点：问号或句号"""
+        tokens = [unit[0].lower() for unit in sentence_units]
+        if not tokens:
+            return "."
+        if _is_cjk(tokens[-1]):
+            text = "".join(tokens)
+            if tokens[-1] in _ZH_QUESTION_FINALS or any(word in text for word in _ZH_QUESTION_WORDS):
+                return "?"
+        elif tokens[0] in _EN_QUESTION_STARTS:
+            return "?"
+        counts = self._final_counts.get(tokens[-1])
+        if counts and sum(counts.values()) >= self.min_count and counts["?"] / sum(counts.values()) > 0.5:
+            return "?"
+        return "."
+
+    def punctuate(self, text):
+        """为文本添加标点"""
+        units = _parse(text)
+        if not units:
+            return text
+        tokens = [unit[0].lower() for unit in units]
+        gap = 0
+        sentence_start = 0
+        for i in range(len(units) - 1):
+            gap += 1
+            if units[i][1]:
+                gap = 0
+                if units[i][1] in ".?":
+                    sentence_start = i + 1
+                continue
+            both_cjk = _is_cjk(units[i][0]) and _is_cjk(units[i + 1][0])
+            if both_cjk and units[i][2]:
+                # 中文之间的空白通常是识别时的停顿
+                units[i][1] = ","
+                gap = 0
+                continue
+            if gap < self.min_gap or len(units) - i - 1 < self.min_gap:
+                continue
+            comma, period = self._boundary_probs(tokens, i)
+            if comma + period > self.threshold:
+                if period > comma:
+                    units[i][1] = self._sentence_end(units[sentence_start:i + 1])
+                    sentence_start = i + 1
+                else:
+                    units[i][1] = ","
+                gap = 0
+        if not units[-1][1]:
+            units[-1][1] = self._sentence_end(units[sentence_start:])
+        return self._render(units)
+
+    @staticmethod
+    def _render(units):
+        parts = []
+        capitalize = True
+        for i, (unit, punct, _) in enumerate(units):
+            cjk = _is_cjk(unit)
+            if not cjk:
+                if capitalize or unit == "i":
+                    unit = unit[:1].upper() + unit[1:]
+                if i > 0 and (not _is_cjk(units[i - 1][0]) or units[i - 1][1]):
+                    parts.append(" ")
+            elif i > 0 and not _is_cjk(units[i - 1][0]) and not units[i - 1][1]:
+                parts.append(" ")
+            parts.append(unit)
+            if punct:
+                parts.append(_FULL_WIDTH[punct] if cjk else punct)
+            capitalize = punct in (".", "?")
+        return "".join(parts).strip()
+
+
+_punctuator = None
+_punctuator_lock = threading.Lock()
+
+
+def get_local_punctuator():
+    """获取本地标点模型（首次调用时加载语料）"""
+    global _punctuator
+    if _punctuator is None:
+        with _punctuator_lock:
+            if _punctuator is None:
+                _punctuator = LocalPunctuator()
+    return _punctuator
+
+
+PUNCTUATION_ENGINES = ("llm", "local", "auto")
+
+
+class BudgetedPunctuator:
+    """先调用 LLM 添加标点，超过延迟预算或失败时改用本地模型
+
+    超时的 LLM 请求会在网络层被中止，不会继续占用连接。
+    """
+
+    def __init__(self, llm_punctuate, budget_seconds):
+        self.llm_punctuate = llm_punctuate
+        self.budget_seconds = budget_seconds
+        self.fallbacks = 0
+
+    def __call__(self, text):
+        try:
+            result = get_timeout_executor().call(self.budget_seconds, self.llm_punctuate, text)
+            if result and not isinstance(result, tuple):
+                return result
+            reason = result[1] if isinstance(result, tuple) else "结果为空"
+        except TimeoutError:
+            reason = f"超过 {self.budget_seconds * 1000:.0f}ms 预算"
+        except Exception as e:
+            reason = e
+        self.fallbacks += 1
+        logger.warning(f"LLM 标点失败 ({reason})，改用本地标点模型 (累计 {self.fallbacks} 次)")
+        return get_local_punctuator().punctuate(text)
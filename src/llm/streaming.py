@@ -0,0 +1,106 @@
+import queue
+import re
+import threading
+import time
+
+from ..utils.logger import logger
+
+# 句末标点；英文句号需后跟空白才算句末，避免在小数、缩写中间断开
+_SENTENCE_END_RE = re.compile(r"[。！？；!?;\n]|\.(?=\s)")
+_SOFT_BREAK_RE = re.compile(r"[，、：,:\s]")
+
+
+def split_sentences(buffer, max_chars=80):
+    """从缓冲区切出已完整的句子，返回 (可输出的文本, 剩余部分)
+
+    没有句末标点但超过 max_chars 时在最后一个逗号或空白处切开，避免长句一直不输出。
+    """
+    ends = [m.end() for m in _SENTENCE_END_RE.finditer(buffer)]
+    if ends:
+        return buffer[:ends[-1]], buffer[ends[-1]:]
+    if len(buffer) > max_chars:
+        breaks = [m.end() for m in _SOFT_BREAK_RE.finditer(buffer)]
+        cut = breaks[-1] if breaks else len(buffer)
+        return buffer[:cut], buffer[cut:]
+    return "", buffer
+
+
+class StreamedText:
+    """在后台线程消费 LLM 的增量输出，按整句分批交给输入线程
+
+    迭代得到的是一批批可以直接输入的文本；输入较慢时，期间到达的多句会合并为一批。
+    流式请求在输出任何内容前失败时，整体退回 fallback 文本（通常是后处理前的原文）。
+    """
+
+    def __init__(self, deltas, fallback="", transform=None, on_complete=None, max_chars=80):
+        """
+        Args:
+            deltas: 产生增量文本的迭代器（在后台线程中消费）
+            fallback: 出错且尚未输出任何内容时使用的文本
+            transform: 输出前对每批文本做的转换（如繁简转换）
+            on_complete: 全部输出后以完整文本调用
+        """
+        self.fallback = fallback
+        self.transform = transform
+        self.on_complete = on_complete
+        self.max_chars = max_chars
+        self.text = ""  # 已产生的完整文本
+        self.error = None
+        self.first_batch_seconds = None  # 从开始请求到第一批文本就绪的耗时
+        self._queue = queue.Queue()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._consume, args=(deltas,), name="llm-stream", daemon=True)
+        self._thread.start()
+
+    def _consume(self, deltas):
+        buffer = ""
+        try:
+            for delta in deltas:
+                buffer += delta or ""
+                batch, buffer = split_sentences(buffer, self.max_chars)
+                self._emit(batch)
+        except Exception as e:
+            self.error = e
+            if self.text:
+                logger.error(f"LLM 流式输出中断，已输出部分保留: {e}")
+            else:
+                logger.warning(f"LLM 流式请求失败，使用原文: {e}")
+                buffer = self.fallback
+        self._emit(buffer.strip() if not self.text else buffer.rstrip())
+        self._queue.put(None)
+        if self.on_complete and self.text:
+            try:
+                self.on_complete(self.text)
+            except Exception as e:
+                logger.warning(f"LLM 流式输出完成回调失败: {e}")
+
+    def _emit(self, batch):
+        if not batch:
+            return
+        if self.transform:
+            batch = self.transform(batch)
+        if not self.text:
+            batch = batch.lstrip()
+            if not batch:
+                return
+            self.first_batch_seconds = time.perf_counter() - self._start
+            logger.info(f"LLM 流式输出首批就绪, 耗时 {self.first_batch_seconds * 1000:.0f}ms")
+        self.text += batch
+        self._queue.put(batch)
+
+    def __iter__(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            # 合并等待期间已到达的批次
+            while True:
+                try:
+                    following = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if following is None:
+                    yield batch
+                    return
+                batch += following
+            yield batch
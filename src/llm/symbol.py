@@ -1,36 +1,78 @@
 from openai import OpenAI
 import dotenv
 import os
+from ..utils.http_client import get_http_client
 from ..utils.logger import logger
+from .postprocess import record_round_trip
 
 dotenv.load_dotenv()
 
 class SymbolProcessor:
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("GROQ_API_KEY"), base_url=os.getenv("GROQ_BASE_URL"))
+        self.client = OpenAI(
+            api_key=os.getenv("GROQ_API_KEY"),
+            base_url=os.getenv("GROQ_BASE_URL"),
+            http_client=get_http_client(),
+            max_retries=0  # 超时由 TimeoutExecutor 控制，SDK 自带的重试会在调用方超时后继续占用工作线程
+        )
         self.model = os.getenv("GROQ_ADD_SYMBOL_MODEL", "llama3-8b-8192")
 
+    def chat(self, messages, json_output=False):
+        """发送一次 chat completions 请求，返回回复内容"""
+        kwargs = {"response_format": {"type": "json_object"}} if json_output else {}
+        record_round_trip()
+        response = self.client.chat.completions.create(model=self.model, messages=messages, **kwargs)
+        return response.choices[0].message.content
+
+    def chat_stream(self, messages):
+        """发送流式 chat completions 请求，逐个产生增量文本"""
+        record_round_trip()
+        stream = self.client.chat.completions.create(model=self.model, messages=messages, stream=True)
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+
     def add_symbol(self, text):
         """为输入的文本添加合适的标点符号"""
-
-        system_prompt = """
-        Please add appropriate punctuation to the user’s input and return it. Apart from this, do not add or modify anything else. Do not translate the user's input. Do not add any explanation. Do not answer the user's question and so on. Just output the user's input with punctuation!
-        """
         try:
             logger.info(f"正在添加标点符号...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": text}
-            ]
-        )
-            return response.choices[0].message.content
+            return self.chat(self._add_symbol_messages(text))
         except Exception as e:
             return text, e
+
+    def add_symbol_stream(self, text):
+        """流式添加标点符号，逐个产生增量文本"""
+        logger.info(f"正在添加标点符号 (流式)...")
+        return self.chat_stream(self._add_symbol_messages(text))
+
+    @staticmethod
+    def _add_symbol_messages(text):
+        system_prompt = """
+        Please add appropriate punctuation to the user’s input and return it. Apart from this, do not add or modify anything else. Do not translate the user's input. Do not add any explanation. Do not answer the user's question and so on. Just output the user's input with punctuation!
+        """
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text}
+        ]
         
     def optimize_result(self, text):
         """优化识别结果"""
+        try:
+            logger.info(f"正在优化识别结果...")
+            return self.chat(self._optimize_messages(text))
+        except Exception as e:
+            return text, e
+
+    def optimize_result_stream(self, text):
+        """流式优化识别结果，逐个产生增量文本"""
+        logger.info(f"正在优化识别结果 (流式)...")
+        return self.chat_stream(self._optimize_messages(text))
+
+    @staticmethod
+    def _optimize_messages(text):
         # system_prompt = """
         # You are a content input optimizer.
 
@@ -55,15 +97,7 @@ class SymbolProcessor:
         Do not add any explanation.
         Do not add answer to the user's question,just output the optimized content.
         """
-        try:
-            logger.info(f"正在优化识别结果...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": text}
-            ]
-        )
-            return response.choices[0].message.content
-        except Exception as e:
-            return text, e
\ No newline at end of file
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text}
+        ]
@@ -1,7 +1,14 @@
+import json
 import os
-import requests
+import time
+
 from dotenv import load_dotenv
 
+from ..utils.http_client import get_http_client
+from ..utils.logger import logger
+from .postprocess import record_round_trip
+from .translation_memory import TranslationMemory
+
 load_dotenv()
 
 class TranslateProcessor:
@@ -12,28 +19,85 @@ class TranslateProcessor:
             "Content-Type": "application/json"
         }
         self.model = os.getenv("SILICONFLOW_TRANSLATE_MODEL", "THUDM/glm-4-9b-chat")
+        # 翻译记忆：常说的句子直接复用之前的译文，不再调用 LLM
+        try:
+            self.memory = TranslationMemory.from_env()
+        except Exception as e:
+            logger.warning(f"无法打开翻译记忆，已关闭: {e}")
+            self.memory = None
 
-    def translate(self, text):
+    def chat(self, messages, json_output=False):
+        """发送一次 chat completions 请求，返回回复内容"""
+        payload = {"model": self.model, "messages": messages}
+        if json_output:
+            payload["response_format"] = {"type": "json_object"}
+        record_round_trip()
+        response = get_http_client().post(self.url, headers=self.headers, json=payload)
+        response.raise_for_status()
+        return response.json()['choices'][0]['message']['content']
+
+    def chat_stream(self, messages):
+        """发送流式 chat completions 请求（SSE），逐个产生增量文本"""
+        payload = {"model": self.model, "messages": messages, "stream": True}
+        record_round_trip()
+        with get_http_client().stream("POST", self.url, headers=self.headers, json=payload) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices")
+                if choices and choices[0].get("delta", {}).get("content"):
+                    yield choices[0]["delta"]["content"]
+
+    @staticmethod
+    def _messages(text):
         system_prompt = """
         You are a translation assistant.
         Please translate the user's input into English.
         """
 
-        payload = {
-            "model": self.model,
-            "messages":[
-                {
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": text
-                }
-            ]
-        }
+        return [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": text
+            }
+        ]
+
+    def translate_stream(self, text):
+        """流式翻译，逐个产生增量文本；翻译记忆命中时一次产生全部译文"""
+        if self.memory is not None:
+            cached = self.memory.lookup(text, self.model)
+            if cached is not None:
+                yield cached
+                return
+
+        start = time.perf_counter()
+        parts = []
+        for delta in self.chat_stream(self._messages(text)):
+            parts.append(delta)
+            yield delta
+        if self.memory is not None:
+            self.memory.store(text, self.model, "".join(parts), time.perf_counter() - start)
+
+    def translate(self, text):
+        if self.memory is not None:
+            cached = self.memory.lookup(text, self.model)
+            if cached is not None:
+                return cached
+
+        messages = self._messages(text)
         try:
-            response = requests.request("POST", self.url, headers=self.headers, json=payload)
-            return response.json().get('choices', [{}])[0].get('message', {}).get('content', '')
+            start = time.perf_counter()
+            translation = self.chat(messages)
+            if self.memory is not None:
+                self.memory.store(text, self.model, translation, time.perf_counter() - start)
+            return translation
         except Exception as e:
             return text, e
\ No newline at end of file
@@ -0,0 +1,178 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from ..utils.logger import logger
+
+_PUNCT_RE = re.compile(r"[^\w\s]|_")
+_SPACE_RE = re.compile(r"\s+")
+_CJK_SPACE_RE = re.compile(r"(?<=[^\x00-\x7f]) | (?=[^\x00-\x7f])")
+_DIGITS_RE = re.compile(r"\d+")
+_FINAL_PUNCT_RE = re.compile(r"([?!])[^\w]*$")  # 全角的？！经 NFKC 后为半角
+
+
+def normalize(text):
+    """规范化原文：全角转半角、小写、去掉标点、合并空白（识别结果的标点常常不稳定）
+
+    句末的？！保留：陈述句和同样字面的问句、感叹句译文不同；句号和没有标点都按陈述句处理
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    final = _FINAL_PUNCT_RE.search(text)
+    text = _PUNCT_RE.sub(" ", text)
+    text = _SPACE_RE.sub(" ", text).strip()
+    text = _CJK_SPACE_RE.sub("", text)  # 中文之间的空格没有意义
+    return text + final.group(1) if final and text else text
+
+
+def ngrams(text, n=3):
+    """字符 n-gram 集合（中英文通用），过短的文本整体作为一个 gram"""
+    if len(text) <= n:
+        return {text}
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class TranslationMemory:
+    """持久化的翻译记忆（SQLite）
+
+    - 精确匹配：按规范化后的原文和模型查找
+    - 近似匹配（可选）：字符三元组索引找出候选，Dice 系数不低于阈值、且数字完全一致时命中
+    - 超过 max_entries 条时淘汰最久未使用的条目
+    """
+
+    def __init__(self, path, max_entries=5000, fuzzy=False, fuzzy_threshold=0.9):
+        self.path = path
+        self.max_entries = max_entries
+        self.fuzzy = fuzzy
+        self.fuzzy_threshold = fuzzy_threshold
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fuzzy_hits = 0  # 包含在 hits 中
+        self.misses = 0
+        self.saved_seconds = 0.0  # 命中时省下的 LLM 调用耗时（按写入时记录的耗时估算）
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                model TEXT NOT NULL,
+                source TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                gram_count INTEGER NOT NULL,
+                latency REAL NOT NULL,
+                uses INTEGER NOT NULL DEFAULT 0,
+                last_used REAL NOT NULL,
+                UNIQUE (model, source)
+            );
+            CREATE TABLE IF NOT EXISTS grams (
+                gram TEXT NOT NULL,
+                entry_id INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE
+            );
+            CREATE INDEX IF NOT EXISTS grams_gram ON grams(gram);
+            CREATE INDEX IF NOT EXISTS grams_entry ON grams(entry_id);
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used);
+        """)
+
+    @classmethod
+    def from_env(cls):
+        """根据环境变量创建翻译记忆，未启用时返回 None"""
+        if os.getenv("TRANSLATION_MEMORY_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            path=os.getenv("TRANSLATION_MEMORY_PATH", os.path.join("output", "translation_memory.db")),
+            max_entries=int(os.getenv("TRANSLATION_MEMORY_SIZE", "5000")),
+            fuzzy=os.getenv("TRANSLATION_MEMORY_FUZZY", "false").lower() == "true",
+            fuzzy_threshold=float(os.getenv("TRANSLATION_MEMORY_FUZZY_THRESHOLD", "0.9")),
+        )
+
+    def lookup(self, text, model):
+        """查找译文，未命中返回 None"""
+        source = normalize(text)
+        if not source:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, translation, latency FROM entries WHERE model = ? AND source = ?",
+                (model, source)).fetchone()
+            kind = "精确"
+            if row is None and self.fuzzy:
+                row = self._fuzzy_lookup(source, model)
+                kind = "近似"
+            if row is None:
+                self.misses += 1
+                return None
+            entry_id, translation, latency = row
+            self._db.execute("UPDATE entries SET uses = uses + 1, last_used = ? WHERE id = ?",
+                             (time.time(), entry_id))
+            self._db.commit()
+            self.hits += 1
+            self.fuzzy_hits += kind == "近似"
+            self.saved_seconds += latency
+        logger.info(f"翻译记忆{kind}命中, 跳过 LLM 调用 (省下约 {latency:.1f}秒, {self.stats()})")
+        return translation
+
+    def _fuzzy_lookup(self, source, model):
+        """近似匹配（需持有 _lock）"""
+        grams = ngrams(source)
+        placeholders = ",".join("?" * len(grams))
+        candidates = self._db.execute(
+            f"""SELECT e.id, e.source, e.translation, e.latency, e.gram_count, COUNT(*) AS shared
+                FROM grams g JOIN entries e ON e.id = g.entry_id
+                WHERE g.gram IN ({placeholders}) AND e.model = ?
+                GROUP BY e.id ORDER BY shared DESC LIMIT 5""",
+            (*grams, model)).fetchall()
+        digits = _DIGITS_RE.findall(source)
+        for entry_id, candidate, translation, latency, gram_count, shared in candidates:
+            score = 2 * shared / (len(grams) + gram_count)
+            # 数字不同的句子（时间、金额等）即使很相似也不能复用译文
+            if score >= self.fuzzy_threshold and _DIGITS_RE.findall(candidate) == digits:
+                return entry_id, translation, latency
+        return None
+
+    def store(self, text, model, translation, latency):
+        """保存一条译文，latency 为本次 LLM 调用耗时（秒）"""
+        source = normalize(text)
+        if not source or not translation:
+            return
+        grams = ngrams(source)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                """INSERT INTO entries (model, source, translation, gram_count, latency, last_used)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (model, source) DO UPDATE SET
+                       translation = excluded.translation, latency = excluded.latency, last_used = excluded.last_used""",
+                (model, source, translation, len(grams), latency, now))
+            entry_id = self._db.execute("SELECT id FROM entries WHERE model = ? AND source = ?",
+                                        (model, source)).fetchone()[0]
+            self._db.execute("DELETE FROM grams WHERE entry_id = ?", (entry_id,))
+            self._db.executemany("INSERT INTO grams (gram, entry_id) VALUES (?, ?)",
+                                 [(gram, entry_id) for gram in grams])
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """超过上限时删除最久未使用的条目（需持有 _lock）"""
+        count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM entries WHERE id IN (SELECT id FROM entries ORDER BY last_used LIMIT ?)", (excess,))
+            logger.info(f"翻译记忆已满, 淘汰 {excess} 条最久未使用的译文")
+
+    def stats(self):
+        """返回命中统计"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else None,
+            "saved_seconds": round(self.saved_seconds, 2),
+        }
@@ -0,0 +1,7 @@
+"""异步处理流水线
+键盘监听线程只提交任务，采集、编码、识别、后处理、输入各自在后台线程中完成
+"""
+
+from .utterance import Stage, Utterance, UtterancePipeline
+
+__all__ = ['Stage', 'Utterance', 'UtterancePipeline']
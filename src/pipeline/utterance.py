@@ -0,0 +1,261 @@
+import collections
+import itertools
+import queue
+import threading
+import time
+
+from ..utils.logger import logger
+
+
+class Utterance:
+    """流水线中的一次语音输入"""
+
+    def __init__(self, seq, mode, payload, prompt=""):
+        self.seq = seq
+        self.mode = mode  # 'transcriptions' 或 'translations'
+        self.prompt = prompt
+        self.payload = payload  # 当前阶段的输入，各阶段依次替换
+        self.text = None
+        self.error = None
+        self.skip_reason = None  # 设置后跳过剩余阶段，直接按序交付
+        self.current_stage = None  # 最近一次取到该任务的阶段名
+        self.session = None  # 流式识别会话（录音过程中已分段识别时）
+        self.stream = None  # LLM 流式后处理的输出（StreamedText），设置后按批输入
+        self.created_at = time.perf_counter()
+        self.timings = {}  # 阶段名 -> 耗时（秒）
+
+    @property
+    def done(self):
+        return self.error is not None or self.skip_reason is not None
+
+
+class Stage:
+    """流水线的一个阶段：有界队列 + 工作线程"""
+
+    def __init__(self, name, handler, maxsize=8, workers=1, run_when_done=False):
+        self.name = name
+        self.handler = handler
+        self.run_when_done = run_when_done  # 已出错或被跳过的任务是否仍交给 handler
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.workers = workers
+        self.next = None  # 下一个阶段，或最终的交付回调
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def put(self, utterance, block=True):
+        self.queue.put(utterance, block=block)
+
+    def _run(self):
+        while True:
+            utterance = self.queue.get()
+            if utterance is None:
+                break
+            utterance.current_stage = self.name
+            if self.run_when_done or not utterance.done:
+                start = time.perf_counter()
+                try:
+                    self.handler(utterance)
+                except Exception as e:
+                    logger.error(f"流水线阶段 {self.name} 出错: {e}", exc_info=True)
+                    utterance.error = f"❌ {str(e)}"
+                utterance.timings[self.name] = time.perf_counter() - start
+            self.next(utterance)
+
+    def stop(self):
+        for _ in self._threads:
+            self.queue.put(None)
+
+
+class UtterancePipeline:
+    """分阶段的语音处理流水线：采集 -> 编码 -> 识别 -> 后处理 -> 输入
+
+    键盘监听线程只负责提交任务；每个阶段有独立的工作线程和有界队列，
+    识别阶段可以有多个请求同时进行，最终结果按提交顺序交付给 deliver 回调。
+
+    同时在处理的语音数超过 max_in_flight 时按 drop_policy 处理：
+    - newest：丢弃新提交的语音
+    - oldest：丢弃最早一条尚未开始识别的语音
+    - block：由后台的准入线程按提交顺序等待最多 submit_timeout 秒，仍然没有空位则丢弃新语音；
+      submit 本身不等待，不会阻塞键盘监听线程
+    """
+
+    DROP_POLICIES = ("newest", "oldest", "block")
+
+    def __init__(self, capture, encode, asr, post_process, deliver, queue_size=8,
+                 asr_workers=1, max_in_flight=None, drop_policy="newest", submit_timeout=1.0):
+        self.stages = [
+            Stage("capture", capture, queue_size),
+            Stage("encode", encode, queue_size),
+            Stage("asr", asr, queue_size, workers=asr_workers),
+            # 出错的语音也交给后处理阶段，以便流式识别的会话收尾
+            Stage("post", post_process, queue_size, run_when_done=True),
+        ]
+        for current, following in zip(self.stages, self.stages[1:]):
+            current.next = following.put
+        # 识别阶段有多个工作线程，结果按提交顺序交给后处理阶段：后处理阶段会等待流式识别的
+        # 各段输入完毕，而各段要等前面的语音输入完毕，乱序进入后处理会互相等待
+        self.stages[2].next = self._to_post
+        self.stages[-1].next = self._complete
+        self._post_ready = {}  # seq -> 识别完成的语音；None 表示未经过各阶段（提交时即被丢弃）
+        self._post_next = 0
+        self._post_lock = threading.Lock()
+
+        if drop_policy not in self.DROP_POLICIES:
+            logger.warning(f"未知的丢弃策略: {drop_policy}，使用 newest")
+            drop_policy = "newest"
+        self.max_in_flight = max_in_flight
+        self.drop_policy = drop_policy
+        self.submit_timeout = submit_timeout
+        self.dropped = 0
+
+        self.inject = Stage("inject", deliver, maxsize=0, run_when_done=True)
+        self.inject.next = self._log_timings
+        self._seq = itertools.count()
+        self.submitted = 0  # 已提交的语音数
+        self._pending = {}  # 已完成但还不能交付（前面的还没完成）的结果
+        self._next_seq = 0
+        self._order_lock = threading.Lock()
+        self._active = {}  # seq -> 尚未交付的语音（按提交顺序）
+        self._slot_freed = threading.Condition(self._order_lock)
+        self._waiting = collections.deque()  # block 策略下等待空位的语音（已计入 _active）
+        self._admitter = None
+        self._stopped = False
+
+    @property
+    def in_flight(self):
+        """已提交但尚未完成输入的语音数（包括正在输入的这一条）"""
+        with self._order_lock:
+            return len(self._active)
+
+    def wait_delivered(self, count, timeout=None):
+        """等待前 count 条语音全部输入完成，返回是否在超时前完成"""
+        with self._order_lock:
+            return self._slot_freed.wait_for(lambda: all(seq >= count for seq in self._active), timeout)
+
+    def start(self):
+        for stage in self.stages + [self.inject]:
+            stage.start()
+        if self.drop_policy == "block" and self.max_in_flight:
+            self._admitter = threading.Thread(target=self._admit_loop, name="pipeline-admit", daemon=True)
+            self._admitter.start()
+        logger.info("异步处理流水线已启动")
+
+    def stop(self):
+        with self._order_lock:
+            self._stopped = True
+            self._slot_freed.notify_all()
+        for stage in self.stages + [self.inject]:
+            stage.stop()
+
+    def submit(self, payload, mode, prompt=""):
+        """提交一次语音输入，返回 Utterance"""
+        with self._order_lock:
+            utterance = Utterance(next(self._seq), mode, payload, prompt)
+            self.submitted += 1
+            if self._admitter is not None and (self._waiting or not self._has_room()):
+                # 交给准入线程等待空位，键盘监听线程立即返回
+                self._active[utterance.seq] = utterance
+                self._waiting.append(utterance)
+                self._slot_freed.notify_all()
+                return utterance
+            accepted = self._make_room()
+            self._active[utterance.seq] = utterance
+            if not accepted:
+                self._drop(utterance, "同时处理的语音数已达上限")
+                self._pending[utterance.seq] = utterance
+                self._flush()
+        if not accepted:
+            self._release_to_post(utterance.seq, None)
+            return utterance
+        self._start(utterance)
+        return utterance
+
+    def _start(self, utterance):
+        """把已接受的语音交给第一个阶段"""
+        try:
+            self.stages[0].put(utterance, block=False)
+        except queue.Full:
+            self._drop(utterance, "处理队列已满")
+            self._release_to_post(utterance.seq, None)
+            self._complete(utterance)
+
+    def _to_post(self, utterance):
+        self._release_to_post(utterance.seq, utterance)
+
+    def _release_to_post(self, seq, utterance):
+        """按提交顺序把识别完成的语音交给后处理阶段"""
+        with self._post_lock:
+            self._post_ready[seq] = utterance
+            while self._post_next in self._post_ready:
+                ready = self._post_ready.pop(self._post_next)
+                self._post_next += 1
+                if ready is not None:
+                    self.stages[3].put(ready)
+
+    def _has_room(self):
+        """同时处理的语音数是否未达上限（需持有 _order_lock），等待准入的语音不计入"""
+        return not self.max_in_flight or len(self._active) - len(self._waiting) < self.max_in_flight
+
+    def _admit_loop(self):
+        """block 策略的准入线程：按提交顺序为等待的语音等待空位"""
+        while True:
+            with self._order_lock:
+                self._slot_freed.wait_for(lambda: self._waiting or self._stopped)
+                if self._stopped:
+                    return
+                accepted = self._slot_freed.wait_for(lambda: self._has_room() or self._stopped,
+                                                     self.submit_timeout)
+                utterance = self._waiting.popleft()
+                rejected = not accepted or self._stopped
+                if rejected:
+                    self._drop(utterance, "同时处理的语音数已达上限")
+                    self._pending[utterance.seq] = utterance
+                    self._flush()
+            if rejected:
+                self._release_to_post(utterance.seq, None)
+            else:
+                self._start(utterance)
+
+    def _make_room(self):
+        """按丢弃策略为新语音腾出位置（需持有 _order_lock），返回是否接受新语音"""
+        if self._has_room():
+            return True
+        if self.drop_policy == "oldest":
+            for victim in self._active.values():
+                if not victim.done and victim.current_stage in (None, "capture", "encode"):
+                    self._drop(victim, "同时处理的语音数已达上限")
+                    return True
+            return False
+        return False  # newest；block 策略由准入线程处理，不会走到这里
+
+    def _drop(self, utterance, reason):
+        """标记丢弃，后续阶段会跳过它，但仍按顺序交付以释放资源"""
+        utterance.skip_reason = "DROPPED"
+        self.dropped += 1
+        logger.warning(f"{reason}，丢弃第 {utterance.seq} 条语音 "
+                       f"(策略: {self.drop_policy}, 累计丢弃 {self.dropped})")
+
+    def _complete(self, utterance):
+        """按提交顺序把结果交给输入阶段"""
+        with self._order_lock:
+            self._pending[utterance.seq] = utterance
+            self._flush()
+
+    def _flush(self):
+        """交付所有已按序就绪的结果（需持有 _order_lock）"""
+        while self._next_seq in self._pending:
+            self.inject.put(self._pending.pop(self._next_seq))
+            self._next_seq += 1
+
+    def _log_timings(self, utterance):
+        with self._order_lock:
+            self._active.pop(utterance.seq, None)
+            self._slot_freed.notify_all()
+        timings = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in utterance.timings.items())
+        total = time.perf_counter() - utterance.created_at
+        logger.info(f"第 {utterance.seq} 条语音处理完成, 总耗时 {total * 1000:.0f}ms ({timings})")
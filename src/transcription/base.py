@@ -0,0 +1,52 @@
+from abc import ABC, abstractmethod
+
+
+class ASRBackend(ABC):
+    """识别后端的公共接口
+
+    main.py、ASRRouter 和 batch_transcribe.py 只通过这些方法使用识别后端。
+    出错时不抛出异常，而是返回 (None, "❌ 错误信息")。
+    新的后端继承本类并实现 transcribe，再在 registry 中注册即可；没有实现 transcribe 的子类无法创建。
+    """
+
+    DEFAULT_MODEL = None  # 写入归档索引和批量识别结果的模型名称
+
+    def model_for(self, mode="transcriptions"):
+        """该模式实际使用的模型名称（默认为 DEFAULT_MODEL）"""
+        return self.DEFAULT_MODEL
+
+    def prewarm(self):
+        """按键按下时预先建立连接（默认不做任何事）"""
+
+    @abstractmethod
+    def transcribe(self, audio_buffer, mode="transcriptions", prompt=""):
+        """识别音频（字节流或 ChunkedAudio），用完后关闭 audio_buffer
+
+        Returns:
+            tuple: (识别文本, 错误信息)
+        """
+
+    def post_process(self, result, mode="transcriptions"):
+        """对识别结果做后处理（默认原样返回）
+
+        Returns:
+            tuple: (结果文本, 错误信息)
+        """
+        return result, None
+
+    def post_process_stream(self, result, mode="transcriptions"):
+        """以流式输出做后处理，返回 StreamedText；不支持流式处理时返回 None"""
+        return None
+
+    def process_audio(self, audio_buffer, mode="transcriptions", prompt=""):
+        """识别并后处理音频（转录或翻译）
+
+        Returns:
+            tuple: (结果文本, 错误信息)
+            - 如果成功，错误信息为 None
+            - 如果失败，结果文本为 None
+        """
+        result, error = self.transcribe(audio_buffer, mode, prompt)
+        if error:
+            return None, error
+        return self.post_process(result, mode)
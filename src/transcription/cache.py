@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from ..utils.logger import logger
+
+
+class TranscriptionCache:
+    """按音频内容寻址的识别结果缓存
+
+    - 键由音频哈希与模式、模型以及影响结果的参数共同决定
+    - 内存中按 LRU 淘汰，最多保存 max_entries 条
+    - 可选的磁盘层（每条结果一个文件），重启后仍然有效，超过 max_disk_entries 时删除最旧的文件
+    """
+
+    def __init__(self, max_entries=256, disk_dir=None, max_disk_entries=5000):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0  # 包含在 hits 中
+        self.misses = 0
+        self.evictions = 0
+        self._disk_writes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.getenv("TRANSCRIPTION_CACHE_SIZE", "256")),
+            disk_dir=os.getenv("TRANSCRIPTION_CACHE_DIR") or None,
+            max_disk_entries=int(os.getenv("TRANSCRIPTION_CACHE_DISK_ENTRIES", "5000")),
+        )
+
+    @staticmethod
+    def audio_hash(audio_data):
+        return hashlib.md5(audio_data).hexdigest()
+
+    @staticmethod
+    def key(audio_hash, **params):
+        """由音频哈希和影响识别结果的参数（模式、模型、提示词、开关等）生成缓存键"""
+        digest = hashlib.md5(json.dumps(params, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+        return f"{audio_hash}-{digest[:16]}"
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.txt")
+
+    def get(self, key):
+        """返回缓存的文本，未命中返回 None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        text = self._read_disk(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, text)
+        return text
+
+    def put(self, key, text):
+        if not text:
+            return
+        with self._lock:
+            self._store(key, text)
+        self._write_disk(key, text)
+
+    def _store(self, key, text):
+        """写入内存层（需持有 _lock）"""
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"读取识别缓存失败: {e}")
+            return None
+
+    def _write_disk(self, key, text):
+        if not self.disk_dir:
+            return
+        try:
+            path = self._disk_path(key)
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning(f"写入识别缓存失败: {e}")
+            return
+        self._disk_writes += 1
+        if self._disk_writes % 100 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """磁盘层超过上限时删除最旧的文件"""
+        files = [entry for entry in os.scandir(self.disk_dir) if entry.name.endswith(".txt")]
+        excess = len(files) - self.max_disk_entries
+        if excess <= 0:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:excess]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        """返回命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else None,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_transcription_cache():
+    """获取进程内共享的识别结果缓存"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TranscriptionCache.from_env()
+    return _cache
+
+
+def get_transcription_cache_stats():
+    return get_transcription_cache().stats()
@@ -0,0 +1,125 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+
+from ..utils.logger import logger
+from ..utils.timeout import get_timeout_executor
+
+# 中日文按单字切分，其余按单词切分（标点单独成词）
+_CJK = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK}]|[^\W{_CJK}]+|[^\w\s]")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+
+def _tokens(text):
+    """返回 [(规范化后的词, 起点, 终点), ...]，标点不参与比较"""
+    return [(m.group().lower(), m.start(), m.end()) for m in _TOKEN_RE.finditer(text)
+            if m.group()[0].isalnum() or _CJK_RE.match(m.group())]
+
+
+def _join(left, right):
+    """拼接两段文本，中日文之间不加空格"""
+    left, right = left.rstrip(), right.lstrip()
+    if not left or not right:
+        return left or right
+    if _CJK_RE.match(left[-1]) or _CJK_RE.match(right[0]):
+        return left + right
+    return f"{left} {right}"
+
+
+def merge_overlap(left, right, window=12, min_match=2):
+    """合并两段有重叠的识别文本
+
+    在 left 的末尾和 right 的开头各取 window 个词：优先找 left 的后缀与 right 的前缀
+    完全相同的最长片段（重叠区很短时可能只有一个完整的词），保留 left，再接上 right
+    中该片段之后的部分；找不到时再找最长的公共片段（至少 min_match 个词），保留 left
+    到公共片段结束为止的部分，再接上 right 中公共片段之后的部分。
+    切分点附近被截断的词通常识别错误，会随公共片段两侧一起被丢弃。
+    """
+    left_tokens, right_tokens = _tokens(left), _tokens(right)
+    tail, head = left_tokens[-window:], right_tokens[:window]
+    tail_words, head_words = [t[0] for t in tail], [t[0] for t in head]
+    for size in range(min(len(tail), len(head)), 0, -1):
+        if tail_words[-size:] == head_words[:size]:
+            return _join(left[:tail[-1][2]], right[head[size - 1][2]:])
+    matcher = SequenceMatcher(None, tail_words, head_words, autojunk=False)
+    match = matcher.find_longest_match(0, len(tail), 0, len(head))
+    if match.size < min_match:
+        return _join(left, right)
+    left_end = tail[match.a + match.size - 1][2]
+    right_start = head[match.b + match.size - 1][2]
+    return _join(left[:left_end], right[right_start:])
+
+
+def merge_transcripts(parts):
+    """按顺序合并各段识别文本
+
+    Args:
+        parts: [(文本, 是否与上一段重叠), ...]，识别失败的段文本为 None
+    """
+    merged = ""
+    previous_failed = False
+    for text, overlapped in parts:
+        if text is None:
+            # 识别失败的段用省略号标出，避免静默丢失内容
+            merged = _join(merged, "…")
+        elif overlapped and merged and not previous_failed:
+            merged = merge_overlap(merged, text)
+        else:
+            # 上一段失败时没有可对齐的重叠区，直接拼接，以免把省略号当作重叠部分丢掉
+            merged = _join(merged, text)
+        previous_failed = text is None
+    return merged
+
+
+class LongFormTranscriber:
+    """并发识别长录音的各段并合并结果"""
+
+    def __init__(self, concurrency=4):
+        # 每段的 API 调用都在共享的超时线程池中执行，超过线程池大小的段会排队，
+        # 排队过久会被放弃，所以并发数不超过线程池大小
+        max_workers = get_timeout_executor().max_workers
+        if concurrency > max_workers:
+            logger.warning(f"长录音并发数 {concurrency} 超过 API_MAX_WORKERS ({max_workers})，改为 {max_workers}")
+            concurrency = max_workers
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="long-form")
+
+    @classmethod
+    def from_env(cls):
+        return cls(int(os.getenv("LONG_FORM_CONCURRENCY", "4")))
+
+    def transcribe(self, chunks, transcribe_chunk):
+        """并发识别 ChunkedAudio 中的各段
+
+        Args:
+            chunks: ChunkedAudio
+            transcribe_chunk: 识别单段的函数，参数为字节流，返回文本，失败时抛出异常
+
+        Returns:
+            tuple: (合并后的文本, 错误信息)，全部失败时文本为 None
+        """
+        start = time.perf_counter()
+
+        def run(chunk):
+            try:
+                return transcribe_chunk(chunk.buffer), None
+            except Exception as e:
+                logger.error(f"第 {chunk.index + 1}/{len(chunks)} 段识别失败: {e}")
+                return None, e
+
+        results = list(self._executor.map(run, chunks))
+        failed = [error for _, error in results if error is not None]
+        if len(failed) == len(results):
+            error = failed[0]
+            if isinstance(error, TimeoutError):
+                return None, f"❌ API 请求超时 ({error})"
+            return None, f"❌ {error}"
+
+        text = merge_transcripts([(result, chunk.overlap > 0) for (result, _), chunk in zip(results, chunks)])
+        logger.info(f"长录音 {chunks.duration:.1f}秒, {len(chunks)} 段并发识别 "
+                    f"(并发数 {self.concurrency}, 失败 {len(failed)} 段), "
+                    f"耗时 {time.perf_counter() - start:.1f}秒")
+        return text, None
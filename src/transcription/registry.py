@@ -0,0 +1,100 @@
+"""识别后端注册表
+
+后端以 "模块:类名" 的形式登记，只有被选用时才导入对应模块，
+未使用的后端（及其依赖的 openai、opencc 等）不会在启动时加载。
+
+除内置后端外，还可以通过以下方式添加后端，无需修改 main.py：
+- 环境变量 ASR_BACKEND_PLUGINS，如 "local=mypkg.offline:OfflineEngine,stub=tests.stub:StubBackend"
+- 已安装的包在 voice_assistant.asr_backends 入口点组中声明的后端
+- 代码中调用 register_backend()
+"""
+import importlib
+import os
+import threading
+from importlib.metadata import entry_points
+
+from ..utils.logger import logger
+from .base import ASRBackend
+
+ENTRY_POINT_GROUP = "voice_assistant.asr_backends"
+REQUIRED_METHODS = ("transcribe", "post_process", "post_process_stream", "process_audio", "prewarm")
+
+_registry = {}  # 名称 -> (目标, 构造参数)；目标为 "模块:类名" 或可调用对象
+_lock = threading.Lock()
+_plugins_loaded = False
+
+
+def register_backend(name, target, **options):
+    """登记识别后端
+
+    Args:
+        name: 后端名称（ASR_BACKENDS / SERVICE_PLATFORM 中使用的名称）
+        target: "模块:类名"（以 . 开头表示相对 src.transcription），或返回后端实例的可调用对象
+        options: 创建后端时传入的关键字参数
+    """
+    with _lock:
+        _registry[name.lower()] = (target, options)
+
+
+register_backend("siliconflow", ".senseVoiceSmall:SenseVoiceSmallProcessor")
+register_backend("groq", ".whisper:WhisperProcessor", service_platform="groq")
+
+
+def _load_plugins():
+    """登记环境变量和入口点中声明的后端（只读取声明，不导入模块）"""
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for item in os.getenv("ASR_BACKEND_PLUGINS", "").split(","):
+        if not item.strip():
+            continue
+        name, sep, target = item.partition("=")
+        if not sep or ":" not in target:
+            raise ValueError(f"ASR_BACKEND_PLUGINS 格式错误（应为 名称=模块:类名）: {item.strip()}")
+        register_backend(name.strip(), target.strip())
+    try:
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            with _lock:
+                if entry_point.name.lower() in _registry:
+                    continue  # 内置和环境变量中的配置优先
+            register_backend(entry_point.name, entry_point.value)
+    except Exception as e:
+        logger.warning(f"读取识别后端入口点失败: {e}")
+
+
+def available_backends():
+    """已登记的后端名称"""
+    _load_plugins()
+    with _lock:
+        return sorted(_registry)
+
+
+def _resolve(target):
+    if callable(target):
+        return target
+    module_name, _, attr = target.partition(":")
+    module = importlib.import_module(module_name, package=__package__)
+    for part in attr.split("."):
+        module = getattr(module, part)
+    return module
+
+
+def create_backend(name):
+    """按名称创建识别后端，此时才导入其模块"""
+    _load_plugins()
+    with _lock:
+        entry = _registry.get(name.strip().lower())
+    if entry is None:
+        raise ValueError(f"无效的服务平台: {name}（可用: {', '.join(available_backends())}）")
+    target, options = entry
+    factory = _resolve(target)
+    if isinstance(factory, type) and issubclass(factory, ASRBackend) and factory.__abstractmethods__:
+        raise TypeError(f"识别后端 {name} 缺少方法: {', '.join(sorted(factory.__abstractmethods__))}")
+    backend = factory(**options)
+    if not isinstance(backend, ASRBackend):
+        missing = [method for method in REQUIRED_METHODS if not callable(getattr(backend, method, None))]
+        if missing:
+            raise TypeError(f"识别后端 {name} 缺少方法: {', '.join(missing)}")
+    logger.info(f"已加载识别后端: {name} ({type(backend).__name__})")
+    return backend
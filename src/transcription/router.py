@@ -0,0 +1,292 @@
+import io
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ..audio.chunker import AudioChunk, ChunkedAudio
+from ..utils.logger import logger
+from ..utils.metrics import LatencyTracker
+from .base import ASRBackend
+
+
+class RoutedText(str):
+    """识别结果文本，附带给出结果的后端名称，后处理时交给同一个后端"""
+
+    def __new__(cls, text, backend):
+        obj = super().__new__(cls, text)
+        obj.backend = backend
+        return obj
+
+
+def _copy_buffer(buffer):
+    """复制一份上传用的字节流（各后端会各自读取并关闭）"""
+    copy = io.BytesIO(buffer.getvalue())
+    copy.name = getattr(buffer, "name", "audio.wav")
+    return copy
+
+
+def _clone_audio(audio):
+    if isinstance(audio, ChunkedAudio):
+        chunks = [AudioChunk(c.index, c.start, c.end, c.overlap, _copy_buffer(c.buffer)) for c in audio]
+        return ChunkedAudio(chunks, audio.sample_rate, audio=audio.audio, encoder=audio.encoder)
+    return _copy_buffer(audio)
+
+
+class BackendHealth:
+    """单个识别后端的健康状况：滑动窗口延迟、错误率和熔断状态
+
+    连续失败 failure_threshold 次后熔断 reset_seconds 秒；之后放行一次试探请求，
+    成功则恢复，失败则再次熔断。
+    """
+
+    def __init__(self, name, processor, window=50, failure_threshold=3, reset_seconds=30.0):
+        self.name = name
+        self.processor = processor
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.latency = LatencyTracker(window)  # 只统计成功请求
+        self._outcomes = deque(maxlen=window)  # True 表示成功
+        self._lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.opened_at = None  # 熔断开始时间，None 表示未熔断
+        self._trial_in_flight = False
+        self.trips = 0
+
+    def _half_open(self):
+        """熔断期满且没有试探请求在进行（需持有 _lock）"""
+        return (self.opened_at is not None and not self._trial_in_flight and
+                time.monotonic() - self.opened_at >= self.reset_seconds)
+
+    def available(self):
+        """是否可以接收请求（只判断，不占用试探名额）；熔断期满后只放行一次试探请求"""
+        with self._lock:
+            return self.opened_at is None or self._half_open()
+
+    def begin_request(self):
+        """请求实际发出前调用，返回是否可以发出
+
+        未熔断时直接放行；熔断期满时占用唯一的试探名额（由 record_success / record_failure 释放），
+        名额已被其他请求占用或仍在熔断期内时返回 False
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if not self._half_open():
+                return False
+            self._trial_in_flight = True
+        logger.info(f"识别后端 {self.name} 熔断期满，放行一次试探请求")
+        return True
+
+    def record_success(self, seconds):
+        self.latency.record(seconds)
+        with self._lock:
+            self._outcomes.append(True)
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+            if self.opened_at is not None:
+                self.opened_at = None
+                logger.info(f"识别后端 {self.name} 已恢复")
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            self.consecutive_failures += 1
+            trial = self._trial_in_flight
+            self._trial_in_flight = False
+            if trial or (self.opened_at is None and self.consecutive_failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self.trips += 1
+                logger.warning(f"识别后端 {self.name} 连续失败 {self.consecutive_failures} 次，"
+                               f"熔断 {self.reset_seconds:g} 秒")
+
+    @property
+    def error_rate(self):
+        with self._lock:
+            return (self._outcomes.count(False) / len(self._outcomes)) if self._outcomes else None
+
+    def summary(self):
+        latency = self.latency.summary()
+        error_rate = self.error_rate
+        return (f"{self.name}: p50 {latency['p50_ms'] or 0:.0f}ms, p95 {latency['p95_ms'] or 0:.0f}ms, "
+                f"错误率 {error_rate or 0:.0%}, {'熔断中' if self.opened_at is not None else '正常'}")
+
+
+class ASRRouter(ASRBackend):
+    """多个识别后端之间的路由：对冲请求与自动故障切换
+
+    - 按配置顺序选择第一个未熔断的后端作为主后端
+    - 主后端耗时超过其滑动窗口 p95（样本不足时用 hedge_default_seconds）仍未返回时，
+      向下一个后端发出同样的请求，采用先返回的成功结果
+    - 主后端失败时立即切换到下一个后端
+    - 长录音（ChunkedAudio）本身已分段并发，不做对冲，只做故障切换
+
+    与单个识别处理器接口相同，可以直接替换 main.py 中的 audio_processor。
+    识别结果带有后端名称，后处理交给给出结果的后端（各后端的后处理方式不同）。
+    """
+
+    def __init__(self, backends, hedge=True, hedge_min_seconds=0.3, hedge_default_seconds=3.0, min_samples=5,
+                 window=50, failure_threshold=3, reset_seconds=30.0):
+        """
+        Args:
+            backends: [(名称, 识别处理器), ...]，按优先级排列
+        """
+        if not backends:
+            raise ValueError("至少需要一个识别后端")
+        self.backends = [BackendHealth(name, processor, window, failure_threshold, reset_seconds)
+                         for name, processor in backends]
+        self._by_name = {backend.name: backend for backend in self.backends}
+        self.hedge = hedge
+        self.hedge_min_seconds = hedge_min_seconds
+        self.hedge_default_seconds = hedge_default_seconds
+        self.min_samples = min_samples
+        self._executor = ThreadPoolExecutor(max_workers=4 * len(self.backends), thread_name_prefix="asr-router")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    @classmethod
+    def from_env(cls, backends):
+        return cls(
+            backends,
+            hedge=os.getenv("ASR_HEDGE", "true").lower() == "true",
+            hedge_min_seconds=float(os.getenv("ASR_HEDGE_MIN_MS", "300")) / 1000,
+            hedge_default_seconds=float(os.getenv("ASR_HEDGE_DEFAULT_MS", "3000")) / 1000,
+            window=int(os.getenv("ASR_STATS_WINDOW", "50")),
+            failure_threshold=int(os.getenv("ASR_BREAKER_FAILURES", "3")),
+            reset_seconds=float(os.getenv("ASR_BREAKER_RESET_SECONDS", "30")),
+        )
+
+    def _candidates(self):
+        """按优先级排列的可用后端，以及是否已全部熔断；全部熔断时仍按原顺序尝试"""
+        available = [backend for backend in self.backends if backend.available()]
+        return (available, False) if available else (list(self.backends), True)
+
+    def _hedge_delay(self, backend):
+        """主后端超过该时间未返回时发出对冲请求"""
+        if backend.latency.count < self.min_samples:
+            return self.hedge_default_seconds
+        return max(self.hedge_min_seconds, backend.latency.percentile(95))
+
+    def _run(self, backend, audio, mode, prompt):
+        start = time.perf_counter()
+        try:
+            text, error = backend.processor.transcribe(audio, mode=mode, prompt=prompt)
+        except Exception as e:
+            text, error = None, f"❌ {str(e)}"
+        if error:
+            backend.record_failure()
+        else:
+            backend.record_success(time.perf_counter() - start)
+        return text, error
+
+    def _start(self, backend, audio, mode, prompt, force=False):
+        """向后端发出请求；后端不接收请求（熔断中或试探名额已被占用）时返回 None"""
+        if not backend.begin_request() and not force:
+            return None
+        return self._executor.submit(self._run, backend, _clone_audio(audio), mode, prompt)
+
+    def _start_next(self, candidates, audio, mode, prompt, force=False):
+        """从 candidates 中依次取出后端，向第一个接收请求的后端发出请求
+
+        Returns:
+            tuple: (future, 后端)，没有后端接收请求时为 (None, None)
+        """
+        while candidates:
+            backend = candidates.pop(0)
+            future = self._start(backend, audio, mode, prompt, force)
+            if future is not None:
+                return future, backend
+            logger.info(f"识别后端 {backend.name} 熔断中或试探请求已被占用，跳过")
+        return None, None
+
+    def transcribe(self, audio_buffer, mode="transcriptions", prompt=""):
+        """识别音频，返回 (带后端名称的识别文本, 错误信息)"""
+        try:
+            remaining, force = self._candidates()
+            future, primary = self._start_next(remaining, audio_buffer, mode, prompt, force)
+            if future is None:
+                # 可用的后端都刚被其他请求占用了试探名额：与全部熔断时一样按原顺序尝试
+                remaining, force = list(self.backends), True
+                future, primary = self._start_next(remaining, audio_buffer, mode, prompt, force)
+            hedge_allowed = self.hedge and not isinstance(audio_buffer, ChunkedAudio)
+            delay = self._hedge_delay(primary) if hedge_allowed and remaining else None
+            futures = {future: primary}
+            with self._lock:
+                self.requests += 1
+            last_error = None
+            while futures:
+                done, _ = wait(futures, timeout=delay, return_when=FIRST_COMPLETED)
+                if not done:
+                    # 主后端超过 p95 仍未返回：对冲
+                    future, backend = self._start_next(remaining, audio_buffer, mode, prompt, force)
+                    if future is not None:
+                        logger.info(f"识别后端 {primary.name} 超过 {delay * 1000:.0f}ms 未返回，"
+                                    f"同时请求 {backend.name}")
+                        futures[future] = backend
+                        with self._lock:
+                            self.hedged += 1
+                    delay = None
+                    continue
+                for future in done:
+                    backend = futures.pop(future)
+                    text, error = future.result()
+                    if not error:
+                        if backend is not primary:
+                            with self._lock:
+                                self.hedge_wins += delay is None and primary in futures.values()
+                        self._log_result(backend)
+                        return RoutedText(text or "", backend.name), None
+                    last_error = error
+                    logger.warning(f"识别后端 {backend.name} 失败: {error}")
+                if not futures and remaining:
+                    # 正在进行的请求都失败了：切换到下一个后端
+                    future, backend = self._start_next(remaining, audio_buffer, mode, prompt, force)
+                    if future is not None:
+                        logger.warning(f"切换到识别后端 {backend.name}")
+                        futures[future] = backend
+                        with self._lock:
+                            self.failovers += 1
+                    delay = None
+            return None, last_error
+        finally:
+            audio_buffer.close()
+
+    def _log_result(self, winner):
+        backends = "; ".join(backend.summary() for backend in self.backends)
+        logger.info(f"识别结果来自 {winner.name} (请求 {self.requests}, 对冲 {self.hedged}, "
+                    f"对冲胜出 {self.hedge_wins}, 故障切换 {self.failovers}) [{backends}]")
+
+    def _backend_for(self, text):
+        backend = self._by_name.get(getattr(text, "backend", None))
+        return (backend or self.backends[0]).processor
+
+    def post_process(self, result, mode="transcriptions"):
+        """交给给出识别结果的后端做后处理"""
+        return self._backend_for(result).post_process(str(result), mode)
+
+    def post_process_stream(self, result, mode="transcriptions"):
+        return self._backend_for(result).post_process_stream(str(result), mode)
+
+    def prewarm(self):
+        """预先建立到各可用后端的连接"""
+        for backend in self.backends:
+            if backend.opened_at is None:
+                try:
+                    backend.processor.prewarm()
+                except Exception as e:
+                    logger.warning(f"预热识别后端 {backend.name} 失败: {e}")
+
+    def stats(self):
+        with self._lock:
+            stats = {"requests": self.requests, "hedged": self.hedged, "hedge_wins": self.hedge_wins,
+                     "failovers": self.failovers}
+        stats["backends"] = {
+            backend.name: {**backend.latency.summary(), "error_rate": backend.error_rate,
+                           "open": backend.opened_at is not None, "trips": backend.trips}
+            for backend in self.backends
+        }
+        return stats
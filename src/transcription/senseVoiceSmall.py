@@ -1,49 +1,28 @@
 import os
 import threading
 import time
-from functools import wraps
 
 import dotenv
-import httpx
 
+from src.llm.postprocess import PostProcessor
 from src.llm.translate import TranslateProcessor
+from ..archive import get_archive_writer
+from ..audio.chunker import ChunkedAudio
+from ..utils.clipboard import get_clipboard_service
+from ..utils.http_client import get_http_client, prewarm
 from ..utils.logger import logger
+from ..utils.timeout import timeout_decorator
+from .base import ASRBackend
+from .cache import get_transcription_cache
+from .chunking import LongFormTranscriber
 
 dotenv.load_dotenv()
 
-def timeout_decorator(seconds):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            result = [None]
-            error = [None]
-            completed = threading.Event()
-
-            def target():
-                try:
-                    result[0] = func(*args, **kwargs)
-                except Exception as e:
-                    error[0] = e
-                finally:
-                    completed.set()
-
-            thread = threading.Thread(target=target)
-            thread.daemon = True
-            thread.start()
-
-            if completed.wait(seconds):
-                if error[0] is not None:
-                    raise error[0]
-                return result[0]
-            raise TimeoutError(f"操作超时 ({seconds}秒)")
-
-        return wrapper
-    return decorator
-
-class SenseVoiceSmallProcessor:
+class SenseVoiceSmallProcessor(ASRBackend):
     # 类级别的配置参数
     DEFAULT_TIMEOUT = 20  # API 超时时间（秒）
     DEFAULT_MODEL = "FunAudioLLM/SenseVoiceSmall"
+    TRANSCRIPTION_URL = "https://api.siliconflow.cn/v1/audio/transcriptions"
     
     def __init__(self):
         api_key = os.getenv("SILICONFLOW_API_KEY")
@@ -56,14 +35,20 @@ class SenseVoiceSmallProcessor:
         # self.optimize_result = os.getenv("OPTIMIZE_RESULT", "false").lower() == "true"
         self.timeout_seconds = self.DEFAULT_TIMEOUT
         self.translate_processor = TranslateProcessor()
-        # 添加一个锁来防止重复处理
-        self.processing_lock = threading.Lock()
-        self.last_processed_time = 0
-        self.min_processing_interval = 1.0  # 最小处理间隔（秒）
-        self.last_audio_hash = None  # 用于检测重复音频
-        # 增强重复检测机制
-        self.recent_audio_hashes = set()  # 存储最近处理的音频哈希值
-        self.max_recent_hashes = 10  # 最多存储10个最近的哈希值
+        self.post_processor = PostProcessor(self.translate_processor.chat, {
+            "translate": self.translate_processor.translate,
+        }, stream_steps={
+            "translate": self.translate_processor.translate_stream,
+        })
+        self.long_form = LongFormTranscriber.from_env()
+        # 按音频内容缓存识别结果，重放、重试同一段音频时直接返回
+        self.cache = get_transcription_cache()
+        self.archive_enabled = True  # 为 False 时不归档（批量识别默认不归档）
+
+    @property
+    def archive(self):
+        """录音与字幕的后台归档线程，第一次用到时才启动；不归档时为 None"""
+        return get_archive_writer() if self.archive_enabled else None
 
     def _convert_traditional_to_simplified(self, text):
         """将繁体中文转换为简体中文"""
@@ -71,13 +56,15 @@ class SenseVoiceSmallProcessor:
             return text
         return self.cc.convert(text)
 
+    def prewarm(self):
+        """按键按下时预先建立到 API 的连接"""
+        prewarm(self.TRANSCRIPTION_URL, self.translate_processor.url)
+
     @timeout_decorator(10)
-    def _call_api(self, audio_data):
+    def _call_api(self, audio_data, filename="audio.wav"):
         """调用硅流 API"""
-        transcription_url = "https://api.siliconflow.cn/v1/audio/transcriptions"
-        
         files = {
-            'file': ('audio.wav', audio_data),
+            'file': (filename, audio_data),
             'model': (None, self.DEFAULT_MODEL)
         }
 
@@ -85,134 +72,132 @@ class SenseVoiceSmallProcessor:
             'Authorization': f"Bearer {os.getenv('SILICONFLOW_API_KEY')}"
         }
 
-        with httpx.Client() as client:
-            response = client.post(transcription_url, files=files, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json().get('text', '获取失败')
-
-
-    def process_audio(self, audio_buffer, mode="transcriptions", prompt=""):
-        """处理音频（转录或翻译）
+        response = get_http_client().post(self.TRANSCRIPTION_URL, files=files, headers=headers, timeout=30.0)
+        response.raise_for_status()
+        return response.json().get('text', '获取失败')
+
+
+    def _cache_key(self, audio_hash):
+        # 翻译在后处理中完成，识别结果只取决于音频和模型，与模式无关
+        return self.cache.key(audio_hash, model=self.DEFAULT_MODEL)
+
+    def _call_api_cached(self, audio_data, filename):
+        key = self._cache_key(self.cache.audio_hash(audio_data))
+        result = self.cache.get(key)
+        if result is None:
+            result = self._call_api(audio_data, filename)
+            self.cache.put(key, result)
+        return result
+
+    def _transcribe_long(self, chunks, mode):
+        """长录音：各段并发调用 API，合并识别结果，整段录音在后台归档"""
+        logger.info(f"正在调用 硅基流动 API... (模式: {mode}, 长录音 {len(chunks)} 段)")
+        start_time = time.time()
+        result = self.long_form.transcribe(
+            chunks, lambda buffer: self._call_api_cached(buffer.getvalue(), buffer.name))
+        logger.info(f"识别缓存: {self.cache.stats()}")
+        if self.archive is not None:
+            # 整段编码较慢，不放在输入结果的关键路径上；识别失败也保留录音（按时间命名）
+            text, _ = result
+            threading.Thread(target=self._archive_long, args=(chunks, text or "", mode, time.time() - start_time),
+                             name="archive-long-form", daemon=True).start()
+        return result
+
+    def _archive_long(self, chunks, transcript, mode, latency):
+        """把长录音整段编码后交给归档线程"""
+        try:
+            audio_buffer = chunks.encode_full()
+            if audio_buffer is None:
+                return
+            audio_data = audio_buffer.getvalue()
+            ext = os.path.splitext(audio_buffer.name)[1] or ".wav"
+            self.archive.submit_recording(audio_data, ext, transcript, self.cache.audio_hash(audio_data), mode=mode,
+                                          model=self.DEFAULT_MODEL, latency=latency)
+        except Exception as e:
+            logger.warning(f"长录音归档失败: {e}")
+
+    def post_process_stream(self, result, mode="transcriptions"):
+        """以流式输出做翻译，返回 StreamedText；无需翻译时返回 None"""
+        if mode != "translations":
+            return None
+        # 流式输出时输入线程正通过剪贴板粘贴各批文本，不能再改写剪贴板
+        return self.post_processor.stream(
+            result, {"translate"}, on_complete=lambda text: self._publish_result(text, clipboard=False))
+
+    def _publish_result(self, result, clipboard=True):
+        """把最终结果写入剪贴板和字幕记录文件"""
+        logger.info(f"识别结果: {result}")
         
-        Args:
-            audio_buffer: 音频数据缓冲
-            mode: 'transcriptions' 或 'translations'，决定是转录还是翻译
+        # 将结果保存到剪贴板
+        if clipboard:
+            # 在后台写入（失败时由剪贴板服务记录警告）；随后粘贴输入同样的文本时不再重复写入
+            get_clipboard_service().copy_async(result)
         
+        # 记录到字幕文件（字幕窗口通过事件推送显示字幕），在后台写入
+        if self.archive is not None:
+            self.archive.append_subtitle(result)
+
+    def post_process(self, result, mode="transcriptions"):
+        """对识别结果做后处理（翻译、写入剪贴板和字幕）
+
         Returns:
             tuple: (结果文本, 错误信息)
-            - 如果成功，错误信息为 None
-            - 如果失败，结果文本为 None
         """
-        # 使用锁确保同一时间只有一个处理任务在运行
-        if not self.processing_lock.acquire(blocking=False):
-            return None, "正在处理中，请稍后再试"
-        
         try:
-            # 检查是否距离上次处理时间太短
-            current_time = time.time()
-            if current_time - self.last_processed_time < self.min_processing_interval:
-                time.sleep(self.min_processing_interval - (current_time - self.last_processed_time))
-            
-            # 保存原始音频文件
-            import datetime
-            import pyperclip
-            import hashlib
-            
-            # 创建目录结构
-            today = datetime.datetime.now().strftime("%Y-%m-%d")
-            audio_dir = os.path.join("output", today)
-            os.makedirs(audio_dir, exist_ok=True)
-            
-            # 生成临时文件名
-            timestamp = datetime.datetime.now().strftime("%H%M%S")
-            temp_filename = os.path.join(audio_dir, f"recording_{timestamp}.wav")
+            if mode == "translations":
+                result, _ = self.post_processor.process(result, {"translate"})
+            self._publish_result(result)
+
+            return result, None
+        except Exception as e:
+            error_msg = f"❌ {str(e)}"
+            logger.error(f"后处理错误: {str(e)}", exc_info=True)
+            return None, error_msg
+
+    def transcribe(self, audio_buffer, mode="transcriptions", prompt=""):
+        """调用 API 识别音频，返回未经后处理的原始文本
+
+        Returns:
+            tuple: (识别文本, 错误信息)
+        """
+        try:
+            if isinstance(audio_buffer, ChunkedAudio):
+                return self._transcribe_long(audio_buffer, mode)
+
+            # 扩展名与上传编码格式一致
+            filename = getattr(audio_buffer, 'name', 'audio.wav')
+            ext = os.path.splitext(filename)[1] or ".wav"
             
-            # 保存原始音频
             audio_buffer.seek(0)
             audio_data = audio_buffer.read()
             
-            # 计算音频数据的哈希值以检测重复
-            audio_hash = hashlib.md5(audio_data).hexdigest()
-            # 增强重复检测机制
-            if audio_hash in self.recent_audio_hashes:
-                return None, "重复的音频数据，跳过处理"
-            
-            with open(temp_filename, 'wb') as f:
-                f.write(audio_data)
-            
-            # 重置缓冲区位置
-            audio_buffer.seek(0)
+            # 按音频内容查找缓存，命中时不再调用 API
+            audio_hash = self.cache.audio_hash(audio_data)
+            cache_key = self._cache_key(audio_hash)
+            result = self.cache.get(cache_key)
+            if result is not None:
+                logger.info(f"识别缓存命中, 跳过 API 调用 ({self.cache.stats()})")
+                return result, None
             
             start_time = time.time()
             
             logger.info(f"正在调用 硅基流动 API... (模式: {mode})")
-            # 修复：传递正确的音频数据而不是audio_buffer
-            result = self._call_api(audio_data)
-
-            logger.info(f"API 调用成功 ({mode}), 耗时: {time.time() - start_time:.1f}秒")
-            # result = self._convert_traditional_to_simplified(result)
-            if mode == "translations":
-                result = self.translate_processor.translate(result)
-            logger.info(f"识别结果: {result}")
-            
-            # 将结果保存到剪贴板
             try:
-                pyperclip.copy(result)
-                logger.info("识别结果已保存到剪贴板")
-            except Exception as e:
-                logger.warning(f"无法将结果保存到剪贴板: {e}")
-            
-            # 重命名音频文件为识别结果
-            if result:
-                # 清理文件名中的非法字符
-                safe_result = "".join(c for c in result if c.isalnum() or c in (' ','-','_')).rstrip()
-                if safe_result:  # 确保清理后的文件名不为空
-                    new_filename = os.path.join(audio_dir, f"{safe_result}.wav")
-                    # 如果文件名过长，截断
-                    if len(new_filename) > 200:  # 保留一些空间给路径
-                        max_len = 200 - len(os.path.join(audio_dir, ".wav"))
-                        safe_result = safe_result[:max_len]
-                        new_filename = os.path.join(audio_dir, f"{safe_result}.wav")
-                    
-                    # 避免重命名冲突
-                    counter = 1
-                    final_filename = new_filename
-                    while os.path.exists(final_filename):
-                        name, ext = os.path.splitext(new_filename)
-                        final_filename = f"{name}_{counter}{ext}"
-                        counter += 1
-                    
-                    try:
-                        # 修复：检查临时文件是否存在再重命名
-                        if os.path.exists(temp_filename):
-                            os.rename(temp_filename, final_filename)
-                            logger.info(f"音频文件已重命名为: {os.path.basename(final_filename)}")
-                    except Exception as e:
-                        logger.warning(f"无法重命名音频文件: {e}")
-                else:
-                    logger.warning("识别结果为空，无法重命名音频文件")
-            
-            # 发送结果到字幕窗口
-            try:
-                # 通过文件共享结果，因为模块间不能直接导入GUI
-                subtitle_file = os.path.join("logs", "subtitle.txt")
-                if not os.path.exists("logs"):
-                    os.makedirs("logs")
-                
-                with open(subtitle_file, "a", encoding="utf-8") as f:
-                    f.write(result + "\n")
-            except Exception as e:
-                logger.warning(f"无法写入字幕文件: {e}")
+                result = self._call_api(audio_data, filename)
+            except Exception:
+                # 识别失败也保留录音（按时间命名）
+                if self.archive is not None:
+                    self.archive.submit_recording(audio_data, ext, "", audio_hash, mode=mode, model=self.DEFAULT_MODEL)
+                raise
+            self.cache.put(cache_key, result)
+
+            logger.info(f"API 调用成功 ({mode}), 耗时: {time.time() - start_time:.1f}秒, 识别缓存: {self.cache.stats()}")
+            # result = self._convert_traditional_to_simplified(result)
             
-            # 更新最后处理时间和音频哈希
-            self.last_processed_time = time.time()
-            self.last_audio_hash = audio_hash
-            # 更新最近处理的音频哈希集合
-            self.recent_audio_hashes.add(audio_hash)
-            if len(self.recent_audio_hashes) > self.max_recent_hashes:
-                # 移除最早的哈希值（这里简化处理，实际可以使用更复杂的数据结构）
-                oldest_hash = next(iter(self.recent_audio_hashes))
-                self.recent_audio_hashes.discard(oldest_hash)
+            # 录音在后台归档到 output/<日期>/，以识别结果命名
+            if self.archive is not None:
+                self.archive.submit_recording(audio_data, ext, result, audio_hash, mode=mode,
+                                              model=self.DEFAULT_MODEL, latency=time.time() - start_time)
             
             # if self.add_symbol:
             #     result = self.symbol.add_symbol(result)
@@ -235,5 +220,3 @@ class SenseVoiceSmallProcessor:
             # 确保audio_buffer在所有情况下都被正确关闭
             if 'audio_buffer' in locals():
                 audio_buffer.close()  # 显式关闭字节流
-            # 释放锁
-            self.processing_lock.release()
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from ..utils.logger import logger
+from .chunking import merge_transcripts
+
+STREAMING_OUTPUTS = ("type", "subtitle")
+
+
+class StreamingSession:
+    """一次按住说话的流式识别
+
+    录音过程中每完成一段就在后台识别并后处理，结果按段的顺序交给 on_partial；
+    松开按键后只需识别最后的尾段，再由 finish() 汇总。
+    """
+
+    FINISH_TIMEOUT = 60.0  # finish() 最多等待的秒数（各段识别有 API 超时，输出前最多等待前面的语音 30 秒）
+
+    def __init__(self, processor, executor, mode, on_partial=None, output="type", prompt=""):
+        self.processor = processor
+        self.executor = executor
+        self.mode = mode
+        self.prompt = prompt
+        self.on_partial = on_partial
+        self.output = output
+        self._futures = []
+        self._results = {}  # 段序号 -> 文本（识别失败为 None）
+        self._next_index = 0
+        self._delivering = False  # 是否有线程正在调用 on_partial
+        self._lock = threading.Lock()
+        self._delivered = threading.Condition(self._lock)
+
+    @property
+    def segment_count(self):
+        return len(self._futures)
+
+    def add_segment(self, audio_buffer):
+        """提交一段已编码的音频（在录音的分段线程中调用）"""
+        index = len(self._futures)
+        self._futures.append(self.executor.submit(self._run, index, audio_buffer))
+
+    def _run(self, index, audio_buffer):
+        try:
+            text, error = self.processor.transcribe(audio_buffer, self.mode, self.prompt)
+            if not error and text:
+                text, error = self.processor.post_process(text, self.mode)
+        except Exception as e:
+            text, error = None, f"❌ {e}"  # 每段都要记录结果，否则后面的段无法按顺序交付
+        if error:
+            logger.error(f"流式识别第 {index + 1} 段失败: {error}")
+            text = None
+        with self._lock:
+            self._results[index] = text
+        self._flush()
+
+    def _flush(self):
+        """按顺序交付已完成的段
+
+        on_partial 可能等待较久（等待之前的语音输入完毕、模拟键盘输入），不能持有 _lock 调用；
+        同一时间只有一个线程交付，其他线程完成的段由它接着交付。
+        """
+        while True:
+            with self._lock:
+                if self._delivering or self._next_index not in self._results:
+                    return
+                self._delivering = True
+                text = self._results[self._next_index]
+                self._next_index += 1
+            try:
+                if text and self.on_partial:
+                    self.on_partial(text)
+            except Exception as e:
+                logger.error(f"流式识别结果输出失败: {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._delivering = False
+                    self._delivered.notify_all()
+
+    def finish(self, tail_text, timeout=None):
+        """等待所有段处理完毕，返回最终还需要输入的文本
+
+        type 模式下各段已在录音过程中输入，只返回尾段；
+        subtitle 模式下各段只在字幕中显示，返回合并后的全文。
+        最多等待 timeout 秒（默认 FINISH_TIMEOUT），超时后未完成的段不再等待。
+        """
+        deadline = time.monotonic() + (self.FINISH_TIMEOUT if timeout is None else timeout)
+        wait(self._futures, timeout=max(0.0, deadline - time.monotonic()))
+        with self._lock:
+            finished = self._delivered.wait_for(
+                lambda: self._next_index == len(self._futures) and not self._delivering,
+                max(0.0, deadline - time.monotonic()))
+            texts = [self._results.get(i) for i in range(len(self._futures))]
+        if not finished:
+            logger.warning(f"流式识别: 等待各段处理超时，已完成 {sum(1 for t in texts if t is not None)}/{len(texts)} 段")
+        if self.output == "type":
+            return tail_text
+        return merge_transcripts([(text, False) for text in texts + [tail_text or ""]])
+
+
+class StreamingTranscriber:
+    """创建流式识别会话，所有会话共用一个后台线程池"""
+
+    def __init__(self, processor, output="type", concurrency=2):
+        if output not in STREAMING_OUTPUTS:
+            logger.warning(f"未知的流式输出方式: {output}，使用 type")
+            output = "type"
+        self.processor = processor
+        self.output = output
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="streaming")
+
+    @classmethod
+    def from_env(cls, processor):
+        return cls(processor,
+                   output=os.getenv("STREAMING_OUTPUT", "type").lower(),
+                   concurrency=int(os.getenv("STREAMING_CONCURRENCY", "2")))
+
+    def start(self, mode, on_partial=None, prompt=""):
+        """开始一次录音的流式识别会话"""
+        return StreamingSession(self.processor, self._executor, mode, on_partial, self.output, prompt)
@@ -1,134 +1,149 @@
 import os
-import threading
 import time
-from functools import wraps
 
 import dotenv
-import httpx
 from openai import OpenAI
 from opencc import OpenCC
 
+from ..audio.chunker import ChunkedAudio
+from ..llm.postprocess import PostProcessor
+from ..llm.punctuation import PUNCTUATION_ENGINES, BudgetedPunctuator, get_local_punctuator
 from ..llm.symbol import SymbolProcessor
+from ..utils.http_client import get_http_client, prewarm
 from ..utils.logger import logger
+from ..utils.timeout import timeout_decorator
+from .base import ASRBackend
+from .cache import get_transcription_cache
+from .chunking import LongFormTranscriber
 
 dotenv.load_dotenv()
 
-def timeout_decorator(seconds):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            result = [None]
-            error = [None]
-            completed = threading.Event()
-
-            def target():
-                try:
-                    result[0] = func(*args, **kwargs)
-                except Exception as e:
-                    error[0] = e
-                finally:
-                    completed.set()
-
-            thread = threading.Thread(target=target)
-            thread.daemon = True
-            thread.start()
-
-            if completed.wait(seconds):
-                if error[0] is not None:
-                    raise error[0]
-                return result[0]
-            raise TimeoutError(f"操作超时 ({seconds}秒)")
-
-        return wrapper
-    return decorator
-
-class WhisperProcessor:
+class WhisperProcessor(ASRBackend):
     # 类级别的配置参数
     DEFAULT_TIMEOUT = 20  # API 超时时间（秒）
     DEFAULT_MODEL = None
+    GROQ_MODELS = {"transcriptions": "whisper-large-v3-turbo", "translations": "whisper-large-v3"}
     
-    def __init__(self):
+    def __init__(self, service_platform=None):
         api_key = os.getenv("GROQ_API_KEY")
         base_url = os.getenv("GROQ_BASE_URL")
         self.convert_to_simplified = os.getenv("CONVERT_TO_SIMPLIFIED", "false").lower() == "true"
         self.cc = OpenCC('t2s') if self.convert_to_simplified else None
         self.symbol = SymbolProcessor()
+        # 标点引擎：llm / local（本地模型，不调用 LLM）/ auto（LLM 超过延迟预算时改用本地模型）
+        self.punctuation_engine = os.getenv("PUNCTUATION_ENGINE", "llm").lower()
+        if self.punctuation_engine not in PUNCTUATION_ENGINES:
+            raise ValueError(f"未知的标点引擎: {self.punctuation_engine}")
+        punctuate = self.symbol.add_symbol
+        if self.punctuation_engine == "auto":
+            budget = float(os.getenv("PUNCTUATION_LLM_BUDGET_MS", "800")) / 1000
+            punctuate = BudgetedPunctuator(self.symbol.add_symbol, budget)
+        # 标点与优化合并为一次 LLM 请求
+        self.post_processor = PostProcessor(self.symbol.chat, {
+            "punctuate": punctuate,
+            "optimize": self.symbol.optimize_result,
+        }, stream_steps={
+            "punctuate": self.symbol.add_symbol_stream,
+            "optimize": self.symbol.optimize_result_stream,
+        })
         self.add_symbol = os.getenv("ADD_SYMBOL", "false").lower() == "true"
         self.optimize_result = os.getenv("OPTIMIZE_RESULT", "false").lower() == "true"
         self.timeout_seconds = self.DEFAULT_TIMEOUT
-        self.service_platform = os.getenv("SERVICE_PLATFORM", "groq").lower()
+        # 由 ASRRouter 创建时显式指定平台，不受 SERVICE_PLATFORM 影响
+        self.service_platform = (service_platform or os.getenv("SERVICE_PLATFORM", "groq")).lower()
+        self.long_form = LongFormTranscriber.from_env()
+        self.cache = get_transcription_cache()  # 按音频内容缓存识别结果
 
         if self.service_platform == "groq":
             assert api_key, "未设置 GROQ_API_KEY 环境变量"
             self.client = OpenAI(
                 api_key=api_key,
-                base_url=base_url if base_url else None
+                base_url=base_url if base_url else None,
+                http_client=get_http_client(),
+                max_retries=0  # 超时由 TimeoutExecutor 控制，SDK 自带的重试会在调用方超时后继续占用工作线程
             )
-            self.DEFAULT_MODEL = "whisper-large-v3-turbo"
+            self.DEFAULT_MODEL = self.GROQ_MODELS["transcriptions"]
         elif self.service_platform == "siliconflow":
             assert api_key, "未设置 SILICONFLOW_API_KEY 环境变量"
             self.DEFAULT_MODEL = "FunAudioLLM/SenseVoiceSmall"
         else:
             raise ValueError(f"未知的平台: {self.service_platform}")
 
+    def model_for(self, mode="transcriptions"):
+        """Groq 的转录和翻译使用不同的模型"""
+        if self.service_platform == "groq":
+            return self.GROQ_MODELS.get(mode, self.DEFAULT_MODEL)
+        return self.DEFAULT_MODEL
+
     def _convert_traditional_to_simplified(self, text):
         """将繁体中文转换为简体中文"""
         if not self.convert_to_simplified or not text:
             return text
         return self.cc.convert(text)
+
+    def prewarm(self):
+        """按键按下时预先建立到 API 的连接"""
+        if self.service_platform == "groq":
+            prewarm(str(self.client.base_url), str(self.symbol.client.base_url))
     
     @timeout_decorator(10)
     def _call_whisper_api(self, mode, audio_data, prompt):
         """调用 Whisper API"""
         if mode == "translations":
             response = self.client.audio.translations.create(
-                model="whisper-large-v3",
+                model=self.model_for(mode),
                 response_format="text",
                 prompt=prompt,
-                file=("audio.wav", audio_data)
+                file=(getattr(audio_data, "name", "audio.wav"), audio_data)
             )
         else:  # transcriptions
             response = self.client.audio.transcriptions.create(
-                model="whisper-large-v3-turbo",
+                model=self.model_for(mode),
                 response_format="text",
                 prompt=prompt,
-                file=("audio.wav", audio_data)
+                file=(getattr(audio_data, "name", "audio.wav"), audio_data)
             )
         return str(response).strip()
 
-    def process_audio(self, audio_buffer, mode="transcriptions", prompt=""):
-        """调用 Whisper API 处理音频（转录或翻译）
-        
-        Args:
-            audio_path: 音频文件路径
-            mode: 'transcriptions' 或 'translations'，决定是转录还是翻译
-            prompt: 提示词
-        
+    def _transcribe_buffer(self, mode, audio_buffer, prompt):
+        """识别一段音频并做繁简转换，结果按音频内容缓存"""
+        key = self.cache.key(
+            self.cache.audio_hash(audio_buffer.getvalue()),
+            mode=mode,
+            platform=self.service_platform,
+            prompt=prompt,
+            simplified=self.convert_to_simplified,
+        )
+        result = self.cache.get(key)
+        if result is not None:
+            logger.info(f"识别缓存命中, 跳过 API 调用 ({self.cache.stats()})")
+            return result
+        result = self._convert_traditional_to_simplified(self._call_whisper_api(mode, audio_buffer, prompt))
+        self.cache.put(key, result)
+        return result
+
+    def transcribe(self, audio_buffer, mode="transcriptions", prompt=""):
+        """调用 Whisper API 识别音频，返回繁简转换后、未经 LLM 后处理的文本
+
         Returns:
-            tuple: (结果文本, 错误信息)
-            - 如果成功，错误信息为 None
-            - 如果失败，结果文本为 None
+            tuple: (识别文本, 错误信息)
         """
         try:
             start_time = time.time()
 
-            logger.info(f"正在调用 Whisper API... (模式: {mode})")
-            result = self._call_whisper_api(mode, audio_buffer, prompt)
-
-            logger.info(f"API 调用成功 ({mode}), 耗时: {time.time() - start_time:.1f}秒")
-            result = self._convert_traditional_to_simplified(result)
+            if isinstance(audio_buffer, ChunkedAudio):
+                logger.info(f"正在调用 Whisper API... (模式: {mode}, 长录音 {len(audio_buffer)} 段)")
+                result, error = self.long_form.transcribe(
+                    audio_buffer, lambda buffer: self._transcribe_buffer(mode, buffer, prompt))
+                if error:
+                    return None, error
+            else:
+                logger.info(f"正在调用 Whisper API... (模式: {mode})")
+                result = self._transcribe_buffer(mode, audio_buffer, prompt)
+
+            logger.info(f"API 调用成功 ({mode}), 耗时: {time.time() - start_time:.1f}秒, 识别缓存: {self.cache.stats()}")
             logger.info(f"识别结果: {result}")
-            
-            # 仅在 groq API 时添加标点符号
-            if self.service_platform == "groq" and self.add_symbol:
-                result = self.symbol.add_symbol(result)
-                logger.info(f"添加标点符号: {result}")
-            if self.optimize_result:
-                result = self.symbol.optimize_result(result)
-                logger.info(f"优化结果: {result}")
-
             return result, None
-            
 
         except TimeoutError:
             error_msg = f"❌ API 请求超时 ({self.timeout_seconds}秒)"
@@ -139,4 +154,51 @@ class WhisperProcessor:
             logger.error(f"音频处理错误: {str(e)}", exc_info=True)
             return None, error_msg
         finally:
-            audio_buffer.close()  # 显式关闭字节流
\ No newline at end of file
+            audio_buffer.close()  # 显式关闭字节流
+
+    def _post_process_steps(self, result):
+        """确定需要的 LLM 后处理步骤，返回 (经本地处理的文本, 步骤集合)"""
+        steps = set()
+        # 仅在 groq API 时添加标点符号
+        if self.service_platform == "groq" and self.add_symbol:
+            if self.punctuation_engine == "local":
+                result = get_local_punctuator().punctuate(result)
+                logger.info(f"本地标点结果: {result}")
+            else:
+                steps.add("punctuate")
+        if self.optimize_result:
+            steps.add("optimize")
+        return result, steps
+
+    def post_process_stream(self, result, mode="transcriptions"):
+        """以流式输出做 LLM 后处理，返回 StreamedText；无法流式处理时返回 None"""
+        result, steps = self._post_process_steps(result)
+        # auto 标点引擎需要等待完整结果才能判断是否超出预算
+        if steps == {"punctuate"} and self.punctuation_engine == "auto":
+            return None
+        return self.post_processor.stream(
+            result, steps,
+            # LLM 输出可能夹带繁体，本地再转换一次
+            transform=self._convert_traditional_to_simplified,
+            on_complete=lambda text: logger.info(f"后处理结果: {text}"))
+
+    def post_process(self, result, mode="transcriptions"):
+        """对识别结果做 LLM 后处理（添加标点、优化结果）
+
+        Returns:
+            tuple: (结果文本, 错误信息)
+        """
+        try:
+            result, steps = self._post_process_steps(result)
+            if steps:
+                result, _ = self.post_processor.process(result, steps)
+                # LLM 输出可能夹带繁体，本地再转换一次
+                result = self._convert_traditional_to_simplified(result)
+                logger.info(f"后处理结果: {result}")
+
+            return result, None
+
+        except Exception as e:
+            error_msg = f"❌ {str(e)}"
+            logger.error(f"后处理错误: {str(e)}", exc_info=True)
+            return None, error_msg
@@ -0,0 +1,70 @@
+import json
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtNetwork import QAbstractSocket, QTcpSocket
+
+from ..utils.event_feed import auth_line, read_credentials
+
+
+class FeedClient(QObject):
+    """订阅语音助手的事件推送（src.utils.event_feed），收到事件时发出 event 信号
+
+    运行在 Qt 事件循环中，不需要额外线程，也不轮询；主程序尚未启动或退出后每秒重连一次。
+    每次连接前从凭据文件读取主程序本次运行的端口和令牌，连接后先发送令牌。
+    """
+
+    event = pyqtSignal(dict)
+
+    def __init__(self, host="127.0.0.1", types=None, parent=None):
+        """
+        Args:
+            types: 只关心的事件类型集合，None 表示全部
+        """
+        super().__init__(parent)
+        self.host = host
+        self._token = None
+        self.types = set(types) if types else None
+        self._buffer = b""
+        self.socket = QTcpSocket(self)
+        self.socket.connected.connect(self._on_connected)
+        self.socket.readyRead.connect(self._on_ready_read)
+        self.socket.disconnected.connect(self._schedule_reconnect)
+        self.socket.error.connect(lambda _: self._schedule_reconnect())
+        self._reconnect_timer = QTimer(self)
+        self._reconnect_timer.setSingleShot(True)
+        self._reconnect_timer.timeout.connect(self.connect_to_feed)
+        self.connect_to_feed()
+
+    def connect_to_feed(self):
+        if self.socket.state() == QAbstractSocket.UnconnectedState:
+            port, self._token = read_credentials()
+            if port is None:
+                self._schedule_reconnect()  # 主程序尚未启动
+                return
+            self._buffer = b""
+            self.socket.connectToHost(self.host, port)
+
+    def _on_connected(self):
+        self.socket.write(auth_line(self._token))
+
+    def _schedule_reconnect(self):
+        if not self._reconnect_timer.isActive():
+            self._reconnect_timer.start(1000)
+
+    def _on_ready_read(self):
+        self._buffer += bytes(self.socket.readAll())
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if self.types is None or event.get("type") in self.types:
+                self.event.emit(event)
+
+    def close(self):
+        self._reconnect_timer.stop()
+        self.socket.disconnected.disconnect(self._schedule_reconnect)
+        self.socket.abort()
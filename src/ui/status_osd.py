@@ -0,0 +1,74 @@
+import sys
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
+
+from .feed_client import FeedClient
+
+
+class StatusOSD(QWidget):
+    """屏幕底部的状态浮窗：显示录音、转录中、警告和错误等状态
+
+    状态通过事件推送从主程序接收，不再作为临时文字输入到当前应用中；
+    浮窗不获取焦点，空闲时自动隐藏。
+    """
+
+    IDLE_HIDE_DELAY_MS = 300
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowFlags(
+            Qt.FramelessWindowHint |
+            Qt.WindowStaysOnTopHint |
+            Qt.Tool |
+            Qt.WindowDoesNotAcceptFocus |
+            Qt.WindowTransparentForInput  # 鼠标点击穿透到下面的窗口
+        )
+        self.setAttribute(Qt.WA_TranslucentBackground, True)
+        self.setAttribute(Qt.WA_ShowWithoutActivating, True)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.label = QLabel()
+        self.label.setAlignment(Qt.AlignCenter)
+        self.label.setStyleSheet("""
+            QLabel {
+                background-color: rgba(0, 0, 0, 180);
+                color: white;
+                border-radius: 12px;
+                padding: 8px 20px;
+                font-size: 18px;
+            }
+        """)
+        layout.addWidget(self.label)
+
+        self._hide_timer = QTimer(self)
+        self._hide_timer.setSingleShot(True)
+        self._hide_timer.timeout.connect(self.hide)
+
+        self.feed = FeedClient(types={"status"}, parent=self)
+        self.feed.event.connect(self.on_status)
+        self.feed.socket.disconnected.connect(self.hide)  # 主程序退出时不留下过期的状态
+
+    def on_status(self, event):
+        message = event.get("message")
+        if event.get("state") == "idle" or not message:
+            self._hide_timer.start(self.IDLE_HIDE_DELAY_MS)
+            return
+        self._hide_timer.stop()
+        self.label.setText(message)
+        self.adjustSize()
+        self._move_to_bottom_center()
+        self.show()
+        self.raise_()
+
+    def _move_to_bottom_center(self):
+        screen = QApplication.primaryScreen().availableGeometry()
+        self.move(screen.center().x() - self.width() // 2, screen.bottom() - self.height() - 80)
+
+
+if __name__ == "__main__":
+    # 单独运行：python -m src.ui.status_osd
+    app = QApplication(sys.argv)
+    osd = StatusOSD()
+    sys.exit(app.exec_())
@@ -4,16 +4,17 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QTextEdit, QApplication, QMen
                             QFrame)
 from PyQt5.QtCore import Qt, QTimer, QPoint, QEvent
 from PyQt5.QtGui import QFont, QContextMenuEvent
-import os
 import pyperclip
 import datetime
 
+from .feed_client import FeedClient
+
 
 class SubtitleWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.init_ui()
-        self.setup_file_watcher()
+        self.setup_feed()
         
     def init_ui(self):
         """初始化字幕窗口UI"""
@@ -285,50 +286,28 @@ class SubtitleWindow(QWidget):
         self.top_most_timer.timeout.connect(self.ensure_top_most)
         self.top_most_timer.start(300)  # 每300毫秒检查一次
 
-    def setup_file_watcher(self):
-        """设置文件监视器以监听字幕更新"""
-        subtitle_file = os.path.join("logs", "subtitle.txt")
-        if not os.path.exists("logs"):
-            os.makedirs("logs")
-        
-        # 创建空的字幕文件（如果不存在）
-        if not os.path.exists(subtitle_file):
-            with open(subtitle_file, "w", encoding="utf-8") as f:
-                pass
-        
-        # 使用定时器定期检查文件更新
-        self.last_position = 0
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_subtitle_file)
-        self.timer.start(500)  # 每500ms检查一次
-        
-    def check_subtitle_file(self):
-        """检查字幕文件更新"""
-        try:
-            subtitle_file = os.path.join("logs", "subtitle.txt")
-            if not os.path.exists(subtitle_file):
-                return
-                
-            current_size = os.path.getsize(subtitle_file)
-            if current_size < self.last_position:
-                # 文件被清空或轮转
-                self.last_position = 0
-                
-            if current_size > self.last_position:
-                with open(subtitle_file, "r", encoding="utf-8") as f:
-                    f.seek(self.last_position)
-                    new_content = f.read()
-                    self.last_position = f.tell()
-                    
-                if new_content:
-                    lines = new_content.strip().split('\n')
-                    for line in lines:
-                        if line.strip():
-                            self.add_text(line)
-        except Exception as e:
-            pass  # 静默处理文件读取错误
-    
-    def add_text(self, text):
+    def setup_feed(self):
+        """订阅语音助手推送的字幕（主程序尚未启动或重启时自动重连）"""
+        self.partial_texts = []  # 流式识别的中间结果，收到完整字幕后清除
+        self.last_event_ts = 0.0  # 重连后会再次收到保留的最近字幕，按时间戳跳过已显示的
+        self.feed = FeedClient(types={"subtitle", "partial"}, parent=self)
+        self.feed.event.connect(self.on_subtitle_event)
+
+    def on_subtitle_event(self, event):
+        """收到推送的字幕或中间结果"""
+        text = event.get("text")
+        ts = event.get("ts", 0.0)
+        if not text or ts <= self.last_event_ts:
+            return
+        self.last_event_ts = ts
+        if event.get("type") == "partial":
+            self.partial_texts.append(text)
+            self.refresh_text()
+        else:
+            self.partial_texts = []
+            self.add_text(text, force_refresh=True)
+
+    def add_text(self, text, force_refresh=False):
         """添加新文本到显示"""
         if text:
             # 避免添加重复的文本
@@ -337,23 +316,26 @@ class SubtitleWindow(QWidget):
                 # 限制历史记录数量
                 if len(self.text_history) > self.max_history:
                     self.text_history.pop(0)
-            else:
+            elif not force_refresh:
                 # 如果是重复文本，不进行任何操作
                 return
-            
-            # 更新显示文本
-            display_text = '\n'.join(self.text_history)
-            self.text_edit.setPlainText(display_text)
-            
-            # 调整字体大小以适应窗口
-            self.adjust_font_size()
-            
-            # 调整窗口大小以适应文本
-            self.adjustSize()
-            self.show()  # 确保窗口显示
-            
-            # 确保窗口始终保持在最前面
-            self.ensure_top_most()
+            self.refresh_text()
+
+    def refresh_text(self):
+        """显示历史记录和尚未完成的中间结果"""
+        # 更新显示文本
+        lines = (self.text_history + self.partial_texts)[-self.max_history:]
+        self.text_edit.setPlainText('\n'.join(lines))
+
+        # 调整字体大小以适应窗口
+        self.adjust_font_size()
+
+        # 调整窗口大小以适应文本
+        self.adjustSize()
+        self.show()  # 确保窗口显示
+
+        # 确保窗口始终保持在最前面
+        self.ensure_top_most()
     
     def update_text_edit_style(self):
         """更新文本编辑区域的样式"""
@@ -590,6 +572,7 @@ class SubtitleWindow(QWidget):
     def clear_history(self):
         """清除字幕历史记录"""
         self.text_history = []
+        self.partial_texts = []
         self.text_edit.clear()
     
     def save_to_file(self):
@@ -662,6 +645,7 @@ class SubtitleWindow(QWidget):
 
 # 测试代码
 if __name__ == "__main__":
+    # 单独运行：python -m src.ui.subtitle
     app = QApplication(sys.argv)
     window = SubtitleWindow()
     window.show()
@@ -0,0 +1,215 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pyperclip
+
+from .logger import logger
+
+CLIPBOARD_BACKENDS = ("auto", "appkit", "pyperclip")
+
+
+class PyperclipBackend:
+    """pyperclip：Windows 上直接调用 Win32 API；Linux 上每次读写都会启动一个 xclip/xsel 进程"""
+
+    name = "pyperclip"
+
+    def read(self):
+        return pyperclip.paste()
+
+    def write(self, text):
+        pyperclip.copy(text)
+
+    def change_count(self):
+        """剪贴板被改动的计数；无法获取时返回 None"""
+        return None
+
+
+class AppKitBackend:
+    """macOS：在进程内持有 NSPasteboard，不启动 pbcopy/pbpaste 进程；changeCount 可以判断剪贴板是否被改动"""
+
+    name = "appkit"
+
+    def __init__(self):
+        from AppKit import NSPasteboard, NSPasteboardTypeString
+        self._pasteboard = NSPasteboard.generalPasteboard()
+        self._type = NSPasteboardTypeString
+
+    def read(self):
+        return self._pasteboard.stringForType_(self._type) or ""
+
+    def write(self, text):
+        self._pasteboard.clearContents()
+        self._pasteboard.setString_forType_(text, self._type)
+
+    def change_count(self):
+        return self._pasteboard.changeCount()
+
+
+def create_backend(name="auto"):
+    if name not in CLIPBOARD_BACKENDS:
+        raise ValueError(f"未知的剪贴板后端: {name}")
+    if name == "appkit" or (name == "auto" and sys.platform == "darwin"):
+        try:
+            return AppKitBackend()
+        except ImportError as e:
+            if name == "appkit":
+                raise
+            logger.warning(f"无法使用 NSPasteboard，改用 pyperclip: {e}")
+    return PyperclipBackend()
+
+
+class ClipboardService:
+    """剪贴板读写服务：所有读写在一个后台线程中串行执行
+
+    - 延迟保存：一次语音输入（begin_session）开始时不读取剪贴板，第一次写入前才保存原始内容；
+      整个过程都没有写入剪贴板（如结果直接合成按键输入）时既不保存也不恢复
+    - 合并：写入的内容与剪贴板中已知的内容相同时跳过；排队中的后台写入只执行最后一次
+    - 缓存：后端能提供改动计数时（macOS），剪贴板未被其他程序改动就直接使用已知的内容，不再读取
+    - 统计每次语音输入的读、写和跳过次数
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or PyperclipBackend()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clipboard")
+        self._lock = threading.Lock()
+        self._known = None  # 剪贴板中已知的内容
+        self._known_count = None  # 得到已知内容时的改动计数
+        self._session = False  # 是否处于一次语音输入中（尚未恢复原始内容）
+        self._original = None  # 本次语音输入开始前的内容（第一次写入前保存）
+        self._saved = False
+        self._pending_async = None  # 排队中的后台写入
+        self.ops = {"read": 0, "write": 0, "skipped": 0}
+        self.total_ops = {"read": 0, "write": 0, "skipped": 0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(create_backend(os.getenv("CLIPBOARD_BACKEND", "auto").lower()))
+
+    def _count(self, op):
+        self.ops[op] += 1
+        self.total_ops[op] += 1
+
+    def _known_valid(self):
+        """已知的内容是否仍然是剪贴板中的内容（在后台线程中调用）"""
+        if self._known is None:
+            return False
+        count = self.backend.change_count()
+        if count is None:
+            return self._session  # 无法判断时只在一次语音输入内信任已知内容
+        return count == self._known_count
+
+    def _read(self):
+        if self._known_valid():
+            self._count("skipped")
+            return self._known
+        self._count("read")
+        self._known = self.backend.read()
+        self._known_count = self.backend.change_count()
+        return self._known
+
+    def _write(self, text):
+        if self._session and not self._saved:
+            self._original = self._read()
+            self._saved = True
+        if self._known_valid() and self._known == text:
+            self._count("skipped")
+            return
+        self._count("write")
+        self.backend.write(text)
+        self._known = text
+        self._known_count = self.backend.change_count()
+
+    def _submit_async(self, fn, *args):
+        """在后台线程中执行，不等待结果；出错时记录警告（调用方不会看到异常）"""
+        def log_error(future):
+            error = future.exception()
+            if error is not None:
+                logger.warning(f"剪贴板操作失败: {error}")
+
+        self._executor.submit(fn, *args).add_done_callback(log_error)
+
+    def begin_session(self):
+        """开始一次语音输入（不读取剪贴板）；上一次的原始内容尚未恢复时继续沿用"""
+        self._submit_async(self._begin)
+
+    def _begin(self):
+        if self._session:
+            return
+        self._session = True
+        self._saved = False
+        self._original = None
+        self.ops = {"read": 0, "write": 0, "skipped": 0}
+        if self.backend.change_count() is None:
+            self._known = None  # 两次语音输入之间剪贴板可能被改动过，且无法判断
+
+    def paste(self):
+        """读取剪贴板内容"""
+        return self._executor.submit(self._read).result()
+
+    def copy(self, text):
+        """写入剪贴板并等待完成（随后要模拟粘贴时使用）"""
+        self._executor.submit(self._write, text).result()
+
+    def copy_async(self, text):
+        """在后台写入剪贴板，不等待；排队中的多次写入只执行最后一次"""
+        with self._lock:
+            queued = self._pending_async is not None
+            self._pending_async = text
+            if queued:
+                self._count("skipped")
+                return
+        self._submit_async(self._write_pending)
+
+    def _write_pending(self):
+        with self._lock:
+            text, self._pending_async = self._pending_async, None
+        if text is not None:
+            self._write(text)
+
+    def restore(self):
+        """结束本次语音输入：写入过剪贴板时在后台恢复原始内容"""
+        self._submit_async(self._restore)
+
+    def end_session(self, text=None):
+        """结束本次语音输入，不恢复原始内容；给出 text 时在后台把剪贴板改为 text"""
+        self._submit_async(self._end, text)
+
+    def _restore(self):
+        if not self._session:
+            return
+        if self._saved:
+            self._write(self._original)
+        self._end()
+
+    def _end(self, text=None):
+        if not self._session:
+            if text is not None:
+                self._write(text)
+            return
+        if text is not None:
+            self._saved = True  # 不会恢复，不必保存原始内容
+            self._write(text)
+        self._session = False
+        self._original = None
+        self._saved = False
+        ops = self.ops
+        logger.info(f"剪贴板操作: 读取 {ops['read']} 次, 写入 {ops['write']} 次, 跳过 {ops['skipped']} 次 "
+                    f"({self.backend.name})")
+
+    def stats(self):
+        return {"backend": self.backend.name, "session": dict(self.ops), "total": dict(self.total_ops)}
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_clipboard_service():
+    """获取全局剪贴板服务"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ClipboardService.from_env()
+        return _service
@@ -0,0 +1,267 @@
+import collections
+import hmac
+import json
+import os
+import queue
+import secrets
+import socket
+import threading
+import time
+
+from .logger import logger
+
+AUTH_TIMEOUT_SECONDS = 2.0
+
+
+def default_credentials_file():
+    """连接凭据（端口和本次运行的令牌）文件，只有当前用户可以读取"""
+    return os.getenv("EVENT_FEED_CREDENTIALS_FILE") or os.path.join(
+        os.path.expanduser("~"), ".voice_assistant", "event_feed.json")
+
+
+def read_credentials(path=None):
+    """读取连接凭据，返回 (端口, 令牌)；文件不存在（主程序未运行）时返回 (None, None)"""
+    try:
+        with open(path or default_credentials_file(), "r", encoding="utf-8") as f:
+            credentials = json.load(f)
+        return credentials["port"], credentials["token"]
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def auth_line(token):
+    """订阅者连接后发送的第一行"""
+    return (json.dumps({"token": token}) + "\n").encode()
+
+
+class _Subscriber:
+    """一个订阅连接：独立的发送线程和有界队列，读得慢的订阅者不会阻塞发布方"""
+
+    def __init__(self, feed, sock, address):
+        self.feed = feed
+        self.sock = sock
+        self.address = address
+        self.queue = queue.Queue(maxsize=feed.subscriber_queue_size)
+        self.closed = False
+        threading.Thread(target=self._run, name=f"event-feed-{address[1]}", daemon=True).start()
+
+    def send(self, line):
+        try:
+            self.queue.put_nowait(line)
+        except queue.Full:
+            logger.warning(f"事件订阅者 {self.address} 读取过慢，断开连接")
+            self.close()
+
+    def _authenticate(self):
+        """读取订阅者发送的第一行并校验令牌"""
+        try:
+            self.sock.settimeout(AUTH_TIMEOUT_SECONDS)
+            data = b""
+            while b"\n" not in data and len(data) < 1024:
+                chunk = self.sock.recv(1024)
+                if not chunk:
+                    return False
+                data += chunk
+            self.sock.settimeout(None)
+            token = json.loads(data.split(b"\n", 1)[0]).get("token")
+        except (OSError, ValueError, AttributeError):
+            return False
+        return isinstance(token, str) and hmac.compare_digest(token, self.feed.token)
+
+    def _run(self):
+        if not self._authenticate():
+            logger.warning(f"事件订阅者 {self.address} 未通过验证，断开连接")
+            self.close()
+            return
+        self.feed._add(self)
+        while not self.closed:
+            line = self.queue.get()
+            if line is None:
+                break
+            try:
+                self.sock.sendall(line)
+            except OSError:
+                break
+        self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.feed._remove(self)
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class EventFeed:
+    """本地事件推送：在 127.0.0.1 上监听 TCP 连接，向所有订阅者逐行发送 JSON 事件（NDJSON）
+
+    每个事件形如 {"type": "status", "ts": 1700000000.0, ...}。
+    retain 中的事件类型会保留最近的若干条，新的订阅者连接后按发布顺序立即收到（如当前状态、最近的字幕）。
+    字幕窗口、状态浮窗等界面进程都可以订阅，语音助手本身不依赖任何订阅者。
+
+    事件中含有识别结果，订阅者连接后须先发送本次运行随机生成的令牌（auth_line），验证通过才会收到事件；
+    令牌和端口写入只有当前用户可读的凭据文件（credentials_file），其他用户的进程无法订阅。
+    """
+
+    def __init__(self, host="127.0.0.1", port=47821, retain=None, subscriber_queue_size=256, credentials_file=None):
+        """
+        Args:
+            retain: 事件类型 -> 保留的条数，默认只保留最后一条状态
+            credentials_file: 启动后写入端口和令牌的文件，None 表示不写入（由调用方直接使用 token）
+        """
+        self.host = host
+        self.token = secrets.token_urlsafe(32)
+        self.credentials_file = credentials_file
+        self.port = port
+        self.retain = dict(retain) if retain is not None else {"status": 1}
+        self.subscriber_queue_size = subscriber_queue_size
+        self._subscribers = []
+        self._retained = collections.deque()  # (事件类型, 事件)，按发布顺序
+        self._lock = threading.RLock()  # 订阅者在持有锁时也可能断开并移除自己
+        self._server = None
+        self.published = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            port=int(os.getenv("EVENT_FEED_PORT", "47821")),
+            retain={"status": 1, "subtitle": int(os.getenv("SUBTITLE_HISTORY", "20"))},
+            credentials_file=default_credentials_file(),
+        )
+
+    def start(self):
+        """开始监听；端口被占用时只记录警告，之后的事件不会发送给任何人"""
+        try:
+            server = socket.create_server((self.host, self.port))
+        except OSError as e:
+            logger.warning(f"事件推送服务启动失败 ({self.host}:{self.port}): {e}")
+            return False
+        self._server = server
+        self.port = server.getsockname()[1]  # port=0 时由系统分配
+        if self.credentials_file:
+            try:
+                self._write_credentials()
+            except OSError as e:
+                logger.warning(f"无法写入事件推送凭据 ({self.credentials_file}): {e}")
+        threading.Thread(target=self._accept, name="event-feed", daemon=True).start()
+        logger.info(f"事件推送服务已启动: {self.host}:{self.port}")
+        return True
+
+    def _accept(self):
+        while True:
+            try:
+                sock, address = self._server.accept()
+            except OSError:
+                break  # 已关闭
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            _Subscriber(self, sock, address)  # 在订阅者自己的线程中验证令牌
+
+    def _write_credentials(self):
+        """原子地写入凭据文件，权限为 0600（目录 0700）"""
+        directory = os.path.dirname(self.credentials_file)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        tmp = f"{self.credentials_file}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"port": self.port, "token": self.token, "pid": os.getpid()}, f)
+        os.replace(tmp, self.credentials_file)
+
+    def _add(self, subscriber):
+        """验证通过的订阅者：先补发保留的事件，再接收新事件"""
+        with self._lock:
+            for _, line in self._retained:
+                subscriber.send(line)
+            self._subscribers.append(subscriber)
+
+    def _remove(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, event_type, **fields):
+        """发布事件（不等待订阅者接收）"""
+        line = (json.dumps({"type": event_type, "ts": time.time(), **fields}, ensure_ascii=False) + "\n").encode()
+        with self._lock:
+            self.published += 1
+            if self.retain.get(event_type, 0) > 0:
+                self._retain(event_type, line)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.send(line)
+
+    def _retain(self, event_type, line):
+        """保留事件，超出该类型的条数时丢弃该类型最早的一条（持有锁时调用）"""
+        self._retained.append((event_type, line))
+        same_type = [item for item in self._retained if item[0] == event_type]
+        if len(same_type) > self.retain[event_type]:
+            self._retained.remove(same_type[0])
+
+    @property
+    def subscribers(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            if self.credentials_file and read_credentials(self.credentials_file)[1] == self.token:
+                try:
+                    os.remove(self.credentials_file)
+                except OSError:
+                    pass
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.close()
+
+
+def iter_events(host="127.0.0.1", port=None, timeout=None, token=None):
+    """订阅事件推送（阻塞），逐个产生事件字典；连接断开时结束
+
+    port / token 为 None 时从凭据文件读取
+    """
+    if port is None or token is None:
+        file_port, file_token = read_credentials()
+        port, token = port or file_port, token or file_token
+    if port is None or token is None:
+        raise ConnectionError("没有找到事件推送凭据，主程序可能尚未启动")
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(auth_line(token))
+        buffer = b""
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                return
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+
+_feed = None
+_feed_started = False  # 只尝试启动一次，启动失败后各处一致地得到 None
+_feed_lock = threading.Lock()
+
+
+def get_event_feed():
+    """获取全局事件推送服务（首次调用时启动）；EVENT_FEED_ENABLED=false 或启动失败时返回 None"""
+    global _feed, _feed_started
+    if os.getenv("EVENT_FEED_ENABLED", "true").lower() != "true":
+        return None
+    with _feed_lock:
+        if not _feed_started:
+            _feed_started = True
+            feed = EventFeed.from_env()
+            # 端口不可用（如已有另一个实例在运行）时返回 None，状态改为 inline 显示
+            _feed = feed if feed.start() else None
+        return _feed
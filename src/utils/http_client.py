@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from .logger import logger
+from .timeout import current_deadline
+
+
+class ConnectionStats:
+    """连接复用统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.new = 0
+
+    def record(self, reused):
+        with self._lock:
+            if reused:
+                self.reused += 1
+            else:
+                self.new += 1
+            return self.reused, self.new
+
+    def summary(self):
+        with self._lock:
+            total = self.reused + self.new
+            return {
+                "reused": self.reused,
+                "new": self.new,
+                "reuse_rate": self.reused / total if total else None,
+            }
+
+
+class _TrackingTransport(httpx.HTTPTransport):
+    """记录每个请求是否复用了已有连接的传输层
+
+    通过 httpcore 的 trace 扩展判断：只有新建连接时才会出现 connect_tcp 事件。
+    """
+
+    def __init__(self, stats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+        self.last_used = {}  # host -> 最近一次请求完成的时间
+
+    def handle_request(self, request):
+        self._apply_deadline(request)
+        connect_events = []
+        outer_trace = request.extensions.get("trace")
+
+        def trace(event_name, info):
+            if event_name.startswith("connection.connect_tcp"):
+                connect_events.append(event_name)
+            if outer_trace is not None:
+                outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        start = time.perf_counter()
+        response = super().handle_request(request)
+        elapsed = time.perf_counter() - start
+
+        reused = not connect_events
+        reused_total, new_total = self.stats.record(reused)
+        self.last_used[request.url.host] = time.monotonic()
+        logger.info(f"HTTP {request.method} {request.url.host}{request.url.path} "
+                    f"({response.http_version}) 连接{'复用' if reused else '新建'}, "
+                    f"首字节 {elapsed * 1000:.0f}ms, 累计 复用 {reused_total} / 新建 {new_total}")
+        return response
+
+    @staticmethod
+    def _apply_deadline(request):
+        """把调用方的截止时间下推到本次请求的各项超时，超时后请求在网络层被中止"""
+        deadline = current_deadline()
+        if deadline is None:
+            return
+        remaining = deadline.remaining()
+        if deadline.cancelled or remaining <= 0:
+            raise httpx.TimeoutException("调用已超时或被取消，放弃请求", request=request)
+        timeout = dict(request.extensions.get("timeout") or {})
+        for key in ("connect", "read", "write", "pool"):
+            value = timeout.get(key)
+            timeout[key] = remaining if value is None else min(value, remaining)
+        request.extensions["timeout"] = timeout
+
+
+_client = None
+_transport = None
+_client_lock = threading.Lock()
+_stats = ConnectionStats()
+_prewarming = set()
+
+
+def _http2_enabled():
+    """是否启用 HTTP/2（需要安装 h2）"""
+    if os.getenv("HTTP2", "false").lower() != "true":
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("未安装 h2，HTTP/2 不可用，改用 HTTP/1.1 (pip install httpx[http2])")
+        return False
+    return True
+
+
+def get_http_client():
+    """获取进程内共享的 HTTP 客户端（连接池 + keep-alive）"""
+    global _client, _transport
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                http2 = _http2_enabled()
+                limits = httpx.Limits(
+                    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "20")),
+                    max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "10")),
+                    keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "120")),
+                )
+                # retries 仅在建立连接失败时重试，可以应对服务端已关闭的空闲连接
+                _transport = _TrackingTransport(_stats, http2=http2, limits=limits, retries=1)
+                _client = httpx.Client(transport=_transport, timeout=httpx.Timeout(30.0, connect=10.0))
+                logger.info(f"共享 HTTP 客户端已创建 (HTTP/2: {'开启' if http2 else '关闭'}, "
+                            f"最大连接数: {limits.max_connections})")
+    return _client
+
+
+def get_connection_stats():
+    """返回连接复用统计"""
+    return _stats.summary()
+
+
+def prewarm(*urls):
+    """在后台预先建立到目标主机的连接（TCP + TLS），已有活跃连接时跳过"""
+    client = get_http_client()
+    keepalive_expiry = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "120"))
+
+    for url in urls:
+        if not url:
+            continue
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        last_used = _transport.last_used.get(parts.hostname)
+        # 留出余量，避免复用即将被服务端关闭的连接
+        if last_used is not None and time.monotonic() - last_used < keepalive_expiry / 2:
+            continue
+        with _client_lock:
+            if origin in _prewarming:
+                continue
+            _prewarming.add(origin)
+
+        def warm(origin=origin):
+            try:
+                client.head(origin, timeout=5.0)
+            except Exception as e:
+                logger.warning(f"连接预热失败 ({origin}): {e}")
+            finally:
+                with _client_lock:
+                    _prewarming.discard(origin)
+
+        threading.Thread(target=warm, daemon=True).start()
@@ -0,0 +1,45 @@
+import threading
+from collections import deque
+
+
+class LatencyTracker:
+    """滑动窗口延迟统计（线程安全）"""
+
+    def __init__(self, window=100):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0  # 累计样本数（不受窗口限制）
+
+    def record(self, seconds):
+        """记录一次耗时（秒）"""
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def percentile(self, p):
+        """返回窗口内第 p 百分位的耗时（秒），没有样本时返回 None"""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    @property
+    def last(self):
+        """最近一次耗时（秒）"""
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    def summary(self):
+        """返回统计摘要（毫秒）"""
+        with self._lock:
+            samples = list(self._samples)
+        if not samples:
+            return {"count": self.count, "mean_ms": None, "p50_ms": None, "p95_ms": None}
+        return {
+            "count": self.count,
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+        }
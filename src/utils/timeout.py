@@ -0,0 +1,181 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import wraps
+
+from .logger import logger
+
+_current_deadline = contextvars.ContextVar("deadline", default=None)
+_worker_state = threading.local()
+
+
+class Deadline:
+    """一次调用的截止时间，可被调用方提前取消"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self._cancelled = threading.Event()
+
+    def start(self, parent=None):
+        """从现在开始计时，不超出外层的截止时间"""
+        self.expires_at = time.monotonic() + self.seconds
+        if parent is not None and parent.expires_at < self.expires_at:
+            self.expires_at = parent.expires_at
+
+    def remaining(self):
+        """剩余时间（秒），可能为负"""
+        return self.expires_at - time.monotonic()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def expired(self):
+        return self.cancelled or self.remaining() <= 0
+
+    def check(self):
+        """已超时或被取消时抛出 TimeoutError，供长流程在步骤之间调用"""
+        if self.expired():
+            raise TimeoutError(f"操作超时 ({self.seconds}秒)")
+
+
+def current_deadline():
+    """当前线程上下文中的截止时间，没有时返回 None"""
+    return _current_deadline.get()
+
+
+class TimeoutExecutor:
+    """带超时与取消的有界线程池
+
+    - 调用在固定大小的线程池中执行，不会为每次调用新建线程
+    - 截止时间从工作线程开始执行时计起，排队时间不占用调用的超时；
+      排队超过 queue_timeout 秒仍未开始的调用直接放弃
+    - 截止时间通过 contextvars 传递给 HTTP 层，超时的请求会在网络层被中止
+    - 统计进行中、已完成、失败、超时、已取消和排队超时的调用数
+    """
+
+    def __init__(self, max_workers=4, queue_timeout=5.0):
+        self.max_workers = max_workers
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-worker")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0  # 调用方等待超时的次数
+        self.cancelled = 0  # 后台请求被实际中止的次数
+        self.rejected = 0  # 排队超时、未开始即放弃的次数
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def stats(self):
+        """返回调用统计"""
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+                "cancelled": self.cancelled,
+                "rejected": self.rejected,
+            }
+
+    def call(self, seconds, func, *args, **kwargs):
+        """在线程池中执行 func，开始执行后超过 seconds 秒抛出 TimeoutError"""
+        deadline = Deadline(seconds)
+        parent = current_deadline()
+        deadline.start(parent)  # 嵌套调用不能超出外层的截止时间
+
+        if getattr(_worker_state, "active", False):
+            # 已经在工作线程中：直接执行，避免占满线程池导致死锁，超时由 HTTP 层保证
+            token = _current_deadline.set(deadline)
+            try:
+                deadline.check()
+                return func(*args, **kwargs)
+            finally:
+                _current_deadline.reset(token)
+
+        started = threading.Event()
+
+        def run():
+            deadline.start(parent)
+            started.set()
+            if deadline.expired():
+                raise TimeoutError(f"操作超时 ({seconds}秒)")
+            _worker_state.active = True
+            token = _current_deadline.set(deadline)
+            self._count("in_flight")
+            try:
+                result = func(*args, **kwargs)
+                self._count("completed")
+                return result
+            except Exception:
+                if deadline.cancelled:
+                    self._count("cancelled")
+                else:
+                    self._count("failed")
+                raise
+            finally:
+                self._count("in_flight", -1)
+                _current_deadline.reset(token)
+                _worker_state.active = False
+
+        future = self._executor.submit(contextvars.copy_context().run, run)
+        queue_timeout = self.queue_timeout
+        if parent is not None:
+            queue_timeout = min(queue_timeout, parent.remaining())
+        if not started.wait(max(0, queue_timeout)) and future.cancel():
+            # 线程池已满，排队过久：直接放弃，不占用调用的超时
+            deadline.cancel()
+            self._count("rejected")
+            logger.warning(f"调用排队超时 ({self.queue_timeout}秒): {getattr(func, '__qualname__', func)}, "
+                           f"统计: {self.stats()}")
+            raise TimeoutError(f"线程池已满，排队超过 {self.queue_timeout} 秒")
+        started.wait()  # 取消失败说明刚开始执行，截止时间马上就会设置好
+        try:
+            return future.result(timeout=max(0, deadline.remaining()))
+        except FutureTimeoutError:
+            deadline.cancel()
+            self._count("timed_out")
+            logger.warning(f"调用超时 ({seconds}秒): {getattr(func, '__qualname__', func)}, 统计: {self.stats()}")
+            raise TimeoutError(f"操作超时 ({seconds}秒)")
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_timeout_executor():
+    """获取进程内共享的超时线程池"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = TimeoutExecutor(int(os.getenv("API_MAX_WORKERS", "4")),
+                                            float(os.getenv("API_QUEUE_TIMEOUT", "5")))
+    return _executor
+
+
+def get_timeout_stats():
+    """返回共享线程池的调用统计"""
+    return get_timeout_executor().stats()
+
+
+def timeout_decorator(seconds):
+    """为函数加上超时限制，超时抛出 TimeoutError"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_timeout_executor().call(seconds, func, *args, **kwargs)
+
+        return wrapper
+    return decorator